@@ -0,0 +1,64 @@
+"""
+Plotting helpers for mycbr_py_api. They live in their own module because matplotlib and seaborn take long to 
+import; MyCBRRestApi.show_ordered_ssm loads this module on first use.
+"""
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from typing import Tuple
+
+
+def show_ordered_ssm (
+        df:pd.DataFrame, 
+        name:str = 'NotProvided', 
+        ticks_interval:int =10, 
+        figsize:Tuple[int,int] =(10,9), 
+        isAnnot:bool=False
+    ) -> pd.DataFrame:
+
+    """ 
+    Get the Self-Similarity Matrix in an ordered form, where the first column has the highest sum.
+
+    Parameters
+    ----------
+        :param df : The Self-Similarity Matrix in pandas DataFrame format, where indexs and columns are same i.e. caseIDs.
+        :param name : The name to be shown on the plot title. (default: NotProvided).
+        :param ticks_interval : The interval of ticks for the Self-Similarity heatmap.
+        :param figsize : Figure size of the Heatmap plot (default: (10,10)).
+        :param isAnnot : True, will annotate each cell with its similarity value (default: False).
+
+    Plots
+    -----
+        Heatmap : heatmap of the ordered Self-Similarity Matrix.
+
+    Returns
+    -------
+        DataFrame : Ordered Self-Similarity Matrix. NaN represents that a caseID was not compared for the similarity.
+    """
+
+    ordered_series = df.sum( axis=1).sort_values( ascending=False)
+    lis = ordered_series.index.tolist()
+
+    df_1 = df[lis]
+    df_temp = df_1.reindex(lis)
+
+    plt.figure( figsize=figsize)
+
+    ax = sns.heatmap(
+        df_temp, 
+        cmap='viridis', 
+        xticklabels=ticks_interval, 
+        yticklabels=ticks_interval, 
+        fmt='g', 
+        annot=isAnnot, 
+        annot_kws={'size': 9}
+    )
+    
+    ax.invert_xaxis()
+
+    plt.yticks(rotation=0) 
+    plt.title('Self-Similarity Matrix (ordered) for : '+name)
+
+    return df_temp
@@ -1,15 +1,18 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
+from __future__ import annotations
+
 import datetime as datetime
 import random
 
 import requests
 import json
+import hashlib
+import importlib
+import importlib.util
+import os
+import sys
+import time
+import threading
+import contextlib
 
 from typing import Any
 from typing import List
@@ -18,28 +21,215 @@ from typing import Dict
 from typing import Mapping
 from typing import NoReturn
 
+class _LazyModule:
+    """
+    Helper class: a module that is imported on first use. pandas and numpy take long to import and are not 
+    needed by clients asking for plain results (output='dict'), so they are only loaded when used.
+    """
+
+    def __init__ (self, name:str):
+        self.__name = name
+        self.__module = None
+
+    def __getattr__ (self, attribute:str) -> Any:
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+        return getattr(self.__module, attribute)
+
+
+pd = _LazyModule('pandas')
+np = _LazyModule('numpy')
+
+
+def _sibling_module (name:str):
+    """
+    Helper function: import the module `name` from the directory of this file, so that it is found whether or not 
+    that directory is on sys.path.
+    """
+
+    if name not in sys.modules:
+        path = os.path.join( os.path.dirname( os.path.abspath(__file__)), name + '.py')
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+
+    return sys.modules[name]
+
+
 class _Constant:
     BASE_URL = 'http://localhost:8080'
     CASE_ID = 'caseID'
     SIMILARITY = 'similarity'
+    DIGEST_MASK = (1 << 64) - 1
+    OUTPUTS = ('pandas', 'dict')
+    
+
+def _case_digest (case:Dict[str,str]) -> int:
+    """
+    Helper function: 64 bit digest of one case of a casebase listing. Same scheme as mycbrwrapper.fingerprint.caseDigest,
+    so fingerprints computed by either client agree.
+    """
+    items = sorted( (str(key), str(value)) for key, value in case.items() 
+                    if key not in (_Constant.CASE_ID, _Constant.SIMILARITY))
+    raw = json.dumps([str(case[_Constant.CASE_ID]), items])
+    return int.from_bytes( hashlib.blake2b( raw.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class EphemeralCaseBase:
+    """
+    A fixed set of caseIDs for repeated ephemeral retrievals. 
+    
+    The set is registered with the server once and later calls only send its handle, the hex SHA-1 of the 
+    sorted, distinct caseIDs joined by newlines. The server computes the same hash, so a handle never 
+    refers to a different set of cases.
+
+    Parameters
+    ----------
+        :param caseIDs : The cases' IDs to be included in the ephemeral casebase
+    """
+
+    def __init__ (self, caseIDs:List[str]):
+        self.caseIDs = sorted( set( str(caseID) for caseID in caseIDs))
+        self.handle = hashlib.sha1( '\n'.join(self.caseIDs).encode('utf-8')).hexdigest()
+        self.registered = set()
+
+    def __len__ (self) -> int:
+        return len(self.caseIDs)
+
+    def __iter__ (self):
+        return iter(self.caseIDs)
     
     
+class DeadlineExceeded(requests.Timeout):
+    """
+    Raised when a call is started after the deadline set with MyCBRRestApi.deadline has passed.
+    """
+
+
 class MyCBRRestApi:
     __base_url = None
     __conceptID = None
     __casebaseID = None
     __amalgamationFunctionID = None
     __columnNames = None
+    __cache = None
+    __fingerprints = None
+    __fingerprint_ttl = None
+    __timeout = None
+    __hedger = None
+    __replicas = None
+    __limiter = None
+    __local = None
+    __session = None
+    __shared = None
+    __frozen = False
+    __output = None
+    __case_table = False
     
-    def __init__ (self, base_url=None):
+    def __init__ (self, base_url=None, cache=None, fingerprint_ttl:float = 30, timeout:float = 30, 
+                  hedger=None, replicas:List[str] = None, limiter=None, pool_size:int = 32, 
+                  output:str = 'pandas', case_table:bool = False, recorder=None):
+        """
+        Parameters
+        ----------
+            :param base_url : URL of the myCBR-rest server (default: _Constant.BASE_URL)
+            :param cache : Optional persistent result cache, e.g. mycbrwrapper.cache.RetrievalCache.
+                           Retrieval and self-similarity responses are served from it when present.
+            :param fingerprint_ttl : Seconds a casebase fingerprint is trusted before it is revalidated 
+                                     with the server (default: 30)
+            :param timeout : Timeout in seconds of every single REST call, None for no timeout (default: 30)
+            :param hedger : Optional hedging policy for reads, e.g. mycbrwrapper.hedging.Hedger. A read that is 
+                            slower than usual is sent a second time and the first answer is used.
+            :param replicas : URLs of servers with the same project that hedged reads go to 
+                              (default: base_url, over a new connection)
+            :param limiter : Optional adaptive concurrency limiter shared by all threads using this object, 
+                             e.g. mycbrwrapper.limiter.EndpointLimiters. It bounds the number of calls in flight 
+                             per endpoint class (ingest, retrieval, self-similarity).
+            :param pool_size : Number of connections kept open to the server, shared by all threads and 
+                               contexts (see with_context) using this object (default: 32)
+            :param output : 'pandas' to get results as pandas DataFrames, 'dict' to get them as plain lists and 
+                            dicts; pandas is then never imported (default: 'pandas')
+            :param case_table : True, to keep a local copy of each casebase, validated by its fingerprint (see 
+                                getCaseBaseFingerprint). The ...WithContent retrievals then only fetch caseIDs and 
+                                similarities and join the case content locally (default: False)
+            :param recorder : Optional recorder of all REST calls made by this object and its contexts, e.g. 
+                              mycbrwrapper.recorder.Recorder; its hook is added to the requests response hooks. 
+                              The log can be replayed with python -m mycbrwrapper loadtest.
+        """
         
+        if output not in _Constant.OUTPUTS:
+            raise ValueError('output must be one of ' + ', '.join(_Constant.OUTPUTS))
+
         if base_url is None:
             base_url = _Constant.BASE_URL
 
         self.__base_url = base_url
+        self.__cache = cache
+        self.__fingerprints = dict()
+        self.__fingerprint_ttl = fingerprint_ttl
+        self.__timeout = timeout
+        self.__hedger = hedger
+        self.__replicas = list(replicas) if replicas else []
+        self.__limiter = limiter
+        self.__output = output
+        self.__case_table = case_table
+        self.__local = threading.local()
+        self.__session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=len(self.__replicas) + 1, pool_maxsize=pool_size)
+        self.__session.mount('http://', adapter)
+        self.__session.mount('https://', adapter)
+        if recorder is not None:
+            self.__session.hooks['response'].append(recorder.hook)
+        self.__shared = {'lock': threading.Lock(), 'column_names': dict(), 'handles_supported': None}
         self.__conceptID = self.getAllConcepts()[0]
         
         self._setColumnNamesForConcept( self.__conceptID)
+
+
+    def with_context (self, concept:str = None, casebase:str = None, amalgamation:str = None, 
+                      output:str = None) -> 'MyCBRRestApi':
+        """
+        Get a client bound to a concept, casebase and amalgamation function. Creating one makes no REST calls 
+        (except to fetch the column names of a concept not seen before): it shares this client's connection pool, 
+        column names, fingerprints, result cache, hedger and limiter. Its defaults cannot be changed, so one 
+        context can be used by many threads at once.
+
+            with ThreadPoolExecutor(8) as pool:
+                ctx = api.with_context(concept='patient', casebase='casebase', amalgamation='LCA_variables')
+                dfs = pool.map(ctx.getSimilarCasesByCaseID, caseIDs)
+
+        Parameters
+        ----------
+            :param concept : Name of the concept (default: the current concept)
+            :param casebase : Name of the casebase (default: the current casebase)
+            :param amalgamation : Name of the amalgamation function (default: the current amalgamation function)
+            :param output : 'pandas' or 'dict', see __init__ (default: the output of this client)
+
+        Returns
+        -------
+            MyCBRRestApi : The context.
+        """
+
+        if output is not None and output not in _Constant.OUTPUTS:
+            raise ValueError('output must be one of ' + ', '.join(_Constant.OUTPUTS))
+
+        context = object.__new__(MyCBRRestApi)
+        context.__dict__.update(self.__dict__)
+        context.__conceptID = concept if concept is not None else self.__conceptID
+        context.__casebaseID = casebase if casebase is not None else self.__casebaseID
+        context.__amalgamationFunctionID = amalgamation if amalgamation is not None else self.__amalgamationFunctionID
+        context.__output = output if output is not None else self.__output
+        context.__columnNames = context.getColumnNames( context.__conceptID)
+        context.__frozen = True
+
+        return context
+
+
+    def __check_mutable (self) -> NoReturn:
+        if self.__frozen:
+            raise TypeError('the defaults of a context are immutable, use with_context to get another one')
+
         
     def _getCurrentBaseURL(self):
         return self.__base_url
@@ -74,13 +264,14 @@ class MyCBRRestApi:
             Boolean : True is concept name is set, else flase.
         """
         
+        self.__check_mutable()
         flag = False
         
         if (conceptID is not None) and (conceptID is not ''):
             self.__conceptID = conceptID
             if conceptID is self.__conceptID:
                 flag = True
-                self.setColumnNames(conceptID)
+                self._setColumnNamesForConcept(conceptID)
         
         return flag
 
@@ -95,6 +286,7 @@ class MyCBRRestApi:
             Boolean : True is casebase name is set, else flase.
         """
         
+        self.__check_mutable()
         flag = False
         
         if (casebaseID is not None) and (casebaseID is not ''):
@@ -116,6 +308,7 @@ class MyCBRRestApi:
         -------
             Boolean : True is amalgamation function is set, else flase.
         """
+        self.__check_mutable()
         flag = False
         
         if (amalgamationFunctionID is not None) and (amalgamationFunctionID is not ''):
@@ -139,6 +332,7 @@ class MyCBRRestApi:
             Boolean : True is amalgamation function is set, else flase.
         """
         
+        self.__check_mutable()
         flag = False
         
         self.__columnNames = self.getColumnNames(conceptID)  
@@ -164,32 +358,243 @@ class MyCBRRestApi:
 
         if conceptID is None:
             conceptID = self.__conceptID
+
+        column_names = self.__shared['column_names']
+        if conceptID in column_names:
+            return list(column_names[conceptID])
             
         default_columns = [ _Constant.CASE_ID, _Constant.SIMILARITY ]
         attributes = list (self.getAllAttributes( conceptID=conceptID).keys())
         #attributes = pd.DataFrame( self.getAllAttributes( conceptID=conceptID)).index.values.tolist()
         column_list = default_columns + attributes
 
-        return column_list
+        with self.__shared['lock']:
+            column_names[conceptID] = column_list
+
+        return list(column_list)
     
     
     
-    def __rest_response_to_dataframe (self, response:requests.Response ) -> pd.DataFrame:
+    @contextlib.contextmanager
+    def deadline (self, seconds:float):
+        """
+        Set a deadline for all calls made by the current thread within the with-block, including the calls 
+        made internally (e.g. fingerprint revalidation). Each call's timeout is cut to the time left, and calls 
+        started after the deadline raise DeadlineExceeded. Nested deadlines can only shorten the outer one.
+
+            with api.deadline(0.5):
+                df = api.getSimilarCasesByCaseID(...)
+
+        Parameters
+        ----------
+            :param seconds : Time budget for the block
+        """
+
+        outer = getattr(self.__local, 'deadline', None)
+        deadline = time.monotonic() + seconds
+        if outer is not None:
+            deadline = min(deadline, outer)
+
+        self.__local.deadline = deadline
+        try:
+            yield deadline
+        finally:
+            self.__local.deadline = outer
+
+
+    def __call_timeout (self, deadline:float, url:str) -> float:
+        """
+        Helper function: the timeout of a call given the deadline (or None) it runs under.
+        """
+
+        if deadline is None:
+            return self.__timeout
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded('deadline exceeded before calling ' + url)
+
+        return remaining if self.__timeout is None else min(self.__timeout, remaining)
+
+
+    def __request (self, method:str, url:str, hedge:bool = False, replicas:List[str] = None, 
+                   **kwargs) -> requests.Response:
+        """
+        Helper function: every REST call goes through here, so that it gets a timeout, honours the 
+        deadline of the current thread and waits for the concurrency limiter. Reads (hedge=True) are 
+        hedged when a hedger is configured, to the given replicas (default: all of them); an error 
+        response does not win over a call still running.
+        """
+
+        deadline = getattr(self.__local, 'deadline', None)
+        path = url[len(self.__base_url):]
+
+        def send (base_url:str) -> requests.Response:
+            call = lambda: self.__session.request(method, base_url + path, timeout=self.__call_timeout(deadline, url), **kwargs)
+            if self.__limiter is None:
+                return call()
+            return self.__limiter.call(method, url, call)
+
+        if not hedge or self.__hedger is None:
+            return send(self.__base_url)
+
+        if replicas is None:
+            replicas = self.__replicas
+
+        return self.__hedger.call(send, [self.__base_url] + list(replicas), succeeded=lambda response: response.ok)
+
+
+    def __cached_json (self, method:str, url:str, payload:Any = None, conceptID:str = None, casebaseID:str = None, 
+                       raise_for_status:bool = False, replicas:List[str] = None) -> Any:
     
         """     
-        Helper function: convert the request response to pandas DataFrame.
+        Helper function: perform a REST API call and return its JSON response, 
+        served from the result cache when one is configured.
 
         Parameters
         ----------
-            :param response : response from a REST API call
+            :param method : HTTP method, 'GET' or 'POST'
+            :param url : The complete URL of the call, including the query string
+            :param payload : JSON body of the call (default: None)
+            :param conceptID : Concept of the casebase the call depends on
+            :param casebaseID : Casebase the call depends on; its fingerprint is part of the cache key
+            :param raise_for_status : Raise requests.HTTPError for error responses (default: False)
+            :param replicas : Replicas the call may be hedged to (default: all)
 
         Returns
         -------
-            DataFrame : To be done.
+            json : The decoded response.
         """
 
+        fingerprint = None
+
+        if self.__cache is not None:
+            fingerprint = self.getCaseBaseFingerprint( conceptID=conceptID, casebaseID=casebaseID)
+            cached = self.__cache.get(url, payload, fingerprint)
+            if cached is not None:
+                return cached
+
+        response = self.__request(method, url, hedge=True, replicas=replicas, json=payload)
+        if raise_for_status:
+            response.raise_for_status()
         response_json = response.json()
 
+        if self.__cache is not None and response.ok:
+            self.__cache.put(url, response_json, payload, fingerprint)
+
+        return response_json
+    
+    
+    def __register_ephemeral (self, ephemeralCaseBase:EphemeralCaseBase) -> bool:
+    
+        """     
+        Helper function: register the caseIDs of an ephemeral casebase with the server, once per server.
+
+        Returns
+        -------
+            bool : False if the server has no support for registered caseID sets; the caseIDs are then sent with every call.
+        """
+
+        if self.__shared['handles_supported'] is False:
+            return False
+        if self.__base_url in ephemeralCaseBase.registered:
+            return True
+
+        response = self.__request('POST', self.__base_url + '/ephemeral/caseIDSets', json=ephemeralCaseBase.caseIDs)
+        if response.status_code in (404, 405):
+            self.__shared['handles_supported'] = False
+            return False
+        response.raise_for_status()
+
+        self.__shared['handles_supported'] = True
+        ephemeralCaseBase.registered.add(self.__base_url)
+        return True
+
+
+    def __ephemeral_json (self, ephemeralCaseBase:EphemeralCaseBase, method:str, url:str, payload:Any = None, 
+                          conceptID:str = None, casebaseID:str = None) -> Any:
+    
+        """     
+        Helper function: __cached_json for a URL that refers to a registered ephemeral casebase. If the server 
+        has dropped the set (e.g. after a restart) it is registered again and the call is retried once. The call 
+        is only hedged to replicas the set is registered with; the others would answer 404.
+        """
+
+        def call () -> Any:
+            replicas = [ replica for replica in self.__replicas if replica in ephemeralCaseBase.registered]
+            return self.__cached_json(method, url, payload, conceptID=conceptID, casebaseID=casebaseID, 
+                                      raise_for_status=True, replicas=replicas)
+
+        try:
+            return call()
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+        ephemeralCaseBase.registered.discard(self.__base_url)
+        self.__register_ephemeral(ephemeralCaseBase)
+        return call()
+    
+    
+    def __join_case_table (self, ranking:Dict[str, float], conceptID:str, casebaseID:str, deci_precision:int, 
+                           keep_unknown:bool = False) -> Any:
+    
+        """     
+        Helper function: join a retrieval result (caseID to similarity) with the local copy of the casebase 
+        (case_table=True), giving the same result as the ...WithContent retrievals. The copy is refreshed when the 
+        fingerprint of the casebase changed, and once more if a retrieved case is not in it. With keep_unknown, 
+        DataFrames keep the '_unknown_' placeholder (as getSimilarCasesByCaseIDWithContent does) instead of NaN.
+        """
+
+        for attempt in (False, True):
+            self.getCaseBaseFingerprint( conceptID=conceptID, casebaseID=casebaseID, revalidate=attempt)
+            state = self.__fingerprints[(conceptID, casebaseID)]
+            if 'cases' not in state:
+                # The fingerprint was taken before the casebase was kept locally
+                state['etag'] = None
+                continue
+            if all( caseID in state['cases'] for caseID in ranking):
+                break
+        else:
+            missing = [ caseID for caseID in ranking if caseID not in state.get('cases', ())]
+            raise KeyError('cases not in casebase ' + casebaseID + ': ' + ', '.join(missing))
+
+        if self.__output == 'dict':
+            cases = state['cases']
+            return self.__plain_cases([ dict(cases[caseID], similarity=sim) for caseID, sim in ranking.items()], 
+                                      deci_precision)
+
+        with self.__shared['lock']:
+            if state['frame'] is None:
+                frame = pd.DataFrame(list(state['cases'].values()))
+                frame = frame.drop( columns=[_Constant.SIMILARITY], errors='ignore')
+                state['frame'] = frame.set_index( _Constant.CASE_ID, drop=False)
+            frame = state['frame']
+
+        df = frame.iloc[frame.index.get_indexer(list(ranking))].reset_index( drop=True)
+        df.insert(0, _Constant.SIMILARITY, list(ranking.values()))
+        if not keep_unknown:
+            df.replace('_unknown_', np.nan, inplace=True)
+        df.similarity = df.similarity.round( decimals=deci_precision)
+
+        df = df.sort_values( by= _Constant.SIMILARITY, ascending=False)
+
+        return df
+
+
+    def __rest_response_to_dataframe (self, response_json:Any ) -> pd.DataFrame:
+    
+        """     
+        Helper function: convert the JSON response of a request to pandas DataFrame.
+
+        Parameters
+        ----------
+            :param response_json : decoded response from a REST API call
+
+        Returns
+        -------
+            DataFrame : To be done.
+        """
+
         # The below try:, except:, and else: are used to determine if a programme variable is defined or not!
         try:
             column_list
@@ -210,6 +615,43 @@ class MyCBRRestApi:
             print("The Dataframe is : ", df)
 
         return df
+
+
+    def __plain_cases (self, response_json:List[Dict], deci_precision:int = None) -> List[Dict]:
+        """     
+        Helper function: the plain (output='dict') counterpart of __rest_response_to_dataframe. Cases are dicts 
+        with None for empty values; with deci_precision, the similarity is rounded and the cases are sorted by it.
+        """
+
+        cases = [ { name: (None if value == '_unknown_' else value) for name, value in case.items()} 
+                  for case in response_json]
+
+        if deci_precision is not None:
+            for case in cases:
+                case[_Constant.SIMILARITY] = round( float(case[_Constant.SIMILARITY]), deci_precision)
+            cases.sort( key=lambda case: case[_Constant.SIMILARITY], reverse=True)
+
+        return cases
+
+
+    def __plain_matrix (self, response_json:Dict[str, Dict[str, float]], deci_precision:int) -> Dict[str, Dict[str, float]]:
+        """     
+        Helper function: a similarity matrix as plain (output='dict') nested dicts of query caseID to caseID to 
+        similarity, laid out like the columns of the DataFrame.
+        """
+
+        return { query: { caseID: round( sim, deci_precision) for caseID, sim in row.items()} 
+                 for query, row in response_json.items()}
+
+
+    def __plain_ranking (self, response_json:Dict[str, float], deci_precision:int) -> Dict[str, float]:
+        """     
+        Helper function: caseID to similarity as a plain (output='dict') dict, most similar first.
+        """
+
+        ranked = sorted( response_json.items(), key=lambda item: item[1], reverse=True)
+
+        return { caseID: round( sim, deci_precision) for caseID, sim in ranked}
     
 
     def show_ordered_ssm (
@@ -241,30 +683,9 @@ class MyCBRRestApi:
             DataFrame : Ordered Self-Similarity Matrix. NaN represents that a caseID was not compared for the similarity.
         """
 
-        ordered_series = df.sum( axis=1).sort_values( ascending=False)
-        lis = ordered_series.index.tolist()
-
-        df_1 = df[lis]
-        df_temp = df_1.reindex(lis)
+        mycbr_plotting = _sibling_module('mycbr_plotting')
 
-        plt.figure( figsize=figsize)
-
-        ax = sns.heatmap(
-            df_temp, 
-            cmap='viridis', 
-            xticklabels=ticks_interval, 
-            yticklabels=ticks_interval, 
-            fmt='g', 
-            annot=isAnnot, 
-            annot_kws={'size': 9}
-        )
-        
-        ax.invert_xaxis()
-
-        plt.yticks(rotation=0) 
-        plt.title('Self-Similarity Matrix (ordered) for : '+name)
-
-        return df_temp
+        return mycbr_plotting.show_ordered_ssm(df, name, ticks_interval, figsize, isAnnot)
         
 
     # ****************** myCBR-rest API Calls **************************
@@ -286,7 +707,7 @@ class MyCBRRestApi:
         final_url = self.__base_url + '/concepts'
         #print(final_url)
 
-        response = requests.get( url= final_url)
+        response = self.__request('GET', final_url, hedge=True)
 
         concept_list = response.json()
         
@@ -311,7 +732,7 @@ class MyCBRRestApi:
         final_url = self.__base_url + '/casebases' 
         # print(final_url)
 
-        response = requests.get( url= final_url)
+        response = self.__request('GET', final_url, hedge=True)
         casebases = response.json()
 
         return casebases
@@ -339,7 +760,7 @@ class MyCBRRestApi:
         final_url = self.__base_url + '/concepts/' + conceptID + '/amalgamationFunctions'
         #print(final_url)
 
-        response = requests.get( url= final_url)
+        response = self.__request('GET', final_url, hedge=True)
         #print(response.text)
 
         amalgamation_list = response.json()
@@ -370,7 +791,7 @@ class MyCBRRestApi:
         final_url = self.__base_url + '/concepts/' + conceptID + '/attributes'
         #print(final_url)
 
-        response = requests.get( url= final_url)
+        response = self.__request('GET', final_url, hedge=True)
         #print(response.text)
 
         attribute_list = response.json()
@@ -401,7 +822,7 @@ class MyCBRRestApi:
         final_url = self.__base_url + '/concepts/' + conceptID + '/attributes/' + attributeID 
         #print(final_url)
 
-        response = requests.get( url= final_url)
+        response = self.__request('GET', final_url, hedge=True)
         attributes = response.json()
 
         return attributes
@@ -430,7 +851,7 @@ class MyCBRRestApi:
         final_url = self.__base_url + '/concepts/' + conceptID + '/attributes/' + attributeID + '/similarityFunctions'
         #print(final_url)
 
-        response = requests.get( url= final_url)
+        response = self.__request('GET', final_url, hedge=True)
         attributes = response.json()
 
         return attributes
@@ -453,12 +874,72 @@ class MyCBRRestApi:
 
         final_url = self.__base_url + '/casebases' 
 
-        response = requests.get( url= final_url)
+        response = self.__request('GET', final_url, hedge=True)
         casebases = response.json()
 
         return casebases
   
   
+    def getCaseBaseFingerprint (self, conceptID:str = None, casebaseID:str = None, revalidate:bool = False) -> str:
+
+        """ 
+        Get the version fingerprint of a casebase: the number of cases and an order-independent hash of their content.
+        The fingerprint changes whenever a case is added, changed or deleted, so results keyed by it are safe to reuse.
+
+            * Sample URL: ~/concepts/patient/casebases/casebase/cases
+
+        After the first call the fingerprint is revalidated with a conditional GET (ETag), which the server answers 
+        with 304 and no body while the casebase is unchanged.
+
+        Parameters
+        ----------
+            :param conceptID : Name of the concept (default: self.__conceptID)
+            :param casebaseID : Name of the case base (default: self.__casebaseID)
+            :param revalidate : True, to check with the server even if the fingerprint is younger than fingerprint_ttl (default: False)
+
+        Returns
+        -------
+            str : The fingerprint, e.g. '1000-8c1f0e2a93b4d507'.
+        """
+
+        if conceptID is None:
+            conceptID = self.__conceptID
+        if casebaseID is None:
+            casebaseID = self.__casebaseID
+
+        state = self.__fingerprints.get( (conceptID, casebaseID))
+        now = time.monotonic()
+
+        if state is not None and not revalidate \
+                and (self.__fingerprint_ttl is None or now - state['checked'] < self.__fingerprint_ttl):
+            return state['value']
+
+        final_url = self.__base_url + '/concepts/' + conceptID + '/casebases/' + casebaseID + '/cases'
+        headers = dict()
+        if state is not None and state['etag'] is not None:
+            headers['If-None-Match'] = state['etag']
+
+        response = self.__request('GET', final_url, hedge=True, headers=headers)
+
+        if response.status_code == 304:
+            state['checked'] = now
+            return state['value']
+
+        cases = response.json()
+        digest = 0
+        for case in cases:
+            digest = (digest + _case_digest(case)) & _Constant.DIGEST_MASK
+
+        value = '{}-{:016x}'.format(len(cases), digest)
+        state = {'value': value, 'etag': response.headers.get('ETag'), 'checked': now}
+        if self.__case_table:
+            state['cases'] = { case[_Constant.CASE_ID]: case for case in cases}
+            state['frame'] = None
+        self.__fingerprints[(conceptID, casebaseID)] = state
+
+        return value
+    
+    
     def addCaseBaseID (self, casebaseID:str) -> bool:
     
         """ 
@@ -478,7 +959,7 @@ class MyCBRRestApi:
         final_url = self.__base_url + '/casebases/' + casebaseID       
         # print(final_url)
 
-        response = requests.put( url= final_url)
+        response = self.__request('PUT', final_url)
 
         return response.json()
     
@@ -502,7 +983,7 @@ class MyCBRRestApi:
         final_url = self.__base_url + '/casebases/' + casebaseID         
         # print(final_url)
 
-        response = requests.delete( url= final_url)
+        response = self.__request('DELETE', final_url)
 
         return response.json()
     
@@ -537,9 +1018,12 @@ class MyCBRRestApi:
         final_url = self.__base_url + '/concepts/' + conceptID + '/casebases/' + casebaseID + '/cases' 
         #print(final_url)
 
-        response = requests.get( url= final_url)
+        response = self.__request('GET', final_url, hedge=True)
+
+        if self.__output == 'dict':
+            return self.__plain_cases(response.json())
 
-        df = self.__rest_response_to_dataframe(response)
+        df = self.__rest_response_to_dataframe(response.json())
 
         return df
     
@@ -575,7 +1059,10 @@ class MyCBRRestApi:
         final_url = self.__base_url + '/concepts/' + conceptID + '/casebases/' + casebaseID + '/cases/' + caseID
         #print(final_url)
 
-        response = requests.get( url= final_url)
+        response = self.__request('GET', final_url, hedge=True)
+
+        if self.__output == 'dict':
+            return self.__plain_cases([response.json()])[0]
 
         df = pd.DataFrame(pd.Series(response.json()))
 
@@ -610,18 +1097,56 @@ class MyCBRRestApi:
         final_url = self.__base_url + '/concepts/' + conceptID + '/cases'
         #print(final_url)
 
-        response = requests.get( url= final_url)
+        response = self.__request('GET', final_url, hedge=True)
+
+        if self.__output == 'dict':
+            return self.__plain_cases(response.json())
 
         df = pd.DataFrame(response.json())
       
         return df
 
 
+    def createEphemeralCaseBase (self, caseIDs:List[str]) -> EphemeralCaseBase:
+
+        """ 
+        Create a reusable ephemeral casebase: the caseIDs are registered with the server once, and the 
+        ephemeral retrieval methods only send its handle when given the returned object instead of a list.
+
+            * Sample URL: ~/ephemeral/caseIDSets
+
+            * Body : "[ \"patient0\", \"patient3\"]"
+
+        Parameters
+        ----------
+            :param caseIDs : List of cases' IDs to be included in the ephemeral casebase
+
+        Returns
+        -------
+            EphemeralCaseBase : The handle. It falls back to sending the caseIDs with every call when the server 
+                                does not support registered caseID sets.
+        """
+
+        ephemeralCaseBase = EphemeralCaseBase(caseIDs)
+        self.__register_ephemeral(ephemeralCaseBase)
+
+        return ephemeralCaseBase
+
+
+    def __ephemeral_set_url (self, ephemeralCaseBase:EphemeralCaseBase, amalgamationFunctionID:str, 
+                             conceptID:str, casebaseID:str) -> str:
+        return self.__base_url \
+               + '/ephemeral/concepts/' + conceptID \
+               + '/casebases/' + casebaseID \
+               + '/amalgamationFunctions/' + amalgamationFunctionID \
+               + '/caseIDSets/' + ephemeralCaseBase.handle
+
+
     def getSimilarCasesFromEphemeralCaseBaseWithContent ( 
             self,
             caseID:str, 
             ephemeralCaseIDs:List[str], 
-            amalgamationFunctionID:str, 
+            amalgamationFunctionID:str = None, 
             conceptID:str = None, 
             casebaseID:str = None, 
             k:int = None, 
@@ -636,11 +1161,12 @@ class MyCBRRestApi:
         Parameters
         ----------
             :param caseID : Name of the concept
-            :param ephemeralCaseIDs : List of cases' IDs to be included in the ephemeral casebase
-            :param amalgamationFunctionID : Name of the amalgamation function
+            :param ephemeralCaseIDs : List of cases' IDs to be included in the ephemeral casebase, or an 
+                                      EphemeralCaseBase from createEphemeralCaseBase
+            :param amalgamationFunctionID : Name of the amalgamation function (default: self.__amalgamationFunctionID)
             :param conceptID : Name of the concept (default: self.__conceptID)
             :param casebaseID : Name of the casebase (default: self.__casebaseID)
-            :param k : Name of the retrieved cases (default: np.size(ephemeralCaseIDs))
+            :param k : Name of the retrieved cases (default: len(ephemeralCaseIDs))
             :param deci_precision : The numeric precision value for similarity (default: 3)
 
         Returns
@@ -656,21 +1182,50 @@ class MyCBRRestApi:
             conceptID = self.__conceptID
         if casebaseID is None:
             casebaseID = self.__casebaseID
+        if amalgamationFunctionID is None:
+            amalgamationFunctionID = self.__amalgamationFunctionID
         if k is None:
-            k = np.size(ephemeralCaseIDs)
+            k = len(ephemeralCaseIDs)
         
-        final_url = self.__base_url \
-                    + '/ephemeral/concepts/' + conceptID \
-                    + '/casebases/' + casebaseID \
-                    + '/amalgamationFunctions/' + amalgamationFunctionID \
-                    + '/retrievalByCaseIDWithContent?caseID=' + caseID \
-                    + '&k=' + (k).__str__()
-        #print( final_url)
+        if self.__case_table:
+            if isinstance(ephemeralCaseIDs, EphemeralCaseBase) and self.__register_ephemeral(ephemeralCaseIDs):
+                final_url = self.__ephemeral_set_url(ephemeralCaseIDs, amalgamationFunctionID, conceptID, casebaseID) \
+                            + '/retrievalByCaseIDs?k=' + (k).__str__()
+                response_json = self.__ephemeral_json(ephemeralCaseIDs, 'POST', final_url, [caseID], 
+                                                      conceptID=conceptID, casebaseID=casebaseID)
+            else:
+                final_url = self.__base_url \
+                            + '/ephemeral/concepts/' + conceptID \
+                            + '/casebases/' + casebaseID \
+                            + '/amalgamationFunctions/' + amalgamationFunctionID \
+                            + '/retrievalByCaseIDs?k=' + (k).__str__()
+                payload = {'queryCaseIDs': [caseID], 'ephemeralCaseIDs': list(ephemeralCaseIDs)}
+                response_json = self.__cached_json('POST', final_url, payload, conceptID=conceptID, casebaseID=casebaseID, 
+                                                   raise_for_status=True)
+
+            return self.__join_case_table(response_json[caseID], conceptID, casebaseID, deci_precision)
+
+        if isinstance(ephemeralCaseIDs, EphemeralCaseBase) and self.__register_ephemeral(ephemeralCaseIDs):
+            final_url = self.__ephemeral_set_url(ephemeralCaseIDs, amalgamationFunctionID, conceptID, casebaseID) \
+                        + '/retrievalByCaseIDWithContent?caseID=' + caseID \
+                        + '&k=' + (k).__str__()
+            response_json = self.__ephemeral_json(ephemeralCaseIDs, 'GET', final_url, conceptID=conceptID, casebaseID=casebaseID)
+        else:
+            final_url = self.__base_url \
+                        + '/ephemeral/concepts/' + conceptID \
+                        + '/casebases/' + casebaseID \
+                        + '/amalgamationFunctions/' + amalgamationFunctionID \
+                        + '/retrievalByCaseIDWithContent?caseID=' + caseID \
+                        + '&k=' + (k).__str__()
+            #print( final_url)
+
+            payload = list(ephemeralCaseIDs)
+            response_json = self.__cached_json('POST', final_url, payload, conceptID=conceptID, casebaseID=casebaseID)
 
-        payload = ephemeralCaseIDs
-        response = requests.post( url= final_url, json=payload)
+        if self.__output == 'dict':
+            return self.__plain_cases(response_json, deci_precision)
 
-        df = self.__rest_response_to_dataframe(response)
+        df = self.__rest_response_to_dataframe(response_json)
 
         df.similarity = pd.to_numeric(df.similarity, errors='ignore')
         df.similarity = df.similarity.round( decimals=deci_precision)
@@ -685,7 +1240,7 @@ class MyCBRRestApi:
             self,
             queryIDs:List[str], 
             ephemeralCaseIDs:List[str], 
-            amalgamationFunctionID:str, 
+            amalgamationFunctionID:str = None, 
             conceptID:str = None, 
             casebaseID:str = None,         
             k:int = None, 
@@ -697,16 +1252,17 @@ class MyCBRRestApi:
 
             * Sample URL: ~/ephemeral/concepts/patient/casebases/casebase/amalgamationFunctions/LCA_variables/retrievalByCaseIDs?k=-1
 
-            * Body : "{ \"query_case_id_list\": [ \"patient0\", \"patient3\" ], \"casebase_case_id_list\": [ \"patient1\", \"patient1\" ]}"
+            * Body : "{ \"queryCaseIDs\": [ \"patient0\", \"patient3\" ], \"ephemeralCaseIDs\": [ \"patient1\", \"patient2\" ]}"
 
         Parameters
         ----------
             :param queryIDs : The list of query cases' IDs 
-            :param ephemeralCaseIDs : List of cases' IDs to be included in the ephemeral casebase
-            :param amalgamationFunctionID : Name of the amalgamation function
+            :param ephemeralCaseIDs : List of cases' IDs to be included in the ephemeral casebase, or an 
+                                      EphemeralCaseBase from createEphemeralCaseBase
+            :param amalgamationFunctionID : Name of the amalgamation function (default: self.__amalgamationFunctionID)
             :param conceptID : Name of the concept (default: self.__conceptID)
             :param casebaseID : Name of the casebase (default: self.__casebaseID)
-            :param k : Name of the retrieved cases (default: np.size(casebase_list))
+            :param k : Name of the retrieved cases (default: len(ephemeralCaseIDs))
             :param deci_precision : The numeric precision value for similarity (default: 3)
 
         Returns
@@ -718,22 +1274,33 @@ class MyCBRRestApi:
             conceptID = self.__conceptID
         if casebaseID is None:
             casebaseID = self.__casebaseID
+        if amalgamationFunctionID is None:
+            amalgamationFunctionID = self.__amalgamationFunctionID
         if k is None:
-            k = np.size(ephemeralCaseIDs)
+            k = len(ephemeralCaseIDs)
             
-        final_url = self.__base_url \
-                    + '/ephemeral/concepts/' + conceptID \
-                    + '/casebases/' + casebaseID \
-                    + '/amalgamationFunctions/' + amalgamationFunctionID \
-                    + '/retrievalByCaseIDs?k=' + (k).__str__() 
-        #print( final_url)
+        if isinstance(ephemeralCaseIDs, EphemeralCaseBase) and self.__register_ephemeral(ephemeralCaseIDs):
+            final_url = self.__ephemeral_set_url(ephemeralCaseIDs, amalgamationFunctionID, conceptID, casebaseID) \
+                        + '/retrievalByCaseIDs?k=' + (k).__str__()
+            response_json = self.__ephemeral_json(ephemeralCaseIDs, 'POST', final_url, list(queryIDs), 
+                                                  conceptID=conceptID, casebaseID=casebaseID)
+        else:
+            final_url = self.__base_url \
+                        + '/ephemeral/concepts/' + conceptID \
+                        + '/casebases/' + casebaseID \
+                        + '/amalgamationFunctions/' + amalgamationFunctionID \
+                        + '/retrievalByCaseIDs?k=' + (k).__str__() 
+            #print( final_url)
 
-        payload = dict()
-        payload.update([('query_case_id_list', queryIDs), ('casebase_case_id_list', ephemeralCaseIDs)])
+            payload = {'queryCaseIDs': list(queryIDs), 'ephemeralCaseIDs': list(ephemeralCaseIDs)}
 
-        response = requests.post( url= final_url, json=payload)
+            response_json = self.__cached_json('POST', final_url, payload, conceptID=conceptID, casebaseID=casebaseID, 
+                                               raise_for_status=True)
 
-        df = pd.DataFrame(response.json()).round( deci_precision)
+        if self.__output == 'dict':
+            return self.__plain_matrix(response_json, deci_precision)
+
+        df = pd.DataFrame(response_json).round( deci_precision)
 
         return df
     
@@ -741,7 +1308,7 @@ class MyCBRRestApi:
     def getEphemeralCaseBaseSelfSimilarity (
             self,
             ephemeralCaseIDs:List[str], 
-            amalgamationFunctionID:str,
+            amalgamationFunctionID:str = None,
             conceptID:str = None, 
             casebaseID:str = None, 
             k:int = None, 
@@ -751,17 +1318,18 @@ class MyCBRRestApi:
         """ 
         Get the Self-Similarity Matrix for an ephemeral casebase.
 
-            * Sample URL: ~/ephemeral/concepts/patient/casebases/casebase/amalgamationFunctions/LCA_variables/computeSelfSimlarity?k=-1
+            * Sample URL: ~/ephemeral/concepts/patient/casebases/casebase/amalgamationFunctions/LCA_variables/computeSelfSimilarity?k=-1
 
             * Body : "[ \"patient0\", \"patient3\"]"
 
         Parameters
         ----------
-            :param ephemeralCaseIDs : List of cases' IDs to be included in the ephemeral casebase.
-            :param amalgamationFunctionID : Name of the amalgamation function.
+            :param ephemeralCaseIDs : List of cases' IDs to be included in the ephemeral casebase, or an 
+                                      EphemeralCaseBase from createEphemeralCaseBase.
+            :param amalgamationFunctionID : Name of the amalgamation function (default: self.__amalgamationFunctionID)
             :param conceptID : Name of the concept (default: self.__conceptID)
             :param casebaseID : Name of the casebase (default: self.__casebaseID)
-            :param k : Name of the retrieved cases (default: np.size(casebase_list))
+            :param k : Name of the retrieved cases (default: len(ephemeralCaseIDs))
             :param deci_precision : The numeric precision value for similarity (default: 3)
 
         Returns
@@ -773,27 +1341,38 @@ class MyCBRRestApi:
             conceptID = self.__conceptID
         if casebaseID is None:
             casebaseID = self.__casebaseID
+        if amalgamationFunctionID is None:
+            amalgamationFunctionID = self.__amalgamationFunctionID
         if k is None:
-            k = np.size(ephemeralCaseIDs)
+            k = len(ephemeralCaseIDs)
             
-        final_url = self.__base_url \
-                    + '/ephemeral/concepts/' + conceptID \
-                    + '/casebases/' + casebaseID \
-                    + '/amalgamationFunctions/' + amalgamationFunctionID \
-                    + '/computeSelfSimlarity?k=' + (k).__str__() 
-        #print( final_url)
+        if isinstance(ephemeralCaseIDs, EphemeralCaseBase) and self.__register_ephemeral(ephemeralCaseIDs):
+            final_url = self.__ephemeral_set_url(ephemeralCaseIDs, amalgamationFunctionID, conceptID, casebaseID) \
+                        + '/computeSelfSimilarity?k=' + (k).__str__()
+            response_json = self.__ephemeral_json(ephemeralCaseIDs, 'GET', final_url, conceptID=conceptID, casebaseID=casebaseID)
+        else:
+            final_url = self.__base_url \
+                        + '/ephemeral/concepts/' + conceptID \
+                        + '/casebases/' + casebaseID \
+                        + '/amalgamationFunctions/' + amalgamationFunctionID \
+                        + '/computeSelfSimilarity?k=' + (k).__str__() 
+            #print( final_url)
+
+            payload = list(ephemeralCaseIDs)
+            response_json = self.__cached_json('POST', final_url, payload, conceptID=conceptID, casebaseID=casebaseID, 
+                                               raise_for_status=True)
 
-        payload = ephemeralCaseIDs
-        response = requests.post( url= final_url, json=payload)
+        if self.__output == 'dict':
+            return self.__plain_matrix(response_json, deci_precision)
 
-        df = pd.DataFrame(response.json()).round( deci_precision)
+        df = pd.DataFrame(response_json).round( deci_precision)
 
         return df
     
     
     def getCaseBaseSelfSimilarity (
             self,  
-            amalgamationFunctionID:str, 
+            amalgamationFunctionID:str = None, 
             conceptID:str = None,
             casebaseID:str = None,
             k:int = -1, 
@@ -803,11 +1382,11 @@ class MyCBRRestApi:
         """ 
         Get the Self-Similarity Matrix for the given casebase.
 
-            * Sample URL: ~/concepts/patient/casebases/casebase/computeSelfSimlarity?amalgamationFunctionID=LCA_variables&k=-1
+            * Sample URL: ~/concepts/patient/casebases/casebase/computeSelfSimilarity?amalgamationFunctionID=LCA_variables&k=-1
 
         Parameters
         ----------
-            :param amalgamationFunctionID : Name of the amalgamation function.
+            :param amalgamationFunctionID : Name of the amalgamation function (default: self.__amalgamationFunctionID)
             :param conceptID : Name of the concept (default: self.__conceptID)
             :param casebaseID : Name of the casebase (default: self.__casebaseID)
             :param k : Name of the retrieved cases (default: -1)
@@ -823,18 +1402,91 @@ class MyCBRRestApi:
             conceptID = self.__conceptID
         if casebaseID is None:
             casebaseID = self.__casebaseID
+        if amalgamationFunctionID is None:
+            amalgamationFunctionID = self.__amalgamationFunctionID
             
         final_url = self.__base_url \
                     + '/concepts/' + conceptID \
                     + '/casebases/' + casebaseID \
-                    + '/computeSelfSimlarity?amalgamationFunctionID=' + amalgamationFunctionID \
+                    + '/computeSelfSimilarity?amalgamationFunctionID=' + amalgamationFunctionID \
                     + '&k=' + (k).__str__() 
         #print( final_url)
 
-        response = requests.get( url= final_url)
+        response_json = self.__cached_json('GET', final_url, conceptID=conceptID, casebaseID=casebaseID, 
+                                           raise_for_status=True)
+
+        if self.__output == 'dict':
+            return self.__plain_matrix(response_json, deci_precision)
+
+        df = pd.DataFrame(response_json).round( deci_precision)
+
+        df = df[df.columns.sort_values()] # To rearrange colomns in the ascening order
+
+        return df
+
+
+    def updateCaseBaseSelfSimilarity (
+            self,
+            ssm:pd.DataFrame,
+            amalgamationFunctionID:str = None,
+            addedCaseIDs:List[str] = (),
+            removedCaseIDs:List[str] = (),
+            conceptID:str = None,
+            casebaseID:str = None,
+            deci_precision:int = 3
+        ) -> pd.DataFrame:
+    
+        """ 
+        Update a Self-Similarity Matrix from getCaseBaseSelfSimilarity after cases were added to or removed from 
+        the casebase. Only the rows and columns of the added cases are fetched, with two ephemeral retrievals 
+        (added cases against all cases, remaining cases against the added ones), instead of recomputing the matrix.
+
+            * Sample URL: ~/ephemeral/concepts/patient/casebases/casebase/amalgamationFunctions/LCA_variables/retrievalByCaseIDs?k=-1
+
+        Parameters
+        ----------
+            :param ssm : The stored Self-Similarity Matrix
+            :param amalgamationFunctionID : Name of the amalgamation function the matrix was computed with
+                                            (default: self.__amalgamationFunctionID)
+            :param addedCaseIDs : The IDs of the cases added since the matrix was computed
+            :param removedCaseIDs : The IDs of the cases removed since the matrix was computed
+            :param conceptID : Name of the concept (default: self.__conceptID)
+            :param casebaseID : Name of the casebase (default: self.__casebaseID)
+            :param deci_precision : The numeric precision value for similarity (default: 3)
+
+        Returns
+        -------
+            DataFrame : The updated matrix, laid out like the result of getCaseBaseSelfSimilarity.
+        """
+
+        if conceptID is None:
+            conceptID = self.__conceptID
+        if casebaseID is None:
+            casebaseID = self.__casebaseID
+        if amalgamationFunctionID is None:
+            amalgamationFunctionID = self.__amalgamationFunctionID
 
-        df = pd.DataFrame(response.json()).round( deci_precision)
+        df = ssm.drop( index=list(removedCaseIDs), columns=list(removedCaseIDs), errors='ignore')
+        added = [ caseID for caseID in dict.fromkeys(addedCaseIDs) if caseID not in df.columns]
+        if not added:
+            return df
 
+        existing = list(df.columns)
+        final_url = self.__base_url \
+                    + '/ephemeral/concepts/' + conceptID \
+                    + '/casebases/' + casebaseID \
+                    + '/amalgamationFunctions/' + amalgamationFunctionID \
+                    + '/retrievalByCaseIDs?k=-1'
+
+        new_columns = self.__cached_json('POST', final_url, {'queryCaseIDs': added, 'ephemeralCaseIDs': existing + added}, 
+                                         conceptID=conceptID, casebaseID=casebaseID, raise_for_status=True)
+        df = pd.concat([df, pd.DataFrame(new_columns)], axis=1)
+        if existing:
+            new_rows = self.__cached_json('POST', final_url, {'queryCaseIDs': existing, 'ephemeralCaseIDs': added}, 
+                                          conceptID=conceptID, casebaseID=casebaseID, raise_for_status=True)
+            df.update( pd.DataFrame(new_rows))
+        
+        df = df.round( deci_precision)
         df = df[df.columns.sort_values()] # To rearrange colomns in the ascening order
 
         return df
@@ -886,9 +1538,12 @@ class MyCBRRestApi:
                     + '&value=' + value
         #print( final_url)
 
-        response = requests.get( url= final_url)
+        response_json = self.__cached_json('GET', final_url, conceptID=conceptID, casebaseID=casebaseID)
 
-        df = pd.DataFrame(response.json()).round( deci_precision)
+        if self.__output == 'dict':
+            return self.__plain_ranking(response_json['similarCases'], deci_precision)
+
+        df = pd.DataFrame(response_json).round( deci_precision)
 
         df = df.sort_values( by='similarCases', ascending=False)
 
@@ -901,7 +1556,7 @@ class MyCBRRestApi:
     def getSimilarCasesByCaseID(
             self, 
             caseID:str,
-            amalgamationFunctionID:str, 
+            amalgamationFunctionID:str = None, 
             conceptID:str = None, 
             casebaseID:str = None, 
             k:int =-1, 
@@ -916,7 +1571,7 @@ class MyCBRRestApi:
         Parameters
         ----------
             :param caseID : The caseID of the queried case
-            :param amalgamationFunctionID : Name of the amalgamation function
+            :param amalgamationFunctionID : Name of the amalgamation function (default: self.__amalgamationFunctionID)
             :param conceptID : Name of the concept (default: self.__conceptID)
             :param casebaseID : Name of the casebase (default: self.__casebaseID)
             :param k : Name of the retrieved cases (default: -1, where -1 means all)
@@ -931,6 +1586,8 @@ class MyCBRRestApi:
             conceptID = self.__conceptID
         if casebaseID is None:
             casebaseID = self.__casebaseID
+        if amalgamationFunctionID is None:
+            amalgamationFunctionID = self.__amalgamationFunctionID
             
         final_url = self.__base_url \
                     + '/concepts/'+conceptID \
@@ -940,10 +1597,11 @@ class MyCBRRestApi:
                     + '&k='+(k).__str__()
         #print( final_url)
 
-        response = requests.get( url= final_url)
-        
-        response_json = response.json()
+        response_json = self.__cached_json('GET', final_url, conceptID=conceptID, casebaseID=casebaseID)
         
+        if self.__output == 'dict':
+            return self.__plain_ranking(response_json, deci_precision)
+
         df = pd.DataFrame(list(response_json.values()), index=response_json.keys())
        
         df.index.name = _Constant.CASE_ID
@@ -957,7 +1615,7 @@ class MyCBRRestApi:
     def getSimilarCasesByMultipleCaseIDs (
             self, 
             caseIDs:List[str],
-            amalgamationFunctionID:str, 
+            amalgamationFunctionID:str = None, 
             conceptID:str = None, 
             casebaseID:str = None,  
             k:int =-1, 
@@ -972,7 +1630,7 @@ class MyCBRRestApi:
         Parameters
         ----------
             :param caseIDs : The list of caseIDs for retrieval
-            :param amalgamationFunctionID : Name of the amalgamation function
+            :param amalgamationFunctionID : Name of the amalgamation function (default: self.__amalgamationFunctionID)
             :param conceptID : Name of the concept (default: self.__conceptID)
             :param casebaseID : Name of the casebase (default: self.__casebaseID)
             :param k : Name of the retrieved cases (default: -1, where -1 means all)
@@ -987,6 +1645,8 @@ class MyCBRRestApi:
             conceptID = self.__conceptID
         if casebaseID is None:
             casebaseID = self.__casebaseID
+        if amalgamationFunctionID is None:
+            amalgamationFunctionID = self.__amalgamationFunctionID
             
         final_url = self.__base_url \
                     + '/concepts/'+ conceptID \
@@ -997,9 +1657,12 @@ class MyCBRRestApi:
 
         payload = caseIDs
 
-        response = requests.post( url= final_url, json=payload)
+        response_json = self.__cached_json('POST', final_url, payload, conceptID=conceptID, casebaseID=casebaseID)
 
-        df = pd.DataFrame(response.json()).round( deci_precision)
+        if self.__output == 'dict':
+            return self.__plain_matrix(response_json, deci_precision)
+
+        df = pd.DataFrame(response_json).round( deci_precision)
 
         return df
     
@@ -1007,7 +1670,7 @@ class MyCBRRestApi:
     def getSimilarCasesByCaseIDWithContent(
             self, 
             caseID:str,
-            amalgamationFunctionID:str, 
+            amalgamationFunctionID:str = None, 
             conceptID:str = None, 
             casebaseID:str = None, 
             k:int =-1, 
@@ -1022,7 +1685,7 @@ class MyCBRRestApi:
         Parameters
         ----------
             :param caseID : The caseID of the queried case
-            :param amalgamationFunctionID : Name of the amalgamation function
+            :param amalgamationFunctionID : Name of the amalgamation function (default: self.__amalgamationFunctionID)
             :param conceptID : Name of the concept (default: self.__conceptID)
             :param casebaseID : Name of the casebase (default: self.__casebaseID)
             :param k : Name of the retrieved cases (default: -1, where -1 means all)
@@ -1041,18 +1704,27 @@ class MyCBRRestApi:
             conceptID = self.__conceptID
         if casebaseID is None:
             casebaseID = self.__casebaseID
+        if amalgamationFunctionID is None:
+            amalgamationFunctionID = self.__amalgamationFunctionID
             
         final_url = self.__base_url \
                     + '/concepts/'+ conceptID \
                     + '/casebases/'+ casebaseID \
                     + '/amalgamationFunctions/'+ amalgamationFunctionID \
-                    + '/retrievalByCaseIDWithContent?caseID='+ caseID \
+                    + ('/retrievalByCaseID' if self.__case_table else '/retrievalByCaseIDWithContent') \
+                    + '?caseID='+ caseID \
                     + '&k='+ (k).__str__()
         #print( final_url)
 
-        response = requests.get( url= final_url)
+        response_json = self.__cached_json('GET', final_url, conceptID=conceptID, casebaseID=casebaseID)
+
+        if self.__case_table:
+            return self.__join_case_table(response_json, conceptID, casebaseID, deci_precision, keep_unknown=True)
+
+        if self.__output == 'dict':
+            return self.__plain_cases(response_json, deci_precision)
 
-        df = pd.DataFrame(response.json()).round( deci_precision)
+        df = pd.DataFrame(response_json).round( deci_precision)
 
         return df
  
\ No newline at end of file
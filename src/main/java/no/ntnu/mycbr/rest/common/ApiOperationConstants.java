@@ -75,6 +75,7 @@ public interface ApiOperationConstants {
     
     GET_SIMILAR_CASES_BY_ATTRIBUTE = "getSimilarCasesByAttribute",
     GET_SIMILAR_CASES_BY_MULTIPLE_ATTRIBUTES = "getSimilarCasesByMultipleAttributess",
+    GET_SIMILAR_CASES_BY_MULTIPLE_QUERIES = "getSimilarCasesByMultipleQueries",
     
     GET_CASE_BASE_SELF_SIMILARITY = "getCaseBaseSelfSimilarity";
     
@@ -83,7 +84,14 @@ public interface ApiOperationConstants {
     String
     GET_SIMILAR_CASES_FROM_EPHEMERAL_CASE_BASE = "getSimilarCasesFromEphemeralCaseBase",
     GET_SIMILAR_CASES_FROM_EPHEMERAL_CASE_BASE_WITH_CONTENT = "getSimilarCasesFromEphemeralCaseBaseWithContent",
-    GET_EPHEMERAL_CASE_BASE_SELF_SIMILARITY = "getEphemeralCaseBaseSelfSimilarity";
+    GET_EPHEMERAL_CASE_BASE_SELF_SIMILARITY = "getEphemeralCaseBaseSelfSimilarity",
+    
+    ADD_CASE_ID_SET = "addCaseIDSet",
+    GET_CASE_ID_SET = "getCaseIDSet",
+    DELETE_CASE_ID_SET = "deleteCaseIDSet",
+    GET_SIMILAR_CASES_FROM_CASE_ID_SET = "getSimilarCasesFromCaseIDSet",
+    GET_SIMILAR_CASES_FROM_CASE_ID_SET_WITH_CONTENT = "getSimilarCasesFromCaseIDSetWithContent",
+    GET_CASE_ID_SET_SELF_SIMILARITY = "getCaseIDSetSelfSimilarity";
     
     // Used as json keys for ephemeral operations
     String EPHEMERAL_CASE_IDS = "ephemeralCaseIDs";
@@ -101,5 +109,6 @@ public interface ApiOperationConstants {
     String
     DETAILED_CASE_COMPARISION = "DetailedCaseComparison",
     LOCAL_SIM_COMPARISION = "LocalSimComparison",
+    LOCAL_SIM_COMPARISIONS = "LocalSimComparisons",
     GLOBAL_WEIGHTS = "GlobalWeights";
 }
@@ -29,6 +29,10 @@ public interface ApiPathConstants {
     String DEFAULT_NO_OF_CASES = "-1";
     String NO_OF_RETURNED_CASES = "k";
 
+    // Paging of case listings: skip the first offset cases and return at most limit cases (-1: all).
+    String OFFSET = "offset";
+    String LIMIT = "limit";
+
     
     // myCBR-rest API: core vocabulary - single
     String CONCEPT 	= "concept";
@@ -70,6 +74,9 @@ public interface ApiPathConstants {
     // myCBR-rest API: type vocabulary specific names
     String TYPE 		= "Type";
     String AMAL_FUNCTION_TYPE 	= AMAL_FUNCTION + TYPE;
+
+    // Optional JSON object of attribute name to weight for a new amalgamation function
+    String ATTRIBUTE_WEIGHTS 	= "attributeWeights";
     String ATTR_TYPE 	       	= ATTR + TYPE;
     
     
@@ -151,4 +158,21 @@ public interface ApiPathConstants {
     String PATH_EPHEMERAL_RETRIEVAL = PATH_DEFAULT_EPHEMERAL + PATH_RETRIEVAL;
     String PATH_EPHEMERAL_RETRIEVAL_WITH_CONTENT = PATH_DEFAULT_EPHEMERAL + PATH_RETRIEVAL_BY_CASE_ID_WITH_CONTENT;
     String PATH_EPHEMERAL_SELF_SIMILARITY = PATH_DEFAULT_EPHEMERAL + PATH_SELF_SIMLARITY;
+    
+    // Registered sets of caseIDs, referenced by their content hash instead of resending the IDs
+    String CASE_ID_SET 		= "caseIDSet";
+    String CASE_ID_SETS 	= CASE_ID_SET + S;
+    String CASE_ID_SET_ID 	= CASE_ID_SET + ID;
+    String PATH_CASE_ID_SETS 	= PATH + CASE_ID_SETS;
+    String PATH_CASE_ID_SET_ID 	= PATH_CASE_ID_SETS + "/{" + CASE_ID_SET_ID + "}";
+    
+    //Path pattern: /ephemeral/caseIDSets/{caseIDSetID}
+    String PATH_EPHEMERAL_CASE_ID_SETS 	 = PATH_EPHEMERAL + PATH_CASE_ID_SETS;
+    String PATH_EPHEMERAL_CASE_ID_SET_ID = PATH_EPHEMERAL + PATH_CASE_ID_SET_ID;
+    
+    //Path pattern: /ephemeral/concepts/{conceptID}/casebases/{casebaseID}/amalgamationFunctions/{amalgamationFunctionID}/caseIDSets/{caseIDSetID}/___
+    String PATH_DEFAULT_CASE_ID_SET = PATH_DEFAULT_EPHEMERAL + PATH_CASE_ID_SET_ID;
+    String PATH_CASE_ID_SET_RETRIEVAL = PATH_DEFAULT_CASE_ID_SET + PATH_RETRIEVAL;
+    String PATH_CASE_ID_SET_RETRIEVAL_WITH_CONTENT = PATH_DEFAULT_CASE_ID_SET + PATH_RETRIEVAL_BY_CASE_ID_WITH_CONTENT;
+    String PATH_CASE_ID_SET_SELF_SIMILARITY = PATH_DEFAULT_CASE_ID_SET + PATH_SELF_SIMLARITY;
 }
@@ -0,0 +1,41 @@
+package no.ntnu.mycbr.rest.config;
+
+import javax.servlet.http.HttpServletRequest;
+
+import org.springframework.boot.web.servlet.FilterRegistrationBean;
+import org.springframework.context.annotation.Bean;
+import org.springframework.context.annotation.Configuration;
+import org.springframework.web.filter.ShallowEtagHeaderFilter;
+
+import static no.ntnu.mycbr.rest.common.ApiPathConstants.*;
+
+/**
+ * Adds an ETag header to the case listings of concepts and case bases.
+ * <br>
+ * Clients use the ETag as a cheap version check: a conditional GET with <code>If-None-Match</code>
+ * is answered with 304 (and no body) as long as the cases did not change, so client-side caches of
+ * case tables and retrieval results can be revalidated without transferring the case base.
+ * @since Oct 19, 2026
+ */
+@Configuration
+public class EtagConfig {
+
+    @Bean
+    public FilterRegistrationBean<ShallowEtagHeaderFilter> caseListEtagFilter() {
+	FilterRegistrationBean<ShallowEtagHeaderFilter> registration =
+		new FilterRegistrationBean<>(new CaseListEtagFilter());
+	registration.addUrlPatterns(PATH_CONCEPTS + "/*");
+	return registration;
+    }
+
+    /**
+     * Only the case listings are hashed; retrieval results are left untouched, since buffering
+     * them (e.g. large self-similarity matrices) would only add latency.
+     */
+    static class CaseListEtagFilter extends ShallowEtagHeaderFilter {
+	@Override
+	protected boolean shouldNotFilter(HttpServletRequest request) {
+	    return !request.getRequestURI().endsWith(PATH_CASES);
+	}
+    }
+}
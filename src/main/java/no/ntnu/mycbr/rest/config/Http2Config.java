@@ -0,0 +1,31 @@
+package no.ntnu.mycbr.rest.config;
+
+import org.apache.coyote.http2.Http2Protocol;
+import org.springframework.boot.web.embedded.tomcat.TomcatServletWebServerFactory;
+import org.springframework.boot.web.server.WebServerFactoryCustomizer;
+import org.springframework.context.annotation.Bean;
+import org.springframework.context.annotation.Configuration;
+
+/**
+ * Accepts cleartext HTTP/2 (h2c) next to HTTP/1.1 on the plain connector.
+ * <br>
+ * Clients that fan out many retrieval calls (e.g. the Python client with the http2 transport)
+ * open one connection with prior knowledge and multiplex the calls as streams on it, instead of
+ * opening a connection per concurrent call. HTTP/1.1 clients are served as before.
+ * @since Oct 19, 2026
+ */
+@Configuration
+public class Http2Config {
+
+    /** Streams of one connection that are processed at the same time (Tomcat's default is 20). */
+    private static final int MAX_CONCURRENT_STREAM_EXECUTION = 200;
+
+    @Bean
+    public WebServerFactoryCustomizer<TomcatServletWebServerFactory> h2cCustomizer() {
+	return factory -> factory.addConnectorCustomizers(connector -> {
+	    Http2Protocol http2 = new Http2Protocol();
+	    http2.setMaxConcurrentStreamExecution(MAX_CONCURRENT_STREAM_EXECUTION);
+	    connector.addUpgradeProtocol(http2);
+	});
+    }
+}
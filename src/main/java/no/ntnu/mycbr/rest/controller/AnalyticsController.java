@@ -3,7 +3,10 @@ package no.ntnu.mycbr.rest.controller;
 import java.util.List;
 import java.util.Map;
 
+import org.springframework.http.HttpStatus;
+import org.springframework.http.ResponseEntity;
 import org.springframework.web.bind.annotation.PathVariable;
+import org.springframework.web.bind.annotation.RequestBody;
 import org.springframework.web.bind.annotation.RequestMapping;
 import org.springframework.web.bind.annotation.RequestMethod;
 import org.springframework.web.bind.annotation.RequestParam;
@@ -27,6 +30,7 @@ public class AnalyticsController {
 
     private static final String GLOBAL_WEIGHTS = "/globalWeights";
     private static final String LOCAL_SIM_COMPARISON = "/localSimComparison";
+    private static final String LOCAL_SIM_COMPARISONS = "/localSimComparisons";
     private static final String DETAILED_CASE_COMPARISON = "/detailedCaseComparison";
     
     private static final String CASE_ID_1 = "caseID_1";
@@ -60,6 +64,22 @@ public class AnalyticsController {
         return service.getLocalSimComparison(caseAID, caseBID);
     }
 
+    @ApiOperation(value = "compares many pairs of instances and returns the local sim for each attribute of each pair", nickname = LOCAL_SIM_COMPARISIONS)
+    @RequestMapping(method = RequestMethod.POST, path= PATH_ANALYTICS_CONCEPT_AMAL_FUNCTION_ID + LOCAL_SIM_COMPARISONS, produces = APPLICATION_JSON)
+    @ApiResponsesDefault
+    public @ResponseBody ResponseEntity<?> LocalSimComparisons(
+	    @PathVariable(value=CONCEPT_ID) String conceptID,
+            @PathVariable(value=AMAL_FUNCTION_ID) String amalgamationFunctionID,
+            @RequestBody(required = true) List<List<String>> pairs) {
+
+        AnalyticsService service = new AnalyticsService(conceptID, amalgamationFunctionID);
+        List<String> unknown = service.getUnknownCaseIDs(pairs);
+        if (!unknown.isEmpty()) {
+            return new ResponseEntity<>("unknown cases " + unknown, HttpStatus.NOT_FOUND);
+        }
+        return new ResponseEntity<>(service.getLocalSimComparisons(pairs), HttpStatus.OK);
+    }
+
     @ApiOperation(value = "Returns the weights for each attribute specified in the global similarity measure", nickname = GLOBAL_WEIGHTS)
     @RequestMapping(method = RequestMethod.GET, path= PATH_ANALYTICS_CONCEPT_AMAL_FUNCTION_ID +GLOBAL_WEIGHTS, produces = APPLICATION_JSON)
     @ApiResponsesDefault
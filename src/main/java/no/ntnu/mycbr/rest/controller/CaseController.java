@@ -66,9 +66,9 @@ public class CaseController {
 		if (!p.getCaseBases().containsKey(casebaseID))
 			return false;
 		ICaseBase cb = p.getCaseBases().get(casebaseID);
-		if (cb.containsCase(casebaseID) == null)
+		if (cb.containsCase(caseID) == null)
 			return false;
-		p.getCaseBases().get(casebaseID).removeCase(caseID);
+		cb.removeCase(caseID);
 		return true;
 	}
 
@@ -106,11 +106,13 @@ public class CaseController {
 	@RequestMapping(method = RequestMethod.GET, value = PATH_CONCEPT_CASEBASE_CASES, headers = ACCEPT_APPLICATION_JSON)
 	@ApiResponsesDefault
 	public List<LinkedHashMap<String, String>> getAllInstancesInCaseBase(
-			@PathVariable(value = CONCEPT_ID) String conceptID, @PathVariable(value = CASEBASE_ID) String casebaseID) {
+			@PathVariable(value = CONCEPT_ID) String conceptID, @PathVariable(value = CASEBASE_ID) String casebaseID,
+			@RequestParam(required = false, value = OFFSET, defaultValue = "0") int offset,
+			@RequestParam(required = false, value = LIMIT, defaultValue = "-1") int limit) {
 
 		Query query = new Query(casebaseID, conceptID);
 		// TODO: filter to one type of concept
-		List<LinkedHashMap<String, String>> cases = getFullResult(query, conceptID);
+		List<LinkedHashMap<String, String>> cases = getFullResult(query, conceptID, offset, limit);
 		return cases;
 	}
 
@@ -124,11 +126,7 @@ public class CaseController {
 		Project p = App.getProject();
 		if (!p.getCaseBases().containsKey(casebaseID))
 			return false;
-		Collection<Instance> collection = p.getCaseBases().get(casebaseID).getCases();
-		for (Instance i : collection) {
-			collection.remove(i);
-		}
-
+		removeCases(p, casebaseID, "*");
 		return true;
 	}
 
@@ -143,27 +141,30 @@ public class CaseController {
 		Project p = App.getProject();
 		if (!p.getCaseBases().containsKey(caseBase))
 			return false;
-		if (pattern.contentEquals("*")) {// this means delete all
-			Collection<Instance> collection = p.getCaseBases().get(caseBase).getCases();
-			Iterator<Instance> it = collection.iterator();
-			while (it.hasNext()) {
-				p.removeCase(it.next().getName());
-			}
-			p.save();
-		} else {
-			Collection<Instance> collection = p.getCaseBases().get(caseBase).getCases();
-			for (Instance i : collection) {
-				collection.remove(i);
-			}
+		removeCases(p, caseBase, pattern);
+		p.save();
+		return true;
+	}
 
+	// Remove the cases of a casebase whose ID matches a glob pattern (* matches any characters).
+	// The IDs are collected first, removing while iterating the casebase fails.
+	private static void removeCases(Project p, String casebaseID, String pattern) {
+		String regex = ("\\Q" + pattern + "\\E").replace("*", "\\E.*\\Q");
+		List<String> caseIDs = new ArrayList<>();
+		for (Instance i : p.getCaseBases().get(casebaseID).getCases()) {
+			if (pattern.contentEquals("*") || i.getName().matches(regex))
+				caseIDs.add(i.getName());
+		}
+		for (String caseID : caseIDs) {
+			p.removeCase(caseID);
 		}
-		return true;
 	}
 
 	/*
 	 * Add instances input should be: {cases: [
-	 * {id:"caseid0",otherattribute:value,..} {id:"caseid1",otherattribute:value,..}
+	 * {caseID:"caseid0",otherattribute:value,..} {caseID:"caseid1",otherattribute:value,..}
 	 * ] }
+	 * caseID is optional, cases without it are numbered by the server.
 	 */
 	@ApiOperation(value = ADD_MULTIPLE_CASES_USING_JSON, nickname = ADD_MULTIPLE_CASES_USING_JSON)
 	@RequestMapping(method = RequestMethod.POST, value = PATH_CONCEPT_CASEBASE_CASES, headers = ACCEPT_APPLICATION_JSON)
@@ -177,7 +178,9 @@ public class CaseController {
 		}
 		Concept c = (Concept) p.getSubConcepts().get(conceptID);
 
-		JSONArray newCases = (JSONArray) json.get(CASES);
+		// the body is bound by Jackson, so the nested list is a plain List rather than a JSONArray
+		JSONArray newCases = new JSONArray();
+		newCases.addAll((Collection<?>) json.get(CASES));
 
 		return instanceService.addInstances(c, casebaseID, newCases);
 	}
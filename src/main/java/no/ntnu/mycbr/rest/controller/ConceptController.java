@@ -18,9 +18,15 @@ import org.springframework.web.bind.annotation.*;
 import org.springframework.web.multipart.MultipartFile;
 
 import java.io.IOException;
+import java.io.InputStream;
+import java.math.BigInteger;
 import java.nio.file.Files;
 import java.nio.file.Path;
 import java.nio.file.Paths;
+import java.nio.file.StandardCopyOption;
+import java.security.DigestInputStream;
+import java.security.MessageDigest;
+import java.security.NoSuchAlgorithmException;
 import java.util.*;
 
 import static no.ntnu.mycbr.rest.common.ApiResponseAnnotations.*;
@@ -76,18 +82,24 @@ public class ConceptController {
     @ApiOperation(value = ADD_AMALGAMATION_FUNCTION, nickname = ADD_AMALGAMATION_FUNCTION)
     @RequestMapping(method = RequestMethod.PUT, path=PATH_CONCEPT_AMAL_FUNCTION_ID, produces = APPLICATION_JSON)
     @ApiResponsesDefault
-    public boolean addAmalgamationFunctions(
+    public ResponseEntity<?> addAmalgamationFunctions(
 	    @PathVariable(value=CONCEPT_ID) String conceptID,
 	    @PathVariable(value=AMAL_FUNCTION_ID) String amalgamationFunctionID,
-	    @RequestParam(value=AMAL_FUNCTION_TYPE) String amalgamationFunctionType) {
+	    @RequestParam(value=AMAL_FUNCTION_TYPE) String amalgamationFunctionType,
+	    @RequestParam(value=ATTRIBUTE_WEIGHTS, defaultValue = "{}") String attributeWeights) {
 	
 	logger.info("in add amalgamationfunction");
 	Concept concept = App.getProject().getSubConcepts().get(conceptID);
 	AmalgamationConfig config = AmalgamationConfig.valueOf(amalgamationFunctionType);
 	AmalgamationFct fct = concept.addAmalgamationFct(config,amalgamationFunctionID, false);
+	// unknown attributes or weights that are not numbers: the function is not kept
+	if (!conceptService.setWeights(concept, fct, attributeWeights)) {
+	    concept.deleteAmalgamFct(fct);
+	    return new ResponseEntity<>("invalid attributeWeights " + attributeWeights, HttpStatus.BAD_REQUEST);
+	}
 	concept.setActiveAmalgamFct(fct);
 
-	return true;
+	return new ResponseEntity<>(true, HttpStatus.OK);
     }
 
     //save file
@@ -99,14 +111,51 @@ public class ConceptController {
 		continue; //next pls
 	    }
 
-	    byte[] bytes = file.getBytes();
-	    Path path = Paths.get(filesAndNames.get(file));
-	    Files.write(path, bytes);
+	    try (InputStream in = file.getInputStream()) {
+		Files.copy(in, Paths.get(filesAndNames.get(file)), StandardCopyOption.REPLACE_EXISTING);
+	    }
 
 	}
 
     }
 
+    //stream the model files to <baseFileName>.json and .h5 and return the sha256 of their content, json first.
+    //The files are written to per-request .part files and only moved in place if the hash is expectedHash,
+    //so a corrupt upload never replaces a stored model and concurrent uploads of one model do not collide.
+    private String saveModelFiles(MultipartFile jsonfile, MultipartFile h5file, String baseFileName,
+	    String expectedHash) throws IOException, NoSuchAlgorithmException {
+
+	MessageDigest digest = MessageDigest.getInstance("SHA-256");
+	String[] suffixes = {".json", ".h5"};
+	MultipartFile[] files = {jsonfile, h5file};
+	String partSuffix = "." + UUID.randomUUID() + ".part";
+	Path[] parts = new Path[files.length];
+	try {
+	    for (int i = 0; i < files.length; i++) {
+		parts[i] = Paths.get(baseFileName + suffixes[i] + partSuffix);
+		try (InputStream in = new DigestInputStream(files[i].getInputStream(), digest)) {
+		    Files.copy(in, parts[i], StandardCopyOption.REPLACE_EXISTING);
+		}
+	    }
+	    String hash = String.format("%064x", new BigInteger(1, digest.digest()));
+	    if (hash.equals(expectedHash)) {
+		for (int i = 0; i < files.length; i++) {
+		    Files.move(parts[i], Paths.get(baseFileName + suffixes[i]), StandardCopyOption.REPLACE_EXISTING,
+			    StandardCopyOption.ATOMIC_MOVE);
+		}
+	    }
+	    return hash;
+	} finally {
+	    for (Path part : parts) {
+		if (part != null)
+		    Files.deleteIfExists(part);
+	    }
+	}
+    }
+
+    // With modelHash the files are stored under their content hash: a request without files
+    // references a model uploaded before (404 if it is unknown), a request with files is checked
+    // against the hash. Without modelHash the files are stored under the name of the json file.
     @ApiOperation(value = ADD_NEURAL_AMALGAMATION_FUNCTION, nickname = ADD_NEURAL_AMALGAMATION_FUNCTION)
     @RequestMapping(method = RequestMethod.PUT, 
     	path=PATH_CONCEPT_ID + "/neuralAmalgamationFunctions/{amalgamationFunctionID}", 
@@ -115,28 +164,52 @@ public class ConceptController {
     public ResponseEntity<?> addNeuralAmalgamationFunctions(
 	    @PathVariable(value=CONCEPT_ID) String conceptID,
 	    @PathVariable(value=AMAL_FUNCTION_ID) String amalgamationFunctionID,
-	    @RequestParam(value="type") String type,
-	    @RequestParam(value="h5file") MultipartFile h5file,
-	    @RequestParam(value="jsonfile") MultipartFile jsonfile) {
+	    @RequestParam(value="type", defaultValue = "direct") String type,
+	    @RequestParam(value="modelHash", required = false) String modelHash,
+	    @RequestParam(value="h5file", required = false) MultipartFile h5file,
+	    @RequestParam(value="jsonfile", required = false) MultipartFile jsonfile) {
 
 	logger.info("adding new Amalgamation Function");
-	if (h5file.isEmpty() || jsonfile.isEmpty()) {
-	    return new ResponseEntity("please select a file!", HttpStatus.OK);
-	}
-	String firstfile = jsonfile.getOriginalFilename();
-	String baseFileName = firstfile.substring(firstfile.lastIndexOf("/")+1,firstfile.lastIndexOf("."));
-	if(baseFileName.contentEquals("/"))
-	    baseFileName = file_path+baseFileName;
-	else
-	    baseFileName = file_path+"/"+baseFileName;
-	try {
-	    HashMap<MultipartFile,String> map = new HashMap<>();
-	    map.put(h5file,baseFileName+".h5");
-	    map.put(jsonfile,baseFileName+".json");
-	    saveUploadedFiles(map);
+	boolean hasFiles = h5file != null && jsonfile != null && !h5file.isEmpty() && !jsonfile.isEmpty();
+	String baseFileName;
+	if (modelHash != null) {
+	    if (!modelHash.matches("[0-9a-f]{64}")) {
+		return new ResponseEntity<>("modelHash must be a hex sha256", HttpStatus.BAD_REQUEST);
+	    }
+	    baseFileName = Paths.get(file_path, "mycbr-model-" + modelHash).toString();
+	    if (!hasFiles) {
+		if (!Files.exists(Paths.get(baseFileName + ".json")) || !Files.exists(Paths.get(baseFileName + ".h5"))) {
+		    return new ResponseEntity<>("unknown model " + modelHash, HttpStatus.NOT_FOUND);
+		}
+	    } else {
+		try {
+		    String hash = saveModelFiles(jsonfile, h5file, baseFileName, modelHash);
+		    if (!hash.equals(modelHash)) {
+			return new ResponseEntity<>("content hash is " + hash, HttpStatus.BAD_REQUEST);
+		    }
+		} catch (IOException | NoSuchAlgorithmException e) {
+		    return new ResponseEntity<>(HttpStatus.BAD_REQUEST);
+		}
+	    }
+	} else {
+	    if (!hasFiles) {
+		return new ResponseEntity("please select a file!", HttpStatus.OK);
+	    }
+	    String firstfile = jsonfile.getOriginalFilename();
+	    baseFileName = firstfile.substring(firstfile.lastIndexOf("/")+1,firstfile.lastIndexOf("."));
+	    if(baseFileName.contentEquals("/"))
+		baseFileName = file_path+baseFileName;
+	    else
+		baseFileName = file_path+"/"+baseFileName;
+	    try {
+		HashMap<MultipartFile,String> map = new HashMap<>();
+		map.put(h5file,baseFileName+".h5");
+		map.put(jsonfile,baseFileName+".json");
+		saveUploadedFiles(map);
 
-	} catch (IOException e) {
-	    return new ResponseEntity<>(HttpStatus.BAD_REQUEST);
+	    } catch (IOException e) {
+		return new ResponseEntity<>(HttpStatus.BAD_REQUEST);
+	    }
 	}
 
 	System.setProperty("NeuralRetrievalModelFilePath",baseFileName);
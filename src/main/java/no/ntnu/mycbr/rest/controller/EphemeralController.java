@@ -1,10 +1,13 @@
 package no.ntnu.mycbr.rest.controller;
 
 import io.swagger.annotations.ApiOperation;
+import no.ntnu.mycbr.rest.controller.service.CaseIDSetRegistry;
 import no.ntnu.mycbr.rest.controller.service.EphemeralRetrieval;
 
 import org.apache.commons.logging.Log;
 import org.apache.commons.logging.LogFactory;
+import org.springframework.http.HttpStatus;
+import org.springframework.http.ResponseEntity;
 import org.springframework.web.bind.annotation.*;
 import java.util.*;
 
@@ -119,4 +122,106 @@ public class EphemeralController {
 
 	return retrivalResults;
     }
+    
+    /**
+     * Register a set of caseIDs for repeated ephemeral retrievals.
+     * @param caseIDs : The caseIDs of the ephemeral case base.
+     * @return String : The caseIDSetID (content hash of the set) to be used in place of the caseIDs.
+     */
+    @ApiOperation(value = ADD_CASE_ID_SET, nickname = ADD_CASE_ID_SET)
+    @RequestMapping(method = RequestMethod.POST, path=PATH_EPHEMERAL_CASE_ID_SETS, produces=APPLICATION_JSON)
+    @ApiResponsesDefault
+    public @ResponseBody String addCaseIDSet(@RequestBody(required = true) Set<String> caseIDs) {
+	return CaseIDSetRegistry.register(caseIDs);
+    }
+
+    /**
+     * Cheap check whether a set of caseIDs is (still) registered.
+     * @return Integer : The size of the set, or 404 if the set is unknown.
+     */
+    @ApiOperation(value = GET_CASE_ID_SET, nickname = GET_CASE_ID_SET)
+    @RequestMapping(method = RequestMethod.GET, path=PATH_EPHEMERAL_CASE_ID_SET_ID, produces=APPLICATION_JSON)
+    @ApiResponsesDefault
+    public ResponseEntity<Integer> getCaseIDSet(@PathVariable(value=CASE_ID_SET_ID) String caseIDSetID) {
+	Set<String> caseIDs = CaseIDSetRegistry.get(caseIDSetID);
+	if (caseIDs == null)
+	    return new ResponseEntity<>(HttpStatus.NOT_FOUND);
+	return new ResponseEntity<>(caseIDs.size(), HttpStatus.OK);
+    }
+
+    @ApiOperation(value = DELETE_CASE_ID_SET, nickname = DELETE_CASE_ID_SET)
+    @RequestMapping(method = RequestMethod.DELETE, path=PATH_EPHEMERAL_CASE_ID_SET_ID, produces=APPLICATION_JSON)
+    @ApiResponsesDefault
+    public boolean deleteCaseIDSet(@PathVariable(value=CASE_ID_SET_ID) String caseIDSetID) {
+	return CaseIDSetRegistry.remove(caseIDSetID);
+    }
+
+    /**
+     * Same as {@link #retrievalFromEphemeralCaseBaseWithContent}, on a registered set of caseIDs.
+     * @return 404 if the set is unknown; the client then registers it again.
+     */
+    @ApiOperation(value = GET_SIMILAR_CASES_FROM_CASE_ID_SET_WITH_CONTENT, nickname = GET_SIMILAR_CASES_FROM_CASE_ID_SET_WITH_CONTENT)
+    @RequestMapping(method = RequestMethod.GET, path=PATH_CASE_ID_SET_RETRIEVAL_WITH_CONTENT, produces=APPLICATION_JSON)
+    @ApiResponsesDefault
+    public ResponseEntity<List<Map<String, String>>> retrievalFromCaseIDSetWithContent(
+	    @PathVariable(value=CONCEPT_ID) String conceptID,
+	    @PathVariable(value=CASEBASE_ID) String casebaseID, 
+	    @PathVariable(value=AMAL_FUNCTION_ID) String amalgamationFunctionID,
+	    @PathVariable(value=CASE_ID_SET_ID) String caseIDSetID,
+	    @RequestParam(value=CASE_ID, defaultValue=DEFAULT_CASE_ID) String queryCaseID,
+	    @RequestParam(required = false, value=NO_OF_RETURNED_CASES,defaultValue = DEFAULT_NO_OF_CASES) int k) {
+
+	Set<String> ephemeralCaseIDs = CaseIDSetRegistry.get(caseIDSetID);
+	if (ephemeralCaseIDs == null)
+	    return new ResponseEntity<>(HttpStatus.NOT_FOUND);
+
+	EphemeralRetrieval ephemeralRetrieval = new EphemeralRetrieval(conceptID, casebaseID, amalgamationFunctionID, k);
+	return new ResponseEntity<>(ephemeralRetrieval.ephemeralRetrivalForSingleQuery(queryCaseID, ephemeralCaseIDs), HttpStatus.OK);
+    }
+
+    /**
+     * Same as {@link #retrievalFromEphemeralCaseBase}, on a registered set of caseIDs.
+     * @param queryCaseIDs : The caseIDs to be queried.
+     * @return 404 if the set is unknown; the client then registers it again.
+     */
+    @ApiOperation(value = GET_SIMILAR_CASES_FROM_CASE_ID_SET, nickname = GET_SIMILAR_CASES_FROM_CASE_ID_SET)
+    @RequestMapping(method = RequestMethod.POST, path=PATH_CASE_ID_SET_RETRIEVAL, produces=APPLICATION_JSON)
+    @ApiResponsesDefault
+    public ResponseEntity<Map<String, Map<String, Double>>> retrievalFromCaseIDSet(
+	    @PathVariable(value=CONCEPT_ID) String conceptID,
+	    @PathVariable(value=CASEBASE_ID) String casebaseID, 
+	    @PathVariable(value=AMAL_FUNCTION_ID) String amalgamationFunctionID,
+	    @PathVariable(value=CASE_ID_SET_ID) String caseIDSetID,
+	    @RequestParam(required = false, value=NO_OF_RETURNED_CASES,defaultValue = DEFAULT_NO_OF_CASES) int k,
+	    @RequestBody(required = true)  Set<String> queryCaseIDs) {
+
+	Set<String> ephemeralCaseIDs = CaseIDSetRegistry.get(caseIDSetID);
+	if (ephemeralCaseIDs == null)
+	    return new ResponseEntity<>(HttpStatus.NOT_FOUND);
+
+	EphemeralRetrieval ephemeralRetrieval = new EphemeralRetrieval(conceptID, casebaseID, amalgamationFunctionID, k);
+	return new ResponseEntity<>(ephemeralRetrieval.ephemeralRetrival(queryCaseIDs, ephemeralCaseIDs), HttpStatus.OK);
+    }
+
+    /**
+     * Same as {@link #computeEphemeralCaseBaseSelfSimilarity}, on a registered set of caseIDs.
+     * @return 404 if the set is unknown; the client then registers it again.
+     */
+    @ApiOperation(value = GET_CASE_ID_SET_SELF_SIMILARITY, nickname = GET_CASE_ID_SET_SELF_SIMILARITY)
+    @RequestMapping(method = RequestMethod.GET, path=PATH_CASE_ID_SET_SELF_SIMILARITY, produces=APPLICATION_JSON)
+    @ApiResponsesDefault
+    public ResponseEntity<Map<String, Map<String, Double>>> computeCaseIDSetSelfSimilarity(
+	    @PathVariable(value=CONCEPT_ID) String conceptID,
+	    @PathVariable(value=CASEBASE_ID) String casebaseID, 
+	    @PathVariable(value=AMAL_FUNCTION_ID) String amalgamationFunctionID,
+	    @PathVariable(value=CASE_ID_SET_ID) String caseIDSetID,
+	    @RequestParam(required = false, value=NO_OF_RETURNED_CASES,defaultValue = DEFAULT_NO_OF_CASES) int k) {
+
+	Set<String> ephemeralCaseIDs = CaseIDSetRegistry.get(caseIDSetID);
+	if (ephemeralCaseIDs == null)
+	    return new ResponseEntity<>(HttpStatus.NOT_FOUND);
+
+	EphemeralRetrieval ephemeralRetrieval = new EphemeralRetrieval(conceptID, casebaseID, amalgamationFunctionID, k);
+	return new ResponseEntity<>(ephemeralRetrieval.computeSelfSimilarity(ephemeralCaseIDs), HttpStatus.OK);
+    }
 }
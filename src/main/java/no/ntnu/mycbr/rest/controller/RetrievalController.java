@@ -33,6 +33,7 @@ public class RetrievalController {
     private static final String RETRIEVAL_BY_MULTIPLE_CASE_I_DS = "/retrievalByMultipleCaseIDs";
     private static final String RETRIEVAL_BY_ATTRIBUTE = "/retrievalByAttribute";
     private static final String RETRIEVAL_BY_MULTIPLE_ATTRIBUTES = "/retrievalByMultipleAttributes";
+    private static final String RETRIEVAL_BY_MULTIPLE_QUERIES = "/retrievalByMultipleQueries";
     private static final String RETRIEVAL_BY_CASE_ID_WITH_CONTENT = "/retrievalByCaseIDWithContent";
     private static final String RETRIEVAL_WITH_CONTENT = "/retrievalWithContent";
     
@@ -183,6 +184,24 @@ public class RetrievalController {
 	return cases;
     }
 
+    // several attribute queries in one request: the ranking (caseID to similarity) of each, in order
+    @ApiOperation(value = GET_SIMILAR_CASES_BY_MULTIPLE_QUERIES, nickname = GET_SIMILAR_CASES_BY_MULTIPLE_QUERIES)
+    @RequestMapping(method = RequestMethod.POST, path=PATH_CONCEPT_CASEBASE_AMAL_FUNCTION_ID+RETRIEVAL_BY_MULTIPLE_QUERIES, produces=APPLICATION_JSON)
+    @ApiResponsesDefault
+    public @ResponseBody List<LinkedHashMap<String, Double>> getSimilarCasesByMultipleQueries(
+	    @PathVariable(value=CONCEPT_ID) String conceptID,
+	    @PathVariable(value=CASEBASE_ID) String casebaseID,
+	    @PathVariable(value=AMAL_FUNCTION_ID) String amalgamationFunctionID,
+	    @RequestParam(required = false, value=NO_OF_RETURNED_CASES,defaultValue = DEFAULT_NO_OF_CASES) int k,
+	    @RequestBody(required = true) List<HashMap<String, Object>> queries) {
+
+	List<LinkedHashMap<String, Double>> rankings = new ArrayList<>();
+	for (HashMap<String, Object> attributeNameValueMap : queries) {
+	    rankings.add(new Query(casebaseID, conceptID, amalgamationFunctionID, attributeNameValueMap, k).getSimilarCases());
+	}
+	return rankings;
+    }
+
     @ApiOperation(value = GET_SIMILAR_CASES_BY_CASE_ID_WITH_CONTENT, nickname = GET_SIMILAR_CASES_BY_CASE_ID_WITH_CONTENT)
     @RequestMapping(method = RequestMethod.GET, path=PATH_CONCEPT_CASEBASE_AMAL_FUNCTION_ID+RETRIEVAL_BY_CASE_ID_WITH_CONTENT, produces=APPLICATION_JSON)
     @ApiResponsesDefault
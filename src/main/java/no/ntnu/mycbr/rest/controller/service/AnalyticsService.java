@@ -106,6 +106,49 @@ public class AnalyticsService {
         return resultList;
     }
 
+    /**
+     * @param pairs : list of [caseID1, caseID2]
+     * @return the caseIDs of the pairs that are not cases of the concept
+     */
+    public List<String> getUnknownCaseIDs(List<List<String>> pairs) {
+        List<String> unknown = new ArrayList<String>();
+        for (List<String> pair : pairs) {
+            for (String caseID : pair) {
+                if (concept.getInstance(caseID) == null && !unknown.contains(caseID))
+                    unknown.add(caseID);
+            }
+        }
+        return unknown;
+    }
+
+    /**
+     * Local similarities of many pairs of cases in one call, e.g. to learn attribute weights.
+     * @param pairs : list of [caseID1, caseID2]
+     * @return for each pair, in order, a map of attribute name to local similarity
+     */
+    public List<Map<String, Double>> getLocalSimComparisons(List<List<String>> pairs) {
+        List<AttributeDesc> sortedAttrDesc = ListUtil.sortAttributeDescs(concept.getAllAttributeDescs().values());
+        List<Map<String, Double>> results = new ArrayList<Map<String, Double>>(pairs.size());
+
+        for (List<String> pair : pairs) {
+            Instance case1 = concept.getInstance(pair.get(0));
+            Instance case2 = concept.getInstance(pair.get(1));
+            LinkedHashMap<String, Double> res = new LinkedHashMap<>();
+
+            for (AttributeDesc attrDesc : sortedAttrDesc) {
+                try {
+                    ISimFct simfct = (ISimFct) concept.getActiveAmalgamFct().getActiveFct(attrDesc);
+                    Similarity sim = simfct.calculateSimilarity(case1.getAttForDesc(attrDesc), case2.getAttForDesc(attrDesc));
+                    res.put(attrDesc.getName(), sim.getValue());
+                } catch (Exception e) {
+                }
+            }
+            results.add(res);
+        }
+
+        return results;
+    }
+
     public List<Map<String, Double>> getGlobalWeights() {
 
         List<AttributeDesc> sortedAttrDesc = ListUtil.sortAttributeDescs(concept.getAllAttributeDescs().values());
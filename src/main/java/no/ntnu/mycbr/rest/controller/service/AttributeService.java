@@ -104,7 +104,7 @@ public class AttributeService {
      * 
      * @param conceptID
      * @param attributeID
-     * @param attributeJSON : e.g. "{"type": "Double","min": "0.0","max": "1.0"}"
+     * @param attributeJSON : e.g. "{"type": "Double","min": "0.0","max": "1.0"}", type is one of String, Double, Integer, Symbol
      * @return
      */
     public boolean addAttribute(String conceptID, String attributeID, String attributeJSON) {
@@ -124,13 +124,22 @@ public class AttributeService {
 		addStringAttribute(subConcept, attributeID, solution.contentEquals("True"));
 	    } else if(type.contains("Double")){
 		if(json.containsKey("min") && json.containsKey("max")) {
-		    double min = (Double)json.get("min");
-		    double max = (Double)json.get("max");
+		    double min = Double.parseDouble(json.get("min").toString());
+		    double max = Double.parseDouble(json.get("max").toString());
 		    //This attribute registers with the concept through callback!
 		    attributeDesc = addDoubleAttribute(subConcept, attributeID, min, max, solution.contentEquals("True"));
 		}else
 		    return false;
 
+	    } else if(type.contains("Integer")){
+		if(json.containsKey("min") && json.containsKey("max")) {
+		    int min = (int) Double.parseDouble(json.get("min").toString());
+		    int max = (int) Double.parseDouble(json.get("max").toString());
+		    //This attribute registers with the concept through callback!
+		    attributeDesc = addIntegerAttribute(subConcept, attributeID, min, max, solution.contentEquals("True"));
+		}else
+		    return false;
+
 	    } else if(type.contains("Symbol")){
 		if(json.containsKey("allowedValues")) {
 		    //This attribute registers with the concept through callback!
@@ -167,6 +176,13 @@ public class AttributeService {
 	return attributeDesc;
     }
 
+    private AttributeDesc addIntegerAttribute(Concept c, String attributeName, int min, int max, boolean solution) throws Exception {
+	AttributeDesc attributeDesc = new IntegerDesc(c, attributeName, min, max);
+	if(solution)
+	    attributeDesc.setIsSolution(true);
+	return attributeDesc;
+    }
+
     public boolean deleteAllAttribute(String conceptID) {
 	Concept subConcept = project.getSubConcepts().get(conceptID);
 	for(String attributeDescName : subConcept.getAllAttributeDescs().keySet()) {
@@ -0,0 +1,74 @@
+package no.ntnu.mycbr.rest.controller.service;
+
+import java.nio.charset.StandardCharsets;
+import java.security.MessageDigest;
+import java.security.NoSuchAlgorithmException;
+import java.util.Collection;
+import java.util.Collections;
+import java.util.LinkedHashMap;
+import java.util.Map;
+import java.util.Set;
+import java.util.TreeSet;
+
+/**
+ * Keeps registered sets of caseIDs, so that clients can run repeated ephemeral retrievals on the same
+ * subset of a case base without resending (and the server without re-parsing) the full list of caseIDs.
+ * <br>
+ * A set is identified by its content hash: the hex SHA-1 of the sorted, distinct caseIDs joined by '\n'.
+ * Clients compute the same hash locally, so registering is idempotent and a handle can be used right
+ * away if the set is already known. The least recently used sets are dropped beyond {@link #MAX_SETS}.
+ * @since Oct 19, 2026
+ */
+public class CaseIDSetRegistry {
+
+    public static final int MAX_SETS = 256;
+
+    private static final Map<String, Set<String>> sets = Collections.synchronizedMap(
+	    new LinkedHashMap<String, Set<String>>(16, 0.75f, true) {
+		private static final long serialVersionUID = 1L;
+
+		@Override
+		protected boolean removeEldestEntry(Map.Entry<String, Set<String>> eldest) {
+		    return size() > MAX_SETS;
+		}
+	    });
+
+    private CaseIDSetRegistry() {
+    }
+
+    /**
+     * @param caseIDs : The caseIDs of the set.
+     * @return The caseIDSetID (content hash) under which the set is registered.
+     */
+    public static String register(Collection<String> caseIDs) {
+	TreeSet<String> sorted = new TreeSet<>(caseIDs);
+	String caseIDSetID = hash(sorted);
+	sets.put(caseIDSetID, Collections.unmodifiableSet(sorted));
+	return caseIDSetID;
+    }
+
+    /**
+     * @return The registered set, or null if the set is unknown (never registered or evicted).
+     */
+    public static Set<String> get(String caseIDSetID) {
+	return sets.get(caseIDSetID);
+    }
+
+    public static boolean remove(String caseIDSetID) {
+	return sets.remove(caseIDSetID) != null;
+    }
+
+    public static String hash(TreeSet<String> sortedCaseIDs) {
+	try {
+	    MessageDigest digest = MessageDigest.getInstance("SHA-1");
+	    byte[] bytes = digest.digest(String.join("\n", sortedCaseIDs).getBytes(StandardCharsets.UTF_8));
+	    StringBuilder hex = new StringBuilder();
+	    for (byte b : bytes) {
+		hex.append(String.format("%02x", b));
+	    }
+	    return hex.toString();
+	} catch (NoSuchAlgorithmException e) {
+	    throw new IllegalStateException(e);
+	}
+    }
+}
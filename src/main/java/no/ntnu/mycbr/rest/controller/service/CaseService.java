@@ -14,6 +14,8 @@ import org.json.simple.JSONArray;
 import org.json.simple.JSONObject;
 import org.springframework.stereotype.Service;
 
+import static no.ntnu.mycbr.rest.utils.Constants.CASE_ID;
+
 import java.util.*;
 
 @Service
@@ -49,25 +51,39 @@ public class CaseService {
         return instance;
     }
 
-    public ArrayList<String> addInstances(Concept c, String casebaseID, Set<Map<AttributeDesc, String>> inpcases){
+    /**
+     * Add a batch of cases to a case base.
+     * @param c : the concept of the cases
+     * @param casebaseID : the case base the cases are added to
+     * @param inpcases : the attribute values of each case
+     * @param caseIDs : the ID of each case, or null entries (or a null list) to let the server number the cases
+     * @return the IDs of the added cases, in input order
+     */
+    public ArrayList<String> addInstances(Concept c, String casebaseID, List<Map<AttributeDesc, String>> inpcases, List<String> caseIDs){
         ICaseBase cb = p.getCaseBases().get(casebaseID);
-        int counter = c.getDirectInstances().size();
-        List<HashMap<String,String>> newCases = new ArrayList<>();
         String idPrefix = c.getName() + "-" + casebaseID;
         ArrayList<String> ret = new ArrayList<>();
         ArrayList<Instance> newInstances = new ArrayList<>();
         Instance instance = null;
         try {
-            for (Map<AttributeDesc, String> caseData : inpcases) {
-                counter++;
-                String id = idPrefix + Integer.toString(counter);
-                ret.add(id);
-                instance = new Instance(c, id);
-                for (AttributeDesc attributeDesc : caseData.keySet()) {
-                    instance.addAttribute(attributeDesc, caseData.get(attributeDesc));
+            // Batches may arrive concurrently; numbering and adding must not interleave per case base.
+            synchronized (cb) {
+                int counter = c.getDirectInstances().size();
+                for (int i = 0; i < inpcases.size(); i++) {
+                    Map<AttributeDesc, String> caseData = inpcases.get(i);
+                    String id = caseIDs == null ? null : caseIDs.get(i);
+                    if (id == null) {
+                        counter++;
+                        id = idPrefix + Integer.toString(counter);
+                    }
+                    ret.add(id);
+                    instance = new Instance(c, id);
+                    for (AttributeDesc attributeDesc : caseData.keySet()) {
+                        instance.addAttribute(attributeDesc, caseData.get(attributeDesc));
+                    }
+                    cb.addCase(instance);
+                    newInstances.add(instance);
                 }
-                cb.addCase(instance);
-                newInstances.add(instance);
             }
             AmalgamationFct afct = c.getActiveAmalgamFct();
             if(afct.getType() == AmalgamationConfig.NEURAL_NETWORK_SOLUTION_DIRECTLY){
@@ -80,33 +96,41 @@ public class CaseService {
         return ret;
     }
     public ArrayList<String> addInstances(Concept c, String casebaseID, JSONArray inpcases){
-        return  addInstances(c,casebaseID,convertJSONArray(c,inpcases));
+        List<String> caseIDs = new ArrayList<>();
+        List<Map<AttributeDesc, String>> cases = convertJSONArray(c, inpcases, caseIDs);
+        return addInstances(c, casebaseID, cases, caseIDs);
     }
-    public Set<Map<AttributeDesc, String>> convertJSONArray(Concept c, JSONArray inpcases){
-        Set<Map<AttributeDesc, String>> ret = new HashSet<>();
-        Iterator<JSONObject> it = inpcases.iterator();
-
-        while (it.hasNext()) {
-            JSONObject ob = it.next();
+    /**
+     * Convert the JSON representation of cases. An optional "caseID" entry of a case is not an
+     * attribute; it is collected into caseIDs (null when absent).
+     */
+    public List<Map<AttributeDesc, String>> convertJSONArray(Concept c, JSONArray inpcases, List<String> caseIDs){
+        List<Map<AttributeDesc, String>> ret = new ArrayList<>();
+        for (Object o : inpcases) {
+            Map<?, ?> ob = (Map<?, ?>) o;
             HashMap<AttributeDesc, String> values = new HashMap<>();
+            String caseID = null;
             for (Object key : ob.keySet()) {
                 Object retObj = ob.get(key);
                 String input = null;
-                if(retObj instanceof Double){
-                    input = ((Double)retObj).toString();
-                }else if(retObj instanceof String) {
+                if(retObj instanceof String) {
                     input = (String) retObj;
-                }else if(retObj instanceof  Long) {
-                    input = ((Long) retObj).toString();
+                }else if(retObj instanceof Number) {
+                    input = retObj.toString();
                 }
 
+                if (CASE_ID.equals(key)) {
+                    caseID = input;
+                    continue;
+                }
                 AttributeDesc attributeDesc = c.getAllAttributeDescs().get( key);
                 values.put(attributeDesc,input);
             }
+            ret.add(values);
+            caseIDs.add(caseID);
         }
 
         return ret;
     }
 
-
 }
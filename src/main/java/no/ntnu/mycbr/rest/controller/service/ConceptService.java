@@ -9,6 +9,9 @@ import no.ntnu.mycbr.core.similarity.config.NumberConfig;
 import no.ntnu.mycbr.rest.App;
 import org.apache.commons.logging.Log;
 import org.apache.commons.logging.LogFactory;
+import org.json.simple.JSONObject;
+import org.json.simple.parser.JSONParser;
+import org.json.simple.parser.ParseException;
 import org.springframework.stereotype.Service;
 
 import java.util.HashMap;
@@ -114,4 +117,37 @@ public class ConceptService {
         c.setActiveAmalgamFct(fct);
         return true;
     }
+
+    /**
+     * Set the attribute weights of an amalgamation function, e.g. weights learned by a client.
+     * @param c : the concept of the function
+     * @param fct : the amalgamation function
+     * @param attributeWeights : JSON object of attribute name to weight, e.g. "{"age": 0.7, "bmi": 1.3}"
+     * @return false if the JSON could not be parsed or names an unknown attribute
+     */
+    public boolean setWeights(Concept c, AmalgamationFct fct, String attributeWeights){
+        JSONObject weights;
+        try {
+            weights = (JSONObject) new JSONParser().parse(attributeWeights);
+        } catch (ParseException e) {
+            logger.error("could not parse attribute weights:" , e);
+            return false;
+        }
+        boolean ok = true;
+        for (Object name : weights.keySet()) {
+            AttributeDesc desc = c.getAttributeDesc(name.toString());
+            if (desc == null) {
+                logger.error("no attribute named " + name);
+                ok = false;
+                continue;
+            }
+            try {
+                fct.setWeight(desc, Double.parseDouble(String.valueOf(weights.get(name))));
+            } catch (NumberFormatException e) {
+                logger.error("weight of " + name + " is not a number: " + weights.get(name));
+                ok = false;
+            }
+        }
+        return ok;
+    }
 }
@@ -22,4 +22,27 @@ public class QueryUtils {
 
         return cases;
     }
+
+    /**
+     * Same as {@link #getFullResult(Query, String)}, restricted to one page of the result, 
+     * so only the cases of that page are materialized.
+     * @param offset : number of leading results to skip
+     * @param limit  : maximum number of results, or a negative value for all remaining results
+     */
+    public static List<LinkedHashMap<String, String>> getFullResult(Query query, String concept, int offset, int limit) {
+        LinkedHashMap<String, Double> results = query.getSimilarCases();
+        List<LinkedHashMap<String, String>> cases = new ArrayList<>();
+
+        int index = 0;
+        for (Map.Entry<String, Double> entry : results.entrySet()) {
+            if (limit >= 0 && cases.size() >= limit)
+                break;
+            if (index++ < offset)
+                continue;
+            Case caze = new Case(concept, entry.getKey(), entry.getValue());
+            cases.add(caze.getCase());
+        }
+
+        return cases;
+    }
 }
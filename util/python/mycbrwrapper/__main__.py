@@ -0,0 +1,151 @@
+"""
+Command line tools of mycbrwrapper.
+
+    python -m mycbrwrapper loadtest --host localhost:8080 --log calls.log.gz --speed 2
+    python -m mycbrwrapper loadtest --standin --cases 2000 --rate 200 --duration 30
+    python -m mycbrwrapper transport-bench --standin --concurrency 64
+    python -m mycbrwrapper warmup --host localhost:8080 --log calls.log.gz --cache results.db
+"""
+
+from mycbrwrapper.loadtest import LoadTest, formatReport, syntheticMix
+from mycbrwrapper.recorder import readLog
+from mycbrwrapper.transport import TRANSPORTS, benchmark
+import argparse
+import json
+import random
+
+
+def standinCaseBase(server, concept, casebase, function, count, seed=0):
+    """Provision a synthetic casebase of `count` cases on a stand-in server."""
+    from mycbrwrapper.provisioning import Provisioner
+    rng = random.Random(seed)
+    cases = [{"caseID": "case{}".format(i), "a": str(rng.uniform(0, 100)), "b": str(rng.randint(0, 10)),
+              "c": rng.choice(["x", "y", "z"])} for i in range(count)]
+    spec = {"concepts": {concept: {
+        "attributes": {"a": {"type": "Double", "min": 0, "max": 100}, "b": {"type": "Integer", "min": 0, "max": 10},
+                       "c": {"type": "Symbol", "allowedValues": ["x", "y", "z"]}},
+        "amalgamationFunctions": {function: {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+        "cases": {casebase: cases}}}}
+    Provisioner(server.host, spec).run()
+
+
+def loadtest(args):
+    server = None
+    host = args.host
+    if args.standin:
+        from mycbrwrapper.standin import StandInServer
+        server = StandInServer(pause=args.pause, pauseRate=args.pause_rate).start()
+        host = server.host
+        standinCaseBase(server, args.concept, args.casebase, args.function, args.cases)
+    try:
+        if args.log is not None:
+            entries = list(readLog(args.log))
+        else:
+            entries = syntheticMix(host, args.concept, args.casebase, args.function, args.count, k=args.k)
+        test = LoadTest(host, entries, rate=args.rate, concurrency=args.concurrency, duration=args.duration,
+                        speed=args.speed, interval=args.interval, timeout=args.timeout)
+        report = test.run()
+    finally:
+        if server is not None:
+            server.stop()
+    print(json.dumps(report, indent=2) if args.json else formatReport(report))
+
+
+def transportBench(args):
+    server = None
+    host = args.host
+    if args.standin:
+        from mycbrwrapper.standin import StandInServer
+        server = StandInServer().start()
+        host = server.host
+        standinCaseBase(server, args.concept, args.casebase, args.function, args.cases)
+    try:
+        report = benchmark(host, args.concept, args.casebase, args.function, transports=args.transports,
+                           calls=args.count, concurrency=args.concurrency, k=args.k)
+    finally:
+        if server is not None:
+            server.stop()
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print("{:>10} {:>11} {:>7}{:>10}{:>10}{:>10}".format("transport", "throughput", "errors", "p50", "p90", "p99"))
+    for name, row in report.items():
+        cells = "".join("{:>10}".format("-" if row[c] is None else "{:.1f}".format(row[c]))
+                        for c in ("p50", "p90", "p99"))
+        label = name + (" (http1)" if row["fallback"] else "")
+        print("{:>10} {:>11.1f} {:>7}".format(label, row["throughput"], row["errors"]) + cells)
+
+
+def warmup(args):
+    from mycbrwrapper.cache import RetrievalCache
+    from mycbrwrapper.warmup import warmUp
+    cache = RetrievalCache(args.cache)
+    try:
+        stats = warmUp(args.host, cache, args.log, top=args.top, recent=args.recent, batchsize=args.batchsize,
+                       rate=args.rate, workers=args.workers, neighbours=args.neighbours)
+    finally:
+        cache.close()
+    print(json.dumps(stats, indent=2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m mycbrwrapper", description="mycbrwrapper tools")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    test = commands.add_parser("loadtest", help="replay a recorded log or a synthetic mix and report "
+                                                "throughput and latency percentiles")
+    test.add_argument("--host", default="localhost:8080", help="server to test")
+    test.add_argument("--standin", action="store_true", help="test an in-process stand-in server instead")
+    test.add_argument("--log", help="log written by mycbrwrapper.recorder (default: synthetic mix)")
+    test.add_argument("--rate", type=float, help="open-loop calls per second")
+    test.add_argument("--concurrency", type=int, help="closed-loop workers")
+    test.add_argument("--duration", type=float, help="seconds to run, cycling the calls")
+    test.add_argument("--speed", type=float, default=1.0, help="replay speed of a recorded log")
+    test.add_argument("--interval", type=float, default=1.0, help="seconds per report window")
+    test.add_argument("--timeout", type=float, default=30, help="timeout of each call in seconds")
+    test.add_argument("--json", action="store_true", help="print the report as JSON")
+    synthetic = test.add_argument_group("synthetic mix")
+    synthetic.add_argument("--concept", default="loadtest")
+    synthetic.add_argument("--casebase", default="loadtest")
+    synthetic.add_argument("--function", default="loadtest", help="amalgamation function")
+    synthetic.add_argument("--count", type=int, default=1000, help="number of calls")
+    synthetic.add_argument("-k", type=int, default=10, help="cases retrieved per call")
+    synthetic.add_argument("--cases", type=int, default=1000, help="cases of the stand-in casebase")
+    synthetic.add_argument("--pause", type=float, default=0.0, help="stand-in pause length in seconds")
+    synthetic.add_argument("--pause-rate", type=float, default=0.0, help="fraction of calls the stand-in pauses")
+    test.set_defaults(run=loadtest)
+
+    bench = commands.add_parser("transport-bench", help="fan out retrievals with each transport "
+                                                        "(see mycbrwrapper.transport)")
+    bench.add_argument("--host", default="localhost:8080", help="server to test")
+    bench.add_argument("--standin", action="store_true", help="test an in-process stand-in server instead")
+    bench.add_argument("--transports", nargs="+", choices=TRANSPORTS, default=list(TRANSPORTS))
+    bench.add_argument("--concurrency", type=int, default=64, help="concurrent calls")
+    bench.add_argument("--count", type=int, default=2000, help="calls per transport")
+    bench.add_argument("-k", type=int, default=10, help="cases retrieved per call")
+    bench.add_argument("--concept", default="loadtest")
+    bench.add_argument("--casebase", default="loadtest")
+    bench.add_argument("--function", default="loadtest", help="amalgamation function")
+    bench.add_argument("--cases", type=int, default=1000, help="cases of the stand-in casebase")
+    bench.add_argument("--json", action="store_true", help="print the report as JSON")
+    bench.set_defaults(run=transportBench)
+
+    warm = commands.add_parser("warmup", help="fill a retrieval cache with the hot queries of recorded logs")
+    warm.add_argument("--host", default="localhost:8080", help="server to query")
+    warm.add_argument("--log", nargs="+", required=True, help="logs written by mycbrwrapper.recorder")
+    warm.add_argument("--cache", required=True, help="SQLite file of the mycbrwrapper.cache.RetrievalCache")
+    warm.add_argument("--top", type=int, default=1000, help="most frequent caseIDs warmed per casebase")
+    warm.add_argument("--recent", type=float, help="only count the last seconds of the logs")
+    warm.add_argument("--batchsize", type=int, default=100, help="caseIDs per call")
+    warm.add_argument("--rate", type=float, default=10.0, help="calls per second")
+    warm.add_argument("--workers", type=int, default=4, help="calls in flight")
+    warm.add_argument("--neighbours", type=int, default=0, help="also warm the nearest cases of hot cases")
+    warm.set_defaults(run=warmup)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
 from mycbrwrapper.rest import getRequest
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
+import os
+import threading
+import uuid
 
 class AmalgamationFunction():
 
@@ -31,21 +37,136 @@ class NeuralAmalgamationFunction(AmalgamationFunction):
         self.createAmalgamationFunction()
 
     def createAmalgamationFunction(self):
-        print("in NEURAL createamal")
-        api = getRequest(self.host)
-        call = api.concepts(self.concept.name).neuralAmalgamationFunctions(self.name)
-        jsonfilename = self.files["json"]
-        h5filename = self.files["h5"]
-        files = {"jsonfile": (jsonfilename,
-                              open(jsonfilename,'rb'), {'Expires': '0'}),
-                 "h5file": (h5filename,
-                            open(h5filename,'rb'), {'Expires': '0'})}
-        #requests.post('http://requestb.in/xucj9exu', files=(('foo', 'bar'), ('spam', 'eggs')))
-        #result = call.PUT('http://requestb.in/xucj9exu', files=(('foo', 'bar'), ('spam', 'eggs')))
-        print("in neural createamalgamationfunction url is: {}".format(call._url))
-        results = call.PUT(files={"jsonfile":(jsonfilename,open(jsonfilename,'rb'),{'Expires': '0'}),
-                                  "h5file":(h5filename,open(h5filename,'rb'),{'Expires': '0'})})
-        #results = call.PUT(files=files)
-        #results = call.PUT(params=files)
-        print("results: {}".format(results))
+        registerNeuralModel(self.host, [self.concept.name], self.name, self.files)
         self.created = True
+
+
+CHUNK_SIZE = 1 << 20
+
+_hashes = {}
+_uploadLocks = {}
+_lock = threading.Lock()
+
+
+def modelHash(files):
+    """sha256 of a neural model, as checked by the server: the content of the json file followed by the h5 file.
+
+    The files are read in chunks and the hash is cached by path, size and
+    modification time.
+
+    :param files: dict with the paths of the "json" and "h5" files
+    :rtype: hex string
+    """
+    key = []
+    for name in ("json", "h5"):
+        stat = os.stat(files[name])
+        key.append((os.path.abspath(files[name]), stat.st_size, stat.st_mtime_ns))
+    key = tuple(key)
+    with _lock:
+        if key in _hashes:
+            return _hashes[key]
+    digest = hashlib.sha256()
+    for name in ("json", "h5"):
+        with open(files[name], "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+    with _lock:
+        _hashes[key] = digest.hexdigest()
+    return _hashes[key]
+
+
+class _MultipartStream():
+    """multipart/form-data body read from the files on demand.
+
+    requests sends objects with read() in chunks and takes the
+    Content-Length from len(), so the model is never held in memory.
+
+    :param fields: list of (field name, path)
+    """
+
+    def __init__(self, fields):
+        self.boundary = uuid.uuid4().hex
+        self.parts = []
+        for field, path in fields:
+            header = ('--{}\r\nContent-Disposition: form-data; name="{}"; filename="{}"\r\n'
+                      'Content-Type: application/octet-stream\r\n\r\n').format(self.boundary, field,
+                                                                             os.path.basename(path))
+            self.parts += [header.encode("utf-8"), path, b"\r\n"]
+        self.parts.append("--{}--\r\n".format(self.boundary).encode("utf-8"))
+        self.length = sum(len(p) if isinstance(p, bytes) else os.path.getsize(p) for p in self.parts)
+        self.index = 0
+        self.current = None
+
+    @property
+    def contentType(self):
+        return "multipart/form-data; boundary=" + self.boundary
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        size = CHUNK_SIZE if size is None or size < 0 else size
+        while self.index < len(self.parts):
+            if self.current is None:
+                part = self.parts[self.index]
+                self.current = io.BytesIO(part) if isinstance(part, bytes) else open(part, "rb")
+            data = self.current.read(size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+            self.index += 1
+        return b""
+
+    def __iter__(self):
+        return iter(lambda: self.read(CHUNK_SIZE), b"")
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+
+def _putNeural(host, concept, name, type, digest, files=None):
+    call = getRequest(host).concepts(concept).neuralAmalgamationFunctions(name)
+    params = {"type": type, "modelHash": digest}
+    if files is None:
+        return call.PUT(params=params)
+    body = _MultipartStream([("jsonfile", files["json"]), ("h5file", files["h5"])])
+    try:
+        return call.PUT(params=params, data=body, headers={"Content-Type": body.contentType})
+    finally:
+        body.close()
+
+
+def registerNeuralModel(host, concepts, name, files, type="direct", workers=8):
+    """Add a neural amalgamation function to concepts, uploading the model at most once.
+
+    Each concept first references the model by its content hash; only if
+    the server does not have it yet is it uploaded, streamed from disk,
+    by one thread while the others wait and then reference it.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param concepts: names of the concepts
+    :param name: name of the amalgamation function
+    :param files: dict with the paths of the "json" and "h5" files
+    :param type: "direct" or "gabel"
+    :param workers: number of concurrent requests
+    :returns: the model hash
+    """
+    digest = modelHash(files)
+    with _lock:
+        uploadLock = _uploadLocks.setdefault((host, digest), threading.Lock())
+
+    def register(concept):
+        result = _putNeural(host, concept, name, type, digest)
+        if result.status_code == 404:
+            with uploadLock:
+                result = _putNeural(host, concept, name, type, digest)
+                if result.status_code == 404:
+                    result = _putNeural(host, concept, name, type, digest, files)
+        result.raise_for_status()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(register, concepts))
+    return digest
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class RetrievalCache():
+    """Persistent cache for retrieval and self-similarity results.
+
+    Entries live in a SQLite file, so several processes (notebook
+    sessions, gunicorn workers) can share warm results. The database runs
+    in WAL mode, which lets readers proceed while one writer commits. The
+    cache is bounded by entry count and optionally by stored bytes; the
+    least recently used entries are evicted first.
+
+    :param path: file name of the SQLite database (created if missing)
+    :param maxEntries: maximum number of cached responses
+    :param maxBytes: maximum size of the stored (compressed) responses,
+        or None for no byte limit
+    :param evictEvery: number of writes between two eviction passes
+    """
+
+    def __init__(self, path, maxEntries=100000, maxBytes=None, evictEvery=64):
+        self.path = path
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.evictEvery = evictEvery
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS entries ("
+                     "key TEXT PRIMARY KEY, "
+                     "endpoint TEXT NOT NULL, "
+                     "fingerprint TEXT, "
+                     "value BLOB NOT NULL, "
+                     "size INTEGER NOT NULL, "
+                     "accessed REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_fingerprint ON entries (fingerprint)")
+
+    def _connection(self):
+        # sqlite3 connections must not cross threads or a fork, so keep
+        # one per thread and reopen it in a child process.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def key(endpoint, params=None, fingerprint=None):
+        """Build the cache key of a call.
+
+        :param endpoint: the URL (or path) of the REST call
+        :param params: JSON-serialisable query parameters or request body
+        :param fingerprint: casebase version the result was computed on
+        :returns: hex digest identifying the call
+        :rtype: str
+        """
+        raw = json.dumps([endpoint, params, fingerprint], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, endpoint, params=None, fingerprint=None):
+        """Return the cached JSON response of a call, or None on a miss."""
+        key = self.key(endpoint, params, fingerprint)
+        conn = self._connection()
+        row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        self.hits += 1
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def has(self, endpoint, params=None, fingerprint=None):
+        """True if a call is cached; unlike get() this neither counts as a hit or miss nor refreshes the entry."""
+        key = self.key(endpoint, params, fingerprint)
+        return self._connection().execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+
+    def put(self, endpoint, value, params=None, fingerprint=None):
+        """Store the JSON response `value` of a call."""
+        key = self.key(endpoint, params, fingerprint)
+        blob = zlib.compress(json.dumps(value).encode("utf-8"), 1)
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO entries "
+                     "(key, endpoint, fingerprint, value, size, accessed) "
+                     "VALUES (?, ?, ?, ?, ?, ?)",
+                     (key, endpoint, fingerprint, blob, len(blob), time.time()))
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % self.evictEvery == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache is within its bounds."""
+        conn = self._connection()
+        count, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        excess = max(0, count - self.maxEntries)
+        if excess > 0:
+            conn.execute("DELETE FROM entries WHERE key IN "
+                         "(SELECT key FROM entries ORDER BY accessed LIMIT ?)", (excess,))
+            size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if self.maxBytes is not None and size > self.maxBytes:
+            cursor = conn.execute("SELECT key, size FROM entries ORDER BY accessed")
+            victims = []
+            for key, entrysize in cursor:
+                if size <= self.maxBytes:
+                    break
+                victims.append((key,))
+                size -= entrysize
+            conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def invalidate(self, fingerprint):
+        """Drop all entries computed on the casebase version `fingerprint`."""
+        self._connection().execute("DELETE FROM entries WHERE fingerprint = ?", (fingerprint,))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM entries")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
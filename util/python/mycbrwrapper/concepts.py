@@ -3,6 +3,7 @@ from mycbrwrapper.attributes import Attribute
 from mycbrwrapper.amalgamationfunctions import *
 from mycbrwrapper.instances import Instance,Instances
 from mycbrwrapper.casebases import CaseBase
+from mycbrwrapper.teardown import Teardown
 
 __name__ = "concepts"
 
@@ -116,8 +117,13 @@ class Concepts():
         result = call.DELETE()
 
     def deleteAllConcepts(self):
-        for conceptname in self.concepts:
-            self.deleteConcept(conceptname)
+        casebases = {cb for concept in self.concepts.values() for cb in concept.casebases}
+        Teardown(self.host).run(concepts=list(self.concepts), casebases=sorted(casebases), keepCaseBases=True)
+        for concept in self.concepts.values():
+            concept.instances.instances.clear()
+            concept.attributes.clear()
+            concept.amalgamationFunctions.clear()
+        self.concepts.clear()
 
     def __iter__(self):
         self.counter = 0
@@ -0,0 +1,192 @@
+"""
+scikit-learn estimators backed by a mycbr-rest server.
+
+    from sklearn.model_selection import GridSearchCV
+    search = GridSearchCV(MyCBRClassifier(host="localhost:8080"), {"n_neighbors": [3, 5, 9]}, n_jobs=-1)
+    search.fit(X, y)
+
+fit() uploads the training rows as a casebase named after a hash of their
+content, so fitting the same rows again (e.g. in another GridSearchCV
+job) finds them already on the server. The concept is named after the
+columns and the attribute ranges inferred from the rows, so data with
+other ranges gets a concept of its own. Only plain parameters and the
+training labels are kept on the estimator; every call opens its own
+connections, so estimators pickle and run in worker processes.
+
+The server rejects numeric query values outside an attribute's range, so
+predict() clamps them to the ranges seen in fit(): rows held out of a
+GridSearchCV fold often lie outside the range of the fold's training
+rows. Queries are sent in batches of `batchsize` (one request per row to
+servers without retrievalByMultipleQueries).
+"""
+
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.rest import getRequest
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+
+from sklearn.base import BaseEstimator, ClassifierMixin, RegressorMixin
+
+
+def _frame(X):
+    """Column names and rows (lists of values) of a DataFrame or 2-d array."""
+    columns = getattr(X, "columns", None)
+    if columns is not None:
+        return [str(c) for c in columns], X.values.tolist()
+    import numpy as np
+    X = np.asarray(X)
+    return ["x{}".format(i) for i in range(X.shape[1])], X.tolist()
+
+
+def _known(value):
+    return value is not None and value == value and str(value) != ""
+
+
+def _describe(values):
+    """attributeJSON description of a column: Double over the observed range or Symbol."""
+    known = [v for v in values if _known(v)]
+    try:
+        numbers = [float(v) for v in known]
+    except (TypeError, ValueError):
+        return {"type": "Symbol", "allowedValues": sorted({str(v) for v in known}), "solution": "False"}
+    low, high = (min(numbers), max(numbers)) if numbers else (0.0, 1.0)
+    return {"type": "Double", "min": low, "max": high if high > low else low + 1.0, "solution": "False"}
+
+
+class _MyCBRNeighbours(BaseEstimator):
+    """Shared part of MyCBRClassifier and MyCBRRegressor.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param concept: name of the concept (default: derived from the column names and the inferred
+        attribute types and ranges; an existing concept keeps its attributes)
+    :param casebase: name of the casebase (default: derived from the training rows)
+    :param amalgamationFunction: name of the amalgamation function created for the concept
+    :param n_neighbors: number of neighbours
+    :param weights: "similarity" to weight neighbours by their similarity, "uniform" otherwise
+    :param workers: number of concurrent requests
+    :param batchsize: number of rows retrieved per request
+    """
+
+    def __init__(self, host="localhost:8080", concept=None, casebase=None, amalgamationFunction="sklearn",
+                 n_neighbors=5, weights="similarity", workers=8, batchsize=100):
+        self.host = host
+        self.concept = concept
+        self.casebase = casebase
+        self.amalgamationFunction = amalgamationFunction
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.workers = workers
+        self.batchsize = batchsize
+
+    def fit(self, X, y):
+        import numpy as np
+        columns, rows = _frame(X)
+        self.columns_ = columns
+        self.y_ = np.asarray(y)
+        attributes = {name: _describe([row[j] for row in rows]) for j, name in enumerate(columns)}
+        self.ranges_ = {name: (d["min"], d["max"]) for name, d in attributes.items() if d["type"] == "Double"}
+        # the Provisioner keeps attributes that exist, so the concept is named after their descriptions
+        schema = hashlib.sha1(json.dumps([columns, attributes], sort_keys=True).encode("utf-8"))
+        self.concept_ = self.concept or "sklearn-" + schema.hexdigest()[:12]
+        digest = hashlib.sha1(json.dumps([columns, rows, self.y_.tolist()], default=str).encode("utf-8"))
+        self.casebase_ = self.casebase or "sklearn-" + digest.hexdigest()[:16]
+        cases = [dict({name: str(v) for name, v in zip(columns, row) if _known(v)}, caseID="row{}".format(i))
+                 for i, row in enumerate(rows)]
+        spec = {"concepts": {self.concept_: {
+            "attributes": attributes,
+            "amalgamationFunctions": {self.amalgamationFunction: {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+            "cases": {self.casebase_: cases}}}}
+        Provisioner(self.host, spec, workers=self.workers).run()
+        return self
+
+    def _function(self):
+        return getRequest(self.host).concepts(self.concept_).casebases(self.casebase_)\
+                   .amalgamationFunctions(self.amalgamationFunction)
+
+    def _retrieve(self, query, k):
+        """Ranking of one query: list of (caseID, similarity)."""
+        result = self._function().retrievalByMultipleAttributes.POST(params={"k": k}, json=query)
+        result.raise_for_status()
+        return [(case["caseID"], float(case["similarity"])) for case in result.json()]
+
+    def _retrieveBatch(self, queries, k):
+        """Rankings of several queries in one request, or None if the server cannot batch them."""
+        result = self._function().retrievalByMultipleQueries.POST(params={"k": k}, json=queries)
+        if result.status_code in (404, 405):
+            return None
+        result.raise_for_status()
+        return [[(caseID, float(sim)) for caseID, sim in ranking.items()] for ranking in result.json()]
+
+    def _queryValue(self, name, value):
+        if name in self.ranges_:
+            low, high = self.ranges_[name]
+            return str(min(max(float(value), low), high))
+        return str(value)
+
+    def _neighbours(self, X, k=None):
+        """Training row indices and similarities of the k neighbours of each row of X (padded with -1 and 0)."""
+        import numpy as np
+        k = k or self.n_neighbors
+        columns, rows = _frame(X)
+        queries = [{name: self._queryValue(name, v) for name, v in zip(columns, row) if _known(v)} for row in rows]
+        batches = [queries[i:i + self.batchsize] for i in range(0, len(queries), self.batchsize)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            rankings = list(pool.map(lambda batch: self._retrieveBatch(batch, k), batches[:1]))
+            if rankings and rankings[0] is None:
+                rankings = [list(pool.map(lambda query: self._retrieve(query, k), queries))]
+            else:
+                rankings += pool.map(lambda batch: self._retrieveBatch(batch, k), batches[1:])
+        indices = np.full((len(rows), k), -1, dtype=np.int64)
+        similarities = np.zeros((len(rows), k))
+        for i, ranking in enumerate(r for batch in rankings for r in batch):
+            ranking = ranking[:k]
+            indices[i, :len(ranking)] = [int(caseID[3:]) for caseID, _ in ranking]
+            similarities[i, :len(ranking)] = [sim for _, sim in ranking]
+        return indices, similarities
+
+    def _weights(self, indices, similarities):
+        import numpy as np
+        weights = similarities if self.weights == "similarity" else np.ones_like(similarities)
+        return np.where(indices >= 0, weights, 0.0)
+
+    def kneighbors(self, X, n_neighbors=None, return_distance=True):
+        """Neighbours as in sklearn.neighbors, with distance = 1 - similarity."""
+        indices, similarities = self._neighbours(X, n_neighbors)
+        return (1.0 - similarities, indices) if return_distance else indices
+
+
+class MyCBRClassifier(ClassifierMixin, _MyCBRNeighbours):
+    """kNN classifier: similarity weighted vote of the retrieved cases."""
+
+    def fit(self, X, y):
+        import numpy as np
+        super(MyCBRClassifier, self).fit(X, y)
+        self.classes_, self.codes_ = np.unique(self.y_, return_inverse=True)
+        return self
+
+    def predict_proba(self, X):
+        import numpy as np
+        indices, similarities = self._neighbours(X)
+        weights = self._weights(indices, similarities)
+        votes = np.zeros((len(indices), len(self.classes_)))
+        rows = np.repeat(np.arange(len(indices)), indices.shape[1])
+        np.add.at(votes, (rows, self.codes_[np.maximum(indices, 0)].ravel()), weights.ravel())
+        total = votes.sum(axis=1, keepdims=True)
+        return np.divide(votes, total, out=np.full_like(votes, 1.0 / len(self.classes_)), where=total > 0)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class MyCBRRegressor(RegressorMixin, _MyCBRNeighbours):
+    """kNN regressor: similarity weighted mean of the targets of the retrieved cases."""
+
+    def predict(self, X):
+        import numpy as np
+        indices, similarities = self._neighbours(X)
+        weights = self._weights(indices, similarities)
+        values = self.y_.astype(np.float64)[np.maximum(indices, 0)]
+        total = weights.sum(axis=1)
+        return np.divide((values * weights).sum(axis=1), total, out=np.full(len(indices), self.y_.mean()),
+                         where=total > 0)
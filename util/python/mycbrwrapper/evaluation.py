@@ -0,0 +1,214 @@
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.fingerprint import getFingerprint
+from concurrent.futures import ThreadPoolExecutor
+import random
+
+UNKNOWN_VALUES = ("_unknown_", "_undefined_", "")
+
+
+def kFolds(caseIDs, folds, seed=0):
+    """Split caseIDs into `folds` shuffled folds of (almost) equal size.
+
+    :returns: list of lists of caseIDs
+    """
+    shuffled = list(caseIDs)
+    random.Random(seed).shuffle(shuffled)
+    return [shuffled[i::folds] for i in range(folds)]
+
+
+class EvaluationResult():
+    """Neighbours retrieved for every query case and the metrics computed from them.
+
+    Neighbour lists shorter than k are padded (row -1, similarity 0).
+    Queries whose own label is unknown are left out of the metrics and
+    neighbours with an unknown label do not vote.
+
+    :ivar caseIDs: the query caseIDs
+    :ivar labels: numpy array of the target value of every query
+    :ivar neighbourLabels: numpy array (queries x k) of the target values of the neighbours
+    :ivar similarities: float array (queries x k) of the neighbour similarities
+    """
+
+    def __init__(self, caseIDs, labels, neighbourLabels, similarities):
+        import numpy as np
+        self.caseIDs = caseIDs
+        self.labels = np.asarray(labels, dtype=object)
+        self.neighbourLabels = np.asarray(neighbourLabels, dtype=object).reshape(len(caseIDs), -1)
+        self.similarities = np.asarray(similarities, dtype=np.float64).reshape(len(caseIDs), -1)
+        self.known = np.array([label not in UNKNOWN_VALUES and label is not None for label in self.labels], dtype=bool)
+        self.voting = np.array([[label not in UNKNOWN_VALUES and label is not None for label in row]
+                                for row in self.neighbourLabels], dtype=bool).reshape(self.similarities.shape)
+
+    def _weights(self, weighted):
+        import numpy as np
+        weights = self.similarities if weighted else np.ones_like(self.similarities)
+        return np.where(self.voting, weights, 0.0)
+
+    def predictions(self, weighted=True):
+        """Majority vote of the neighbours (weighted by similarity, ties go to the first label seen).
+
+        :returns: numpy array of predicted labels, None where no neighbour voted
+        """
+        import numpy as np
+        classes, codes = np.unique(self.neighbourLabels.astype(str), return_inverse=True)
+        codes = codes.reshape(self.neighbourLabels.shape)
+        votes = np.zeros((len(self.caseIDs), len(classes)))
+        rows = np.repeat(np.arange(len(self.caseIDs)), codes.shape[1])
+        np.add.at(votes, (rows, codes.ravel()), self._weights(weighted).ravel())
+        predicted = classes[votes.argmax(axis=1)].astype(object)
+        predicted[votes.max(axis=1) <= 0] = None
+        return predicted
+
+    def accuracy(self, weighted=True):
+        """Fraction of queries whose label is predicted by the neighbour vote (kNN accuracy)."""
+        import numpy as np
+        predicted = self.predictions(weighted)
+        return float(np.mean(predicted[self.known] == self.labels[self.known].astype(str)))
+
+    def precisionAtK(self):
+        """Mean fraction of the k neighbours that share the query's label."""
+        import numpy as np
+        same = self.neighbourLabels.astype(str) == self.labels.astype(str)[:, None]
+        return float(np.mean(same[self.known]))
+
+    def meanAbsoluteError(self, weighted=True):
+        """Mean absolute error of the (similarity weighted) mean of the neighbours' numeric labels."""
+        import numpy as np
+        values = np.array([[float(v) if ok else 0.0 for v, ok in zip(row, mask)]
+                           for row, mask in zip(self.neighbourLabels, self.voting)]).reshape(self.similarities.shape)
+        weights = self._weights(weighted)
+        total = weights.sum(axis=1)
+        rows = self.known & (total > 0)
+        predicted = (values * weights).sum(axis=1)[rows] / total[rows]
+        truth = np.array([float(v) for v in self.labels[rows]])
+        return float(np.mean(np.abs(predicted - truth)))
+
+    def isNumeric(self):
+        try:
+            [float(v) for v in self.labels[self.known]]
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    def metrics(self, weighted=True):
+        """kNN accuracy and precision@k, and the MAE if the labels are numeric.
+
+        :rtype: dict
+        """
+        metrics = {"queries": int(self.known.sum()), "k": self.similarities.shape[1],
+                   "accuracy": self.accuracy(weighted), "precisionAtK": self.precisionAtK()}
+        if self.isNumeric():
+            metrics["meanAbsoluteError"] = self.meanAbsoluteError(weighted)
+        return metrics
+
+
+class Evaluation():
+    """Leave-one-out and k-fold evaluation of an amalgamation function.
+
+    Leave-one-out retrieves the k + 1 nearest cases of every case in
+    batches and drops the query itself. For k-fold cross-validation the
+    training cases of each fold are registered as an ephemeral casebase
+    (a caseID set, or sent along with every batch if the server does not
+    support them) and the queries of all folds are retrieved concurrently
+    in batches.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param concept: name of the concept
+    :param casebase: name of the casebase
+    :param amalgamationFunction: name of the amalgamation function
+    :param target: attribute holding the label or value to predict
+    :param k: number of neighbours
+    :param batchsize: query cases per retrieval call
+    :param workers: number of concurrent retrieval calls
+    """
+
+    def __init__(self, host, concept, casebase, amalgamationFunction, target, k=5, batchsize=200, workers=8):
+        self.host = host
+        self.concept = concept
+        self.casebase = casebase
+        self.amalgamationFunction = amalgamationFunction
+        self.target = target
+        self.k = k
+        self.batchsize = batchsize
+        self.workers = workers
+        self.cases = None
+
+    def _labels(self):
+        if self.cases is None:
+            cases = getFingerprint(self.host, self.concept, self.casebase).refresh()
+            self.cases = {case["caseID"]: case.get(self.target) for case in cases}
+        return self.cases
+
+    def _function(self, ephemeral=False):
+        api = getRequest(self.host)
+        if ephemeral:
+            api = api.ephemeral
+        return api.concepts(self.concept).casebases(self.casebase).amalgamationFunctions(self.amalgamationFunction)
+
+    def _retrieve(self, batch):
+        result = self._function().retrievalByMultipleCaseIDs.POST(params={"k": self.k + 1}, json=batch)
+        result.raise_for_status()
+        return result.json()
+
+    def _register(self, training):
+        """Register the training cases of a fold; returns the handle, or None if unsupported."""
+        result = getRequest(self.host).ephemeral.caseIDSets.POST(json=training)
+        if result.status_code == 404:
+            return None
+        result.raise_for_status()
+        return result.text.strip('"')
+
+    def _retrieveFold(self, batch, training, handle):
+        if handle is not None:
+            result = self._function(True).caseIDSets(handle).retrievalByCaseIDs.POST(params={"k": self.k}, json=batch)
+        else:
+            result = self._function(True).retrievalByCaseIDs\
+                         .POST(params={"k": self.k}, json={"queryCaseIDs": batch, "ephemeralCaseIDs": training})
+        result.raise_for_status()
+        return result.json()
+
+    def _run(self, jobs):
+        """Run (function, batch, *args) jobs on the thread pool and merge their results."""
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for part in pool.map(lambda job: job[0](*job[1:]), jobs):
+                results.update(part)
+        return results
+
+    def _result(self, queries, results):
+        labels = self._labels()
+        neighbourLabels, similarities = [], []
+        for caseID in queries:
+            ranked = sorted(((c, s) for c, s in results.get(caseID, {}).items() if c != caseID),
+                            key=lambda item: (-item[1], item[0]))[:self.k]
+            ranked += [(None, 0.0)] * (self.k - len(ranked))
+            neighbourLabels.append([labels.get(c) for c, s in ranked])
+            similarities.append([s for c, s in ranked])
+        return EvaluationResult(queries, [labels[c] for c in queries], neighbourLabels, similarities)
+
+    def _batches(self, caseIDs):
+        return [caseIDs[i:i + self.batchsize] for i in range(0, len(caseIDs), self.batchsize)]
+
+    def leaveOneOut(self):
+        """Evaluate every case against all other cases.
+
+        :rtype: EvaluationResult
+        """
+        queries = list(self._labels())
+        return self._result(queries, self._run([(self._retrieve, batch) for batch in self._batches(queries)]))
+
+    def crossValidate(self, folds=10, seed=0):
+        """k-fold cross-validation: every case is evaluated against the cases of the other folds.
+
+        :param folds: number of folds
+        :param seed: seed of the shuffle that assigns cases to folds
+        :rtype: EvaluationResult
+        """
+        parts = kFolds(self._labels(), folds, seed)
+        jobs = []
+        for i, part in enumerate(parts):
+            training = [caseID for j, other in enumerate(parts) if j != i for caseID in other]
+            handle = self._register(training)
+            jobs += [(self._retrieveFold, batch, training, handle) for batch in self._batches(part)]
+        queries = [caseID for part in parts for caseID in part]
+        return self._result(queries, self._run(jobs))
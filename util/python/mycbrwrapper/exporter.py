@@ -0,0 +1,128 @@
+from mycbrwrapper.rest import getRequest
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+
+ARROW_TYPES = {"DoubleDesc": "float64", "FloatDesc": "float32", "IntegerDesc": "int64"}
+UNKNOWN_VALUES = ["_unknown_", "_undefined_", ""]
+
+
+def caseBaseSchema(host, concept):
+    """Build the Arrow schema of a concept's cases from its attribute types.
+
+    Double/Float/Integer attributes get numeric columns, all other
+    attributes string columns. The first column is "caseID".
+
+    :rtype: pyarrow.Schema
+    """
+    import pyarrow as pa
+    api = getRequest(host)
+    attributes = api.concepts(concept).attributes.GET().json()
+    fields = [pa.field("caseID", pa.string(), nullable=False)]
+    for name in sorted(attributes):
+        fields.append(pa.field(name, pa.type_for_alias(ARROW_TYPES.get(attributes[name], "string"))))
+    return pa.schema(fields)
+
+
+class CaseBaseExporter():
+    """Snapshot a casebase to a Parquet or Arrow IPC file in constant memory.
+
+    Cases are fetched page by page (offset/limit on the casebase cases
+    endpoint) and each page is written as one row group. The next page is
+    fetched while the current one is converted and written.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param concept: name of the concept
+    :param casebase: name of the casebase
+    :param path: output file name
+    :param pagesize: number of cases per page and row group
+    :param fileformat: "parquet" or "arrow"; guessed from the suffix if None
+    """
+
+    def __init__(self, host, concept, casebase, path, pagesize=5000, fileformat=None, compression="snappy"):
+        self.host = host
+        self.concept = concept
+        self.casebase = casebase
+        self.path = path
+        self.pagesize = pagesize
+        if fileformat is None:
+            fileformat = "arrow" if path.endswith((".arrow", ".feather", ".ipc")) else "parquet"
+        self.fileformat = fileformat
+        self.compression = compression
+        self.stats = {"rows": 0, "seconds": 0.0, "rowsPerSecond": 0.0}
+
+    def page(self, offset):
+        api = getRequest(self.host)
+        result = api.concepts(self.concept).casebases(self.casebase).cases\
+                    .GET(params={"offset": offset, "limit": self.pagesize})
+        result.raise_for_status()
+        return result.json()
+
+    def toTable(self, cases, schema):
+        """Convert one page of cases (list of dicts of strings) to an Arrow table."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        unknown = pa.array(UNKNOWN_VALUES)
+        columns = []
+        for field in schema:
+            column = pa.array([case.get(field.name) for case in cases], pa.string())
+            if field.type != pa.string():
+                column = pc.if_else(pc.is_in(column, value_set=unknown),
+                                    pa.scalar(None, pa.string()), column).cast(field.type)
+            columns.append(column)
+        return pa.Table.from_arrays(columns, schema=schema)
+
+    def _writer(self, schema):
+        import pyarrow as pa
+        if self.fileformat == "arrow":
+            return pa.ipc.new_file(self.path, schema)
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self.path, schema, compression=self.compression)
+
+    def run(self):
+        """Write the casebase to `path`.
+
+        :returns: dict with "rows", "seconds" and "rowsPerSecond"
+        """
+        start = time.perf_counter()
+        schema = caseBaseSchema(self.host, self.concept)
+        rows = 0
+        writer = self._writer(schema)
+        try:
+            with ThreadPoolExecutor(max_workers=1) as prefetch:
+                future = prefetch.submit(self.page, 0)
+                while True:
+                    cases = future.result()
+                    if len(cases) == self.pagesize:
+                        future = prefetch.submit(self.page, rows + len(cases))
+                    if cases:
+                        table = self.toTable(cases, schema)
+                        if self.fileformat == "arrow":
+                            writer.write_table(table)
+                        else:
+                            writer.write_table(table, row_group_size=len(cases))
+                        rows += len(cases)
+                    if len(cases) < self.pagesize:
+                        break
+        finally:
+            writer.close()
+        seconds = time.perf_counter() - start
+        self.stats = {"rows": rows, "seconds": seconds,
+                      "rowsPerSecond": rows / seconds if seconds > 0 else 0.0}
+        return self.stats
+
+
+def exportCaseBases(host, concept, casebases, directory, workers=4, fileformat="parquet", **kwargs):
+    """Export several casebases concurrently, one file per casebase.
+
+    :param casebases: list of casebase names
+    :param directory: output directory; files are named <casebase>.parquet or .arrow
+    :returns: dict of casebase name to the exporter's stats
+    """
+    suffix = ".arrow" if fileformat == "arrow" else ".parquet"
+    exporters = [CaseBaseExporter(host, concept, cb, os.path.join(directory, cb + suffix),
+                                  fileformat=fileformat, **kwargs)
+                 for cb in casebases]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda e: e.run(), exporters)
+        return dict(zip(casebases, results))
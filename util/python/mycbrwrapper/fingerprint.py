@@ -0,0 +1,149 @@
+from mycbrwrapper.rest import getRequest
+import hashlib
+import json
+import threading
+
+_MASK = (1 << 64) - 1
+_IGNORED = ("caseID", "similarity")
+
+
+def caseDigest(caseID, content=None):
+    """Compute the 64 bit digest of one case.
+
+    Attribute values are compared as strings, the way the REST server
+    returns them, so a digest computed from locally written case data
+    matches one computed from the server's case listing.
+
+    :param caseID: ID of the case
+    :param content: dict (or JSON object string) of attribute name to
+        value (optional)
+    :returns: the digest
+    :rtype: int
+    """
+    if isinstance(content, str):
+        content = json.loads(content)
+    items = []
+    if content:
+        items = sorted((str(k), str(v)) for k, v in content.items() if k not in _IGNORED)
+    raw = json.dumps([str(caseID), items])
+    return int.from_bytes(hashlib.blake2b(raw.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class CaseBaseFingerprint():
+    """Version fingerprint of a casebase.
+
+    The fingerprint combines the number of cases with the sum of their
+    digests. The sum is independent of case order and can be updated in
+    O(1) when a single case is added, replaced or removed, so writes done
+    through mycbrwrapper keep it current without a round trip. The
+    server's ETag of the case listing is kept alongside for revalidation.
+    """
+
+    def __init__(self, host, concept, casebase):
+        self.host = host
+        self.concept = concept
+        self.casebase = casebase
+        self.digests = {}
+        self.digest = 0
+        self.etag = None
+        self.lock = threading.Lock()
+
+    def value(self):
+        """The fingerprint as a string, e.g. for use as a cache key."""
+        with self.lock:
+            return "{}-{:016x}".format(len(self.digests), self.digest)
+
+    __str__ = value
+
+    def caseAdded(self, caseID, content=None):
+        """Record that case `caseID` was created or overwritten."""
+        d = caseDigest(caseID, content)
+        with self.lock:
+            old = self.digests.get(caseID, 0)
+            self.digests[caseID] = d
+            self.digest = (self.digest - old + d) & _MASK
+            self.etag = None
+
+    def caseRemoved(self, caseID):
+        """Record that case `caseID` was deleted."""
+        with self.lock:
+            old = self.digests.pop(caseID, None)
+            if old is not None:
+                self.digest = (self.digest - old) & _MASK
+            self.etag = None
+
+    def cleared(self):
+        """Record that all cases of the casebase were deleted."""
+        with self.lock:
+            self.digests = {}
+            self.digest = 0
+            self.etag = None
+
+    def _call(self):
+        api = getRequest(self.host)
+        return api.concepts(self.concept).casebases(self.casebase).cases
+
+    def load(self, cases, etag=None):
+        """Recompute the fingerprint from a case listing (list of dicts with "caseID")."""
+        digests = {}
+        digest = 0
+        for case in cases:
+            d = caseDigest(case["caseID"], case)
+            digests[case["caseID"]] = d
+            digest = (digest + d) & _MASK
+        with self.lock:
+            self.digests = digests
+            self.digest = digest
+            self.etag = etag
+
+    def refresh(self):
+        """Fetch the case listing and recompute the fingerprint from it.
+
+        :returns: the case listing
+        :rtype: list of dict
+        """
+        result = self._call().GET()
+        cases = result.json()
+        self.load(cases, result.headers.get("ETag"))
+        return cases
+
+    def revalidate(self):
+        """Check with the server whether the casebase changed.
+
+        This is a conditional GET: while the ETag matches the server
+        answers 304 without a body. Without a known ETag (e.g. after a
+        local write) the listing is fetched once to obtain one.
+
+        :returns: True if the fingerprint was still current
+        :rtype: bool
+        """
+        before = self.value()
+        if self.etag is not None:
+            result = self._call().GET(headers={"If-None-Match": self.etag})
+            if result.status_code == 304:
+                return True
+            self.load(result.json(), result.headers.get("ETag"))
+        else:
+            self.refresh()
+        return self.value() == before
+
+
+_fingerprints = {}
+_fingerprintsLock = threading.Lock()
+
+
+def getFingerprint(host, concept, casebase):
+    """Return the shared fingerprint tracker of a casebase, creating it if needed.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param concept: name of the concept
+    :param casebase: name of the casebase
+    :rtype: CaseBaseFingerprint
+    """
+    key = (host, concept, casebase)
+    with _fingerprintsLock:
+        fp = _fingerprints.get(key)
+        if fp is None:
+            fp = CaseBaseFingerprint(host, concept, casebase)
+            _fingerprints[key] = fp
+        return fp
@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from collections import deque
+import threading
+import time
+
+
+class Hedger():
+    """Hedged requests: if a read has not answered after the p95 latency (by
+    default) of recent reads, send a duplicate to another replica (or over
+    another connection) and take whichever answers first.
+
+    Hedges are capped at `budget` times the number of requests, so a slow
+    server never sees more than (1 + budget) times its normal load. No
+    hedges are sent until `warmup` latencies have been observed.
+
+    :param quantile: latency quantile after which a hedge is sent
+    :param budget: maximum ratio of hedges to requests
+    :param minDelay: lower bound of the hedge delay in seconds
+    :param window: number of recent latencies the quantile is computed over
+    :param warmup: latencies needed before hedging starts
+    :param workers: size of the thread pool the requests run on
+    """
+
+    def __init__(self, quantile=0.95, budget=0.05, minDelay=0.005, window=1000, warmup=20, workers=32):
+        self.quantile = quantile
+        self.budget = budget
+        self.minDelay = minDelay
+        self.warmup = warmup
+        self.latencies = deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.requests = 0
+        self.hedges = 0
+        self.hedgeWins = 0
+
+    def delay(self):
+        """Current hedge delay in seconds, or None while warming up."""
+        with self.lock:
+            if len(self.latencies) < self.warmup:
+                return None
+            ordered = sorted(self.latencies)
+        return max(self.minDelay, ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))])
+
+    def _record(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+
+    def _mayHedge(self):
+        with self.lock:
+            return self.hedges + 1 <= self.budget * self.requests
+
+    def call(self, send, targets, succeeded=None):
+        """Run send(target) for targets[0] and, if it is slow, for targets[1].
+
+        :param send: function doing the request against one target
+        :param targets: list of targets, e.g. base URLs of replicas; with one
+            target the hedge goes to the same target
+        :param succeeded: predicate on a result, e.g. lambda response: response.ok;
+            a result it rejects does not win over a call still running
+        :returns: the result of the first call to succeed; if none does, the
+            first rejected result
+        :raises: the exception of the last call to fail, if both raise
+        """
+        if succeeded is None:
+            succeeded = lambda result: True
+
+        def ok(future):
+            return future.exception() is None and succeeded(future.result())
+
+        start = time.monotonic()
+        with self.lock:
+            self.requests += 1
+        delay = self.delay()
+        primary = self.pool.submit(send, targets[0])
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._mayHedge():
+            result = primary.result()
+            if succeeded(result):
+                self._record(time.monotonic() - start)
+            return result
+        hedge = self.pool.submit(send, targets[1 % len(targets)])
+        with self.lock:
+            self.hedges += 1
+
+        # the estimate only sees the primary's own successful latency, even if
+        # it finishes after the hedge has answered: recording the winner's time
+        # would hide the tail and make the delay shrink with every hedge
+        def recordPrimary(future):
+            if ok(future):
+                self._record(time.monotonic() - start)
+        primary.add_done_callback(recordPrimary)
+        pending = {primary, hedge}
+        rejected = []
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: f is hedge):
+                if ok(future):
+                    if future is hedge:
+                        with self.lock:
+                            self.hedgeWins += 1
+                    return future.result()
+                if future.exception() is None:
+                    rejected.append(future.result())
+                else:
+                    error = future.exception()
+        if rejected:
+            return rejected[0]
+        raise error
+
+    def metrics(self):
+        """Counters and the current delay, e.g. for a metrics endpoint."""
+        delay = self.delay()
+        with self.lock:
+            return {"requests": self.requests, "hedges": self.hedges, "hedgeWins": self.hedgeWins,
+                    "hedgeRate": self.hedges / float(self.requests or 1), "delay": delay}
+
+    def close(self):
+        self.pool.shutdown(wait=False)
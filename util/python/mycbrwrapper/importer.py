@@ -0,0 +1,238 @@
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.concepts import Concept
+from mycbrwrapper.fingerprint import getFingerprint
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import json
+import time
+
+UNKNOWN_VALUES = ("", "_unknown_", "NA", "NaN", "nan", "None", "null")
+
+
+def readChunks(path, chunksize=10000, fileformat=None):
+    """Read a CSV or Parquet file as a stream of row chunks.
+
+    Only one chunk is held in memory at a time. Parquet support needs
+    pyarrow.
+
+    :param path: file name (.csv or .parquet)
+    :param chunksize: number of rows per chunk
+    :param fileformat: "csv" or "parquet"; guessed from the suffix if None
+    :returns: generator of lists of dicts (column name to value)
+    """
+    if fileformat is None:
+        fileformat = "parquet" if path.endswith((".parquet", ".pq")) else "csv"
+    if fileformat == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pylist()
+        return
+    with open(path, newline="") as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.append(row)
+            if len(chunk) >= chunksize:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _integer(value):
+    """The integer literal of a whole number, e.g. "2" for 2, 2.0, "2.0" or "2"."""
+    if isinstance(value, int):
+        return str(value)
+    try:
+        return str(int(str(value)))
+    except ValueError:
+        return str(int(float(value)))
+
+
+class _ColumnStats():
+    """Running type inference state of one column."""
+
+    def __init__(self, maxSymbols):
+        self.maxSymbols = maxSymbols
+        self.isInteger = True
+        self.isNumber = True
+        self.min = None
+        self.max = None
+        self.symbols = set()
+        self.tooManySymbols = False
+
+    def add(self, value):
+        if value is None or str(value) in UNKNOWN_VALUES:
+            return
+        if isinstance(value, bool):
+            # float(True) is 1.0, but the server could not parse "True" as a number
+            self.isNumber = False
+            self.isInteger = False
+        if self.isNumber:
+            try:
+                number = float(value)
+                if self.isInteger and not float(number).is_integer():
+                    self.isInteger = False
+                self.min = number if self.min is None else min(self.min, number)
+                self.max = number if self.max is None else max(self.max, number)
+            except (TypeError, ValueError):
+                self.isNumber = False
+                self.isInteger = False
+        if not self.tooManySymbols:
+            self.symbols.add(str(value))
+            if len(self.symbols) > self.maxSymbols:
+                # past this point the column is free text; stop growing the set
+                self.tooManySymbols = True
+                self.symbols = set()
+
+    def description(self):
+        """The attributeJSON description of the column."""
+        if self.isNumber and self.min is not None:
+            if self.isInteger:
+                return {"type": "Integer", "min": int(self.min), "max": int(self.max), "solution": "False"}
+            return {"type": "Double", "min": float(self.min), "max": float(self.max), "solution": "False"}
+        if self.tooManySymbols:
+            return {"type": "String", "solution": "False"}
+        return {"type": "Symbol", "allowedValues": sorted(self.symbols), "solution": "False"}
+
+
+def inferAttributes(path, chunksize=10000, fileformat=None, maxSymbols=1000, idColumn=None):
+    """Infer attribute descriptions from a CSV or Parquet file in one streaming pass.
+
+    Columns whose values all are whole numbers (also "2.0" or a float
+    column with NaNs) become Integer attributes, other numeric columns
+    Double attributes, both with the observed
+    min/max. The remaining columns become Symbol attributes over their
+    distinct values, or String attributes when there are more than
+    `maxSymbols` of them.
+
+    :returns: dict of attribute name to attributeJSON description (dict)
+    """
+    stats = {}
+    for chunk in readChunks(path, chunksize, fileformat):
+        for row in chunk:
+            for name, value in row.items():
+                if name == idColumn:
+                    continue
+                column = stats.get(name)
+                if column is None:
+                    column = stats[name] = _ColumnStats(maxSymbols)
+                column.add(value)
+    return {name: column.description() for name, column in stats.items()}
+
+
+class CaseBaseImporter():
+    """Create a concept, its attributes and a casebase from a CSV/Parquet file
+    and upload the rows as cases.
+
+    Rows are read in chunks and uploaded in batches by a pool of worker
+    threads. At most `workers * 2` batches are in flight, so memory stays
+    bounded by the chunk size regardless of the file size. Cases are sent
+    straight to the bulk endpoint instead of through Instances.addInstances,
+    which keeps an Instance object per case in memory.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param concept: name of the concept to create
+    :param casebase: name of the casebase to create
+    :param path: the CSV or Parquet file
+    :param idColumn: column holding the case IDs; the server numbers the
+        cases if None
+    :param progress: optional callable receiving the stats dict after every
+        uploaded batch
+    :param limiter: optional mycbrwrapper.limiter.AdaptiveLimiter; the
+        number of batches in flight then adapts to the server, up to
+        `workers`
+    """
+
+    def __init__(self, host, concept, casebase, path, chunksize=10000, batchsize=1000,
+                 workers=4, fileformat=None, maxSymbols=1000, idColumn=None, progress=None, limiter=None):
+        self.host = host
+        self.conceptName = concept
+        self.casebaseName = casebase
+        self.path = path
+        self.chunksize = chunksize
+        self.batchsize = batchsize
+        self.workers = workers
+        self.fileformat = fileformat
+        self.maxSymbols = maxSymbols
+        self.idColumn = idColumn
+        self.progress = progress
+        self.limiter = limiter
+        self.attributes = None
+        self.concept = None
+        self.stats = {"rows": 0, "seconds": 0.0, "rowsPerSecond": 0.0}
+
+    def infer(self):
+        self.attributes = inferAttributes(self.path, self.chunksize, self.fileformat,
+                                          self.maxSymbols, self.idColumn)
+        return self.attributes
+
+    def createModel(self):
+        """Create concept, attributes and casebase through the wrapper classes."""
+        if self.attributes is None:
+            self.infer()
+        self.concept = Concept(self.host, self.conceptName)
+        for name, description in self.attributes.items():
+            self.concept.addAttribute(name, json.dumps(description))
+        self.concept.addCaseBase(self.casebaseName)
+        return self.concept
+
+    def _toCase(self, row, integers=()):
+        case = {}
+        for name, value in row.items():
+            if value is None or str(value) in UNKNOWN_VALUES:
+                continue
+            if name == self.idColumn:
+                case["caseID"] = str(value)
+            elif name in integers:
+                # the server parses Integer values with Integer.parseInt, which rejects "2.0"
+                case[name] = _integer(value)
+            else:
+                case[name] = str(value)
+        return case
+
+    def _upload(self, cases):
+        api = getRequest(self.host)
+        post = lambda: api.concepts(self.conceptName).casebases(self.casebaseName).cases\
+                          .POST(json={"cases": cases})
+        result = post() if self.limiter is None else self.limiter.call(post)
+        result.raise_for_status()
+        fingerprint = getFingerprint(self.host, self.conceptName, self.casebaseName)
+        for caseID, case in zip(result.json(), cases):
+            fingerprint.caseAdded(caseID, case)
+        return len(cases)
+
+    def upload(self):
+        """Stream all rows to the casebase.
+
+        :returns: dict with "rows", "seconds" and "rowsPerSecond"
+        """
+        start = time.perf_counter()
+        rows = 0
+        pending = []
+        integers = {name for name, description in (self.attributes or {}).items()
+                    if description["type"] == "Integer"}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for chunk in readChunks(self.path, self.chunksize, self.fileformat):
+                for i in range(0, len(chunk), self.batchsize):
+                    batch = [self._toCase(row, integers) for row in chunk[i:i + self.batchsize]]
+                    pending.append(pool.submit(self._upload, batch))
+                    while len(pending) >= self.workers * 2:
+                        rows += pending.pop(0).result()
+                        self._report(rows, start)
+            for future in pending:
+                rows += future.result()
+                self._report(rows, start)
+        self._report(rows, start)
+        return self.stats
+
+    def _report(self, rows, start):
+        seconds = time.perf_counter() - start
+        self.stats = {"rows": rows, "seconds": seconds,
+                      "rowsPerSecond": rows / seconds if seconds > 0 else 0.0}
+        if self.progress is not None:
+            self.progress(self.stats)
+
+    def run(self):
+        """Infer the attributes, create the model and upload all cases."""
+        self.createModel()
+        return self.upload()
@@ -1,4 +1,5 @@
 from mycbrwrapper.rest import *
+from mycbrwrapper.fingerprint import getFingerprint
 import json
 
 __name__ = "instances"
@@ -15,8 +16,26 @@ class Instance():
         
 
     def createInstance(self, instance_parameters):
+        """Add the case to the casebase; returns False if the server did not add it."""
+        if isinstance(instance_parameters, str):
+            instance_parameters = json.loads(instance_parameters)
         api = getRequest(self.host)
-        result = api.concepts(self.concept.name).casebases(self.casebase).instances(self.instanceid).PUT(params={'casedata':instance_parameters})
+        result = api.concepts(self.concept.name).casebases(self.casebase).cases(self.instanceid).PUT(json=instance_parameters)
+        result.raise_for_status()
+        added = result.json() is True
+        if added:
+            getFingerprint(self.host, self.concept.name, self.casebase).caseAdded(self.instanceid, instance_parameters)
+        return added
+
+    def delete(self):
+        """Delete the case from the casebase; returns False if the server did not delete it."""
+        api = getRequest(self.host)
+        result = api.concepts(self.concept.name).casebases(self.casebase).cases(self.instanceid).DELETE()
+        result.raise_for_status()
+        deleted = result.json() is True
+        if deleted:
+            getFingerprint(self.host, self.concept.name, self.casebase).caseRemoved(self.instanceid)
+        return deleted
 
 class Instances():
     def __init__(self, concept, host):
@@ -32,19 +51,28 @@ class Instances():
         return i
 
     def addInstances(self, case_data_json, casebase):
+        if isinstance(case_data_json, str):
+            case_data_json = json.loads(case_data_json)
         api = getRequest(self.host)
-        result = api.concepts(self.concept.name).casebases(casebase).instances.POST(params={'cases':json.dumps(case_data_json)})
+        result = api.concepts(self.concept.name).casebases(casebase).cases.POST(json=case_data_json)
+        result.raise_for_status()
+        fingerprint = getFingerprint(self.host, self.concept.name, casebase)
         for reskey,dataval in zip(result.json(),case_data_json["cases"]):
             self.instances[reskey] = Instance(self.concept,reskey,self.host,casebase,dataval,get=True)
+            fingerprint.caseAdded(reskey, dataval)
 
     def items(self):
         return self.instances.items()
 
+    def fingerprint(self, casebase):
+        return getFingerprint(self.host, self.concept.name, casebase)
+
     def instanceList(self):
         return list(self.instances.values())
 
     def deleteInstances(self,casebase):
-        for key in self.instances:
+        for key in [k for k, i in self.instances.items() if i.casebase == casebase]:
             self.instances.pop(key)
         api = getRequest(self.host)
-        api.concepts(self.concept.name).casebases(casebase).instances.DELETE()
+        api.concepts(self.concept.name).casebases(casebase).cases.DELETE()
+        getFingerprint(self.host, self.concept.name, casebase).cleared()
@@ -0,0 +1,236 @@
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.fingerprint import getFingerprint
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+
+META = "caseIDs.json"
+NEIGHBOURS = "neighbours.npy"
+SIMILARITIES = "similarities.npy"
+
+
+class KNNTable():
+    """Materialized k-nearest-neighbour table of a casebase.
+
+    The table lives in a directory: caseIDs.json maps rows to caseIDs,
+    neighbours.npy holds an int32 matrix of neighbour rows (-1 where a row
+    has fewer than k neighbours) and similarities.npy the float16
+    similarities, both memory-mapped. A case never counts as its own
+    neighbour. Rows of removed cases are reused for added ones.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param concept: name of the concept
+    :param casebase: name of the casebase
+    :param amalgamationFunction: name of the amalgamation function
+    :param path: directory of the table
+    :param k: number of neighbours per case
+    :param batchsize: query cases per retrieval call
+    :param workers: number of concurrent retrieval calls
+    """
+
+    def __init__(self, host, concept, casebase, amalgamationFunction, path, k=10, batchsize=100, workers=4):
+        self.host = host
+        self.concept = concept
+        self.casebase = casebase
+        self.amalgamationFunction = amalgamationFunction
+        self.path = path
+        self.k = k
+        self.batchsize = batchsize
+        self.workers = workers
+        self.caseIDs = []
+        self.rows = {}
+        self.neighbourRows = None
+        self.similarities = None
+        self.fingerprint = None
+
+    # ---- storage
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _allocate(self, capacity):
+        """(Re)create the matrices with room for `capacity` rows, keeping the current rows."""
+        import numpy as np
+        old = (self.neighbourRows, self.similarities)
+        neighbourRows = np.lib.format.open_memmap(self._file(NEIGHBOURS + ".tmp"), mode="w+",
+                                                  dtype=np.int32, shape=(capacity, self.k))
+        similarities = np.lib.format.open_memmap(self._file(SIMILARITIES + ".tmp"), mode="w+",
+                                                 dtype=np.float16, shape=(capacity, self.k))
+        neighbourRows[:] = -1
+        similarities[:] = 0
+        if old[0] is not None:
+            neighbourRows[:len(old[0])] = old[0]
+            similarities[:len(old[1])] = old[1]
+        del old
+        self.neighbourRows, self.similarities = None, None
+        neighbourRows.flush()
+        similarities.flush()
+        os.replace(self._file(NEIGHBOURS + ".tmp"), self._file(NEIGHBOURS))
+        os.replace(self._file(SIMILARITIES + ".tmp"), self._file(SIMILARITIES))
+        self.neighbourRows, self.similarities = neighbourRows, similarities
+
+    def save(self):
+        """Flush the matrices and write caseIDs.json."""
+        self.neighbourRows.flush()
+        self.similarities.flush()
+        meta = {"concept": self.concept, "casebase": self.casebase,
+                "amalgamationFunction": self.amalgamationFunction, "k": self.k,
+                "fingerprint": self.fingerprint, "caseIDs": self.caseIDs}
+        with open(self._file(META + ".tmp"), "w") as f:
+            json.dump(meta, f)
+        os.replace(self._file(META + ".tmp"), self._file(META))
+
+    def load(self):
+        """Open an existing table.
+
+        :returns: self
+        """
+        import numpy as np
+        with open(self._file(META)) as f:
+            meta = json.load(f)
+        self.k = meta["k"]
+        self.fingerprint = meta["fingerprint"]
+        self.caseIDs = meta["caseIDs"]
+        self.rows = {caseID: row for row, caseID in enumerate(self.caseIDs) if caseID is not None}
+        self.neighbourRows = np.load(self._file(NEIGHBOURS), mmap_mode="r+")
+        self.similarities = np.load(self._file(SIMILARITIES), mmap_mode="r+")
+        return self
+
+    # ---- scoring
+
+    def _ephemeral(self):
+        return getRequest(self.host).ephemeral.concepts(self.concept).casebases(self.casebase)\
+                                    .amalgamationFunctions(self.amalgamationFunction)
+
+    def _retrieve(self, batch):
+        api = getRequest(self.host)
+        result = api.concepts(self.concept).casebases(self.casebase)\
+                    .amalgamationFunctions(self.amalgamationFunction).retrievalByMultipleCaseIDs\
+                    .POST(params={"k": self.k + 1}, json=batch)
+        result.raise_for_status()
+        return result.json()
+
+    def _scoreAgainst(self, batch, candidates):
+        result = self._ephemeral().retrievalByCaseIDs\
+                     .POST(params={"k": -1}, json={"queryCaseIDs": batch, "ephemeralCaseIDs": candidates})
+        result.raise_for_status()
+        return result.json()
+
+    def _batched(self, fn, caseIDs, *args):
+        batches = [caseIDs[i:i + self.batchsize] for i in range(0, len(caseIDs), self.batchsize)]
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for part in pool.map(lambda batch: fn(batch, *args), batches):
+                results.update(part)
+        return results
+
+    def _setRow(self, caseID, scored):
+        """Store the top-k of `scored` (list of (caseID, similarity)) as the neighbours of `caseID`."""
+        row = self.rows[caseID]
+        ranked = sorted(((c, s) for c, s in scored if c != caseID and c in self.rows),
+                        key=lambda item: (-item[1], item[0]))[:self.k]
+        self.neighbourRows[row] = -1
+        self.similarities[row] = 0
+        for i, (c, s) in enumerate(ranked):
+            self.neighbourRows[row, i] = self.rows[c]
+            self.similarities[row, i] = s
+
+    def _row(self, caseID):
+        row = self.rows[caseID]
+        return [(self.caseIDs[r], float(s)) for r, s in zip(self.neighbourRows[row], self.similarities[row]) if r >= 0]
+
+    def _recompute(self, caseIDs):
+        for caseID, scored in self._batched(self._retrieve, list(caseIDs)).items():
+            self._setRow(caseID, scored.items())
+
+    # ---- public API
+
+    def build(self):
+        """Compute the neighbours of every case (N queries in batches) and write the table.
+
+        :returns: self
+        """
+        os.makedirs(self.path, exist_ok=True)
+        fingerprint = getFingerprint(self.host, self.concept, self.casebase)
+        self.caseIDs = [case["caseID"] for case in fingerprint.refresh()]
+        self.rows = {caseID: row for row, caseID in enumerate(self.caseIDs)}
+        self.neighbourRows, self.similarities = None, None
+        self._allocate(max(len(self.caseIDs), 1))
+        self._recompute(self.caseIDs)
+        self.fingerprint = fingerprint.value()
+        self.save()
+        return self
+
+    def neighbours(self, caseID):
+        """The stored neighbours of a case, most similar first.
+
+        :rtype: list of (caseID, similarity)
+        """
+        return self._row(caseID)
+
+    def update(self, added=(), changed=(), removed=()):
+        """Patch the table after cases were added, changed or removed.
+
+        Only the new and changed cases are scored: their own neighbours are
+        retrieved (M queries) and every other case is scored against them
+        with one ephemeral retrieval (N x M). Neighbour lists that lost an
+        entry and cannot be completed from the known similarities are
+        retrieved again.
+
+        :param added: caseIDs of new cases
+        :param changed: caseIDs of cases whose content changed
+        :param removed: caseIDs of deleted cases
+        :returns: number of neighbour lists that changed
+        """
+        import numpy as np
+        removed = [c for c in removed if c in self.rows]
+        added = list(dict.fromkeys(c for c in added if c not in self.rows))
+        changed = [c for c in changed if c in self.rows]
+        stale = {self.rows[c] for c in removed + changed}
+        old = {}
+        staleRows = np.flatnonzero(np.isin(self.neighbourRows, list(stale)).any(axis=1)) if stale else []
+        for row in staleRows:
+            if self.caseIDs[row] is not None:
+                old[self.caseIDs[row]] = (self._row(self.caseIDs[row]), float(self.similarities[row, self.k - 1]),
+                                          self.neighbourRows[row, self.k - 1] >= 0)
+        for caseID in removed:
+            row = self.rows.pop(caseID)
+            self.caseIDs[row] = None
+            self.neighbourRows[row] = -1
+            self.similarities[row] = 0
+        free = [row for row, caseID in enumerate(self.caseIDs) if caseID is None]
+        for caseID in added:
+            if free:
+                row = free.pop(0)
+                self.caseIDs[row] = caseID
+            else:
+                row = len(self.caseIDs)
+                self.caseIDs.append(caseID)
+            self.rows[caseID] = row
+        if len(self.caseIDs) > len(self.neighbourRows):
+            self._allocate(max(len(self.caseIDs), 2 * len(self.neighbourRows)))
+
+        fresh = added + changed
+        base = [c for c in self.rows if c not in fresh]
+        updated = set(fresh)
+        if fresh:
+            self._recompute(fresh)
+        scores = self._batched(self._scoreAgainst, base, fresh) if fresh and base else {}
+        incomplete = []
+        dropped = set(removed) | set(changed)
+        for caseID in base:
+            current, kth, full = old.get(caseID, (self._row(caseID), None, False))
+            known = [(c, s) for c, s in current if c not in dropped]
+            lost = len(known) < len(current)
+            merged = sorted(known + list(scores.get(caseID, {}).items()), key=lambda item: -item[1])[:self.k]
+            if lost and full and (len(merged) < self.k or merged[-1][1] < kth):
+                incomplete.append(caseID)
+            elif merged != current:
+                self._setRow(caseID, merged)
+                updated.add(caseID)
+        if incomplete:
+            self._recompute(incomplete)
+            updated.update(incomplete)
+        self.fingerprint = getFingerprint(self.host, self.concept, self.casebase).value()
+        self.save()
+        return len(updated)
@@ -0,0 +1,145 @@
+from collections import deque
+import re
+import threading
+import time
+
+import requests
+
+ENDPOINT_CLASSES = ("ingest", "retrieval", "selfSimilarity")
+
+# exceptions raised when the client gave up (a timeout, or a deadline that
+# shortened it): they say nothing about the server, so they leave the limit alone
+CLIENT_ERRORS = (requests.Timeout, TimeoutError)
+
+
+def endpointClass(method, url):
+    """Classify a REST call as "ingest", "retrieval", "selfSimilarity" or None (not limited)."""
+    if re.search(r"/computeSelfSimilarity\b", url):
+        return "selfSimilarity"
+    if re.search(r"/retrieval\w*", url):
+        return "retrieval"
+    if method in ("POST", "PUT") and re.search(r"/cases(/|\?|$)", url):
+        return "ingest"
+    return None
+
+
+def _overloaded(result):
+    return getattr(result, "status_code", 200) >= 500
+
+
+class AdaptiveLimiter():
+    """AIMD concurrency limit for one class of requests.
+
+    The limit grows by about one per round of `limit` requests that
+    complete in reasonable time (additive increase) and is multiplied by
+    `backoff` on a 5xx answer, an exception (refused or reset
+    connections) or a latency above `tolerance` times the lowest latency
+    recently seen plus `slack` seconds (multiplicative decrease). Client
+    side timeouts and deadlines (CLIENT_ERRORS) change neither.
+    Decreases are spaced by the latency of the failing request, so a burst
+    of failures from one overload episode only counts once. Threads wait
+    in acquire() while `limit` requests are in flight.
+
+    :param initial: starting limit
+    :param minimum: lowest limit
+    :param maximum: highest limit
+    :param backoff: factor applied to the limit on overload
+    :param tolerance: latency (relative to the recent minimum) treated as overload
+    :param slack: absolute latency margin in seconds, so jitter on very
+        fast requests is not taken for overload
+    :param window: number of recent latencies the minimum is taken over
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, backoff=0.7, tolerance=3.0, slack=0.005, window=200):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.slack = slack
+        self.latencies = deque(maxlen=window)
+        self.limitValue = float(initial)
+        self.inflight = 0
+        self.lastDecrease = 0.0
+        self.decreases = 0
+        self.condition = threading.Condition()
+
+    @property
+    def limit(self):
+        """The current limit (whole requests)."""
+        return max(self.minimum, int(self.limitValue))
+
+    def acquire(self):
+        with self.condition:
+            while self.inflight >= self.limit:
+                self.condition.wait()
+            self.inflight += 1
+
+    def release(self, latency, overloaded=False):
+        """Return a slot and adapt the limit to how the request went (not at all if latency is None)."""
+        now = time.monotonic()
+        with self.condition:
+            self.inflight -= 1
+            if latency is None:
+                self.condition.notify_all()
+                return
+            baseline = min(self.latencies) if self.latencies else latency
+            self.latencies.append(latency)
+            if overloaded or latency > self.tolerance * baseline + self.slack:
+                if now - self.lastDecrease > latency:
+                    self.limitValue = max(self.minimum, self.limitValue * self.backoff)
+                    self.lastDecrease = now
+                    self.decreases += 1
+            else:
+                self.limitValue = min(self.maximum, self.limitValue + 1.0 / self.limitValue)
+            self.condition.notify_all()
+
+    def call(self, fn, isOverload=_overloaded, clientErrors=CLIENT_ERRORS):
+        """Run fn() within the limit.
+
+        :param isOverload: tells from the result of fn whether the server
+            was overloaded (default: a 5xx status code)
+        :param clientErrors: exceptions of fn that do not count as overload
+        """
+        self.acquire()
+        start = time.monotonic()
+        try:
+            result = fn()
+        except clientErrors:
+            self.release(None)
+            raise
+        except Exception:
+            self.release(time.monotonic() - start, True)
+            raise
+        self.release(time.monotonic() - start, isOverload(result))
+        return result
+
+    def metrics(self):
+        with self.condition:
+            return {"limit": self.limit, "inflight": self.inflight, "decreases": self.decreases}
+
+
+class EndpointLimiters():
+    """One AdaptiveLimiter per endpoint class, shared by all threads of a client.
+
+    Calls outside the limited classes (model management, listings) pass
+    through unlimited.
+
+    :param limiterArgs: keyword arguments for each AdaptiveLimiter
+    """
+
+    def __init__(self, **limiterArgs):
+        self.limiters = {name: AdaptiveLimiter(**limiterArgs) for name in ENDPOINT_CLASSES}
+
+    def get(self, name):
+        return self.limiters[name]
+
+    def call(self, method, url, fn):
+        """Run fn(), the REST call `method url`, within the limit of its endpoint class."""
+        name = endpointClass(method, url)
+        if name is None:
+            return fn()
+        return self.limiters[name].call(fn)
+
+    def metrics(self):
+        """The current limit, in-flight count and number of decreases per endpoint class."""
+        return {name: limiter.metrics() for name, limiter in self.limiters.items()}
@@ -0,0 +1,214 @@
+from mycbrwrapper.recorder import readLog
+from concurrent.futures import ThreadPoolExecutor
+import json
+import random
+import threading
+import time
+
+import requests
+
+PERCENTILES = (50, 90, 99)
+
+
+def syntheticMix(host, concept, casebase, amalgamationFunction, count=1000, mix=None, k=10, seed=0):
+    """Entries (as in a recorded log) for a synthetic mix of reads on one casebase.
+
+    :param mix: dict of call name to share: "retrievalByCaseID",
+        "retrievalByMultipleAttributes", "retrievalByMultipleCaseIDs",
+        "case" and "cases" (default: mostly single retrievals)
+    :param k: number of cases retrieved per call
+    :rtype: list of dict
+    """
+    mix = mix or {"retrievalByCaseID": 0.6, "retrievalByMultipleAttributes": 0.25,
+                  "retrievalByMultipleCaseIDs": 0.1, "case": 0.05}
+    base = "/concepts/{}/casebases/{}".format(concept, casebase)
+    function = base + "/amalgamationFunctions/" + amalgamationFunction
+    result = requests.get("http://{}{}/cases".format(host, base))
+    result.raise_for_status()
+    cases = result.json()
+    rng = random.Random(seed)
+    names, shares = list(mix), list(mix.values())
+    entries = []
+    for name in rng.choices(names, shares, k=count):
+        case = rng.choice(cases)
+        if name == "retrievalByCaseID":
+            entry = {"m": "GET", "p": "{}/retrievalByCaseID?caseID={}&k={}".format(function, case["caseID"], k)}
+        elif name == "retrievalByMultipleAttributes":
+            query = {a: v for a, v in case.items() if a not in ("caseID", "similarity")}
+            entry = {"m": "POST", "p": "{}/retrievalByMultipleAttributes?k={}".format(function, k),
+                     "b": json.dumps(query)}
+        elif name == "retrievalByMultipleCaseIDs":
+            queries = [c["caseID"] for c in rng.sample(cases, min(10, len(cases)))]
+            entry = {"m": "POST", "p": "{}/retrievalByMultipleCaseIDs?k={}".format(function, k),
+                     "b": json.dumps(queries)}
+        elif name == "case":
+            entry = {"m": "GET", "p": "{}/cases/{}".format(base, case["caseID"])}
+        else:
+            entry = {"m": "GET", "p": base + "/cases"}
+        entries.append(entry)
+    return entries
+
+
+def percentile(ordered, p):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))]
+
+
+class LoadTest():
+    """Replay calls against a server and measure throughput and latency.
+
+    With `rate` the schedule is open-loop: call i is sent at i / rate
+    seconds whether or not earlier calls have completed, and its latency
+    is measured from that scheduled time, so a saturated server shows up
+    as growing latencies instead of a lower send rate. With `rate` None
+    the recorded offsets ("t", divided by `speed`) are the schedule. With
+    `concurrency`, or for entries without offsets, calls are sent back to
+    back by that many closed-loop workers (8 by default).
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param entries: list of dicts with "m", "p" and optionally "b" and "t"
+        (see mycbrwrapper.recorder)
+    :param rate: calls per second
+    :param concurrency: number of closed-loop workers
+    :param duration: seconds to run; the entries are cycled (default: one pass)
+    :param speed: replay speed of recorded offsets
+    :param interval: length in seconds of the report windows
+    :param workers: maximum number of calls in flight
+    :param timeout: timeout of each call in seconds
+    """
+
+    def __init__(self, host, entries, rate=None, concurrency=None, duration=None, speed=1.0, interval=1.0,
+                 workers=256, timeout=30):
+        self.host = host
+        self.entries = list(entries)
+        self.rate = rate
+        self.concurrency = concurrency
+        self.duration = duration
+        self.speed = speed
+        self.interval = interval
+        self.workers = workers
+        self.timeout = timeout
+        self.results = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @classmethod
+    def fromLog(cls, host, path, **args):
+        return cls(host, readLog(path), **args)
+
+    def _session(self):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+
+    def _send(self, entry, scheduled):
+        """Send one call; record (scheduled offset, latency, status or None on error, response size)."""
+        headers = {"Content-Type": "application/json"} if entry.get("b") else None
+        try:
+            response = self._session().request(entry["m"], "http://" + self.host + entry["p"],
+                                               data=entry.get("b"), headers=headers, timeout=self.timeout)
+            status, size = response.status_code, len(response.content)
+        except requests.RequestException:
+            status, size = None, 0
+        latency = time.monotonic() - self.start - scheduled
+        with self.lock:
+            self.results.append((scheduled, latency, status, size))
+
+    def _schedule(self):
+        """Yield (offset, entry) in send order."""
+        if not self.entries:
+            return
+        timed = self.rate is None
+        first = self.entries[0]["t"] if timed else 0.0
+        # a cycle lasts the recorded time plus one mean gap between calls
+        span = (self.entries[-1]["t"] - first) / self.speed * len(self.entries) / max(len(self.entries) - 1, 1) \
+            if timed else len(self.entries) / float(self.rate)
+        cycle = 0
+        while True:
+            for i, entry in enumerate(self.entries):
+                offset = (entry["t"] - first) / self.speed if timed else i / float(self.rate)
+                offset += cycle * span
+                if self.duration is not None and offset >= self.duration:
+                    return
+                yield offset, entry
+            if self.duration is None or span <= 0:
+                return
+            cycle += 1
+
+    def _closedLoop(self):
+        index = [0]
+        deadline = None if self.duration is None else self.start + self.duration
+
+        def worker():
+            while deadline is None or time.monotonic() < deadline:
+                with self.lock:
+                    i = index[0]
+                    index[0] += 1
+                if deadline is None and i >= len(self.entries):
+                    return
+                self._send(self.entries[i % len(self.entries)], time.monotonic() - self.start)
+        threads = [threading.Thread(target=worker) for _ in range(self.concurrency or 8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run(self):
+        """Run the test.
+
+        :returns: the report (see report())
+        """
+        self.results = []
+        self.start = time.monotonic()
+        if self.concurrency is not None or (self.rate is None and not all("t" in e for e in self.entries)):
+            self._closedLoop()
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for offset, entry in self._schedule():
+                    delay = self.start + offset - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pool.submit(self._send, entry, offset)
+        self.elapsed = time.monotonic() - self.start
+        return self.report()
+
+    def _summary(self, results, seconds):
+        latencies = sorted(r[1] * 1000 for r in results if r[2] is not None and r[2] < 500)
+        summary = {"calls": len(results), "errors": len(results) - len(latencies),
+                   "throughput": len(latencies) / seconds if seconds > 0 else 0.0,
+                   "bytes": sum(r[3] for r in results)}
+        for p in PERCENTILES:
+            summary["p{}".format(p)] = percentile(latencies, p)
+        return summary
+
+    def report(self):
+        """Throughput (successful calls per second) and latency percentiles in ms, overall and per window.
+
+        Calls are assigned to windows by their scheduled time.
+
+        :rtype: dict with "total" and "windows" (list of dicts with "start")
+        """
+        windows = {}
+        for result in self.results:
+            windows.setdefault(int(result[0] // self.interval), []).append(result)
+        report = {"total": self._summary(self.results, self.elapsed), "windows": []}
+        for index in sorted(windows):
+            window = self._summary(windows[index], self.interval)
+            window["start"] = index * self.interval
+            report["windows"].append(window)
+        return report
+
+
+def formatReport(report):
+    """The report as a text table."""
+    columns = ["start", "calls", "errors", "throughput"] + ["p{}".format(p) for p in PERCENTILES]
+    lines = ["{:>8} {:>7} {:>7} {:>11}".format(*columns[:4]) + "".join("{:>10}".format(c) for c in columns[4:])]
+    rows = report["windows"] + [dict(report["total"], start="total")]
+    for row in rows:
+        start = row["start"] if isinstance(row["start"], str) else "{:.1f}".format(row["start"])
+        cells = ["{:>10}".format("-" if row[c] is None else "{:.1f}".format(row[c])) for c in columns[4:]]
+        lines.append("{:>8} {:>7} {:>7} {:>11.1f}".format(start, row["calls"], row["errors"], row["throughput"])
+                     + "".join(cells))
+    return "\n".join(lines)
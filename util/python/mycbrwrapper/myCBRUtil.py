@@ -1,9 +1,4 @@
-from mycbrwrapper.rest import getRequest
+from mycbrwrapper.teardown import resetProject
 
 def clearMyCBR(host):
-    api = getRequest(host)
-    call = api.concepts
-    result = call.GET()
-    concepts = result.json().get("concept")
-    for elem in concepts:
-        api.concepts(elem).DELETE()
\ No newline at end of file
+    resetProject(host)
@@ -0,0 +1,198 @@
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.fingerprint import getFingerprint
+from concurrent.futures import ThreadPoolExecutor
+
+NUMERIC_TYPES = ("DoubleDesc", "FloatDesc", "IntegerDesc")
+UNKNOWN_VALUES = ("_unknown_", "_undefined_", "")
+
+
+def caseVectors(cases, attributes, weights=None):
+    """Embed cases as vectors whose distances follow the similarity measure.
+
+    Numeric attributes are scaled to [0, 1] by their observed range, so
+    |a - b| matches the linear local similarity 1 - |a - b| / (max - min);
+    other attributes are one-hot encoded. Columns are multiplied by the
+    square root of the attribute weight. Unknown numeric values get the
+    column mean, unknown symbols an all-zero encoding.
+
+    :param cases: list of dicts as returned by the cases endpoint
+    :param attributes: dict of attribute name to type, e.g. "DoubleDesc"
+    :param weights: dict of attribute name to weight (default: all 1)
+    :returns: (caseIDs, float32 matrix with one row per case)
+    """
+    import numpy as np
+    caseIDs = [case["caseID"] for case in cases]
+    columns = []
+    for name in sorted(attributes):
+        scale = np.sqrt(float((weights or {}).get(name, 1.0)))
+        if scale == 0:
+            continue
+        raw = [case.get(name) for case in cases]
+        if attributes[name] in NUMERIC_TYPES:
+            values = np.array([np.nan if v is None or v in UNKNOWN_VALUES else float(v) for v in raw])
+            known = values[~np.isnan(values)]
+            if known.size == 0:
+                continue
+            low, span = known.min(), known.max() - known.min()
+            values = (values - low) / (span if span > 0 else 1.0)
+            values[np.isnan(values)] = np.nanmean(values)
+            columns.append((values * scale)[:, None])
+        else:
+            symbols = sorted({v for v in raw if v is not None and v not in UNKNOWN_VALUES})
+            index = {s: i for i, s in enumerate(symbols)}
+            onehot = np.zeros((len(cases), len(symbols)))
+            for row, v in enumerate(raw):
+                if v in index:
+                    onehot[row, index[v]] = scale
+            columns.append(onehot)
+    if not columns:
+        return caseIDs, np.zeros((len(cases), 0), dtype=np.float32)
+    return caseIDs, np.hstack(columns).astype(np.float32)
+
+
+class CandidateIndex():
+    """Local approximate index that preselects retrieval candidates.
+
+    Cases are embedded with caseVectors and hashed into several
+    random-projection LSH tables (sign of `bits` random hyperplanes through
+    the centroid). The candidates of a query are the cases sharing a bucket
+    with it in any table, ranked by vector distance; when the buckets hold
+    too few cases the whole table is ranked. Only these candidates are
+    then scored exactly on the server, with the ephemeral retrievalByCaseIDs
+    endpoint, instead of the full casebase.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param concept: name of the concept
+    :param casebase: name of the casebase
+    :param tables: number of hash tables; more tables raise recall
+    :param bits: hyperplanes per table; more bits make buckets smaller
+    :param weights: attribute weights of the amalgamation function (default: all 1)
+    """
+
+    def __init__(self, host, concept, casebase, tables=8, bits=12, weights=None, seed=0):
+        self.host = host
+        self.concept = concept
+        self.casebase = casebase
+        self.tables = tables
+        self.bits = bits
+        self.weights = weights
+        self.seed = seed
+        self.caseIDs = []
+        self.rows = {}
+        self.vectors = None
+        self.buckets = []
+        self.fingerprint = None
+
+    def build(self, cases=None):
+        """Pull the case table (unless given) and build the hash tables.
+
+        :param cases: list of case dicts; fetched from the server if None
+        :returns: self
+        """
+        import numpy as np
+        fingerprint = getFingerprint(self.host, self.concept, self.casebase)
+        if cases is None:
+            cases = fingerprint.refresh()
+        attributes = getRequest(self.host).concepts(self.concept).attributes.GET().json()
+        self.caseIDs, self.vectors = caseVectors(cases, attributes, self.weights)
+        self.rows = {caseID: i for i, caseID in enumerate(self.caseIDs)}
+        rng = np.random.default_rng(self.seed)
+        self.center = self.vectors.mean(axis=0) if len(self.caseIDs) else 0
+        self.planes = rng.standard_normal((self.tables, self.vectors.shape[1], self.bits)).astype(np.float32)
+        self.buckets = []
+        for codes in self._codes(self.vectors):
+            table = {}
+            for row, code in enumerate(codes.tolist()):
+                table.setdefault(code, []).append(row)
+            self.buckets.append({code: np.array(rows) for code, rows in table.items()})
+        self.fingerprint = fingerprint.value()
+        return self
+
+    def _codes(self, vectors):
+        import numpy as np
+        powers = 1 << np.arange(self.bits, dtype=np.int64)
+        for planes in self.planes:
+            yield ((vectors - self.center) @ planes > 0).astype(np.int64) @ powers
+
+    def candidates(self, caseID, n=300):
+        """The n cases most likely to be the nearest neighbours of a case.
+
+        :param caseID: ID of the query case; it must be in the index
+        :rtype: list of caseIDs
+        """
+        import numpy as np
+        vector = self.vectors[self.rows[caseID]][None, :]
+        found = [self.buckets[t].get(int(codes[0]))
+                 for t, codes in enumerate(self._codes(vector))]
+        found = [rows for rows in found if rows is not None]
+        rows = np.unique(np.concatenate(found)) if found else np.arange(0)
+        if rows.size < n:
+            rows = np.arange(len(self.caseIDs))
+        distances = np.linalg.norm(self.vectors[rows] - vector, axis=1)
+        if rows.size > n:
+            keep = np.argpartition(distances, n - 1)[:n]
+            rows, distances = rows[keep], distances[keep]
+        return [self.caseIDs[i] for i in rows[np.argsort(distances, kind="stable")]]
+
+    def retrieve(self, queryCaseIDs, amalgamationFunction, k=10, n=300, workers=4):
+        """Retrieve the k most similar cases per query among n candidates.
+
+        :param queryCaseIDs: list of query caseIDs
+        :param amalgamationFunction: name of the amalgamation function
+        :returns: dict of query caseID to dict of caseID to similarity, as
+            returned by retrievalByMultipleCaseIDs
+        """
+        def one(caseID):
+            api = getRequest(self.host)
+            result = api.ephemeral.concepts(self.concept).casebases(self.casebase)\
+                        .amalgamationFunctions(amalgamationFunction).retrievalByCaseIDs\
+                        .POST(params={"k": k},
+                              json={"queryCaseIDs": [caseID], "ephemeralCaseIDs": self.candidates(caseID, n)})
+            result.raise_for_status()
+            return result.json()[caseID]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(zip(queryCaseIDs, pool.map(one, queryCaseIDs)))
+
+
+def exactRetrieval(host, concept, casebase, amalgamationFunction, queryCaseIDs, k=10):
+    """Exact top-k retrieval over the whole casebase, for reference."""
+    api = getRequest(host)
+    result = api.concepts(concept).casebases(casebase).amalgamationFunctions(amalgamationFunction)\
+                .retrievalByMultipleCaseIDs.POST(params={"k": k}, json=list(queryCaseIDs))
+    result.raise_for_status()
+    return result.json()
+
+
+def recallAtK(approximate, exact, k=10):
+    """Mean fraction of the exact top-k found by the approximate top-k.
+
+    Cases tied with the exact k-th similarity count as correct, so ties
+    broken differently are not reported as misses.
+
+    :param approximate: dict of query to dict of caseID to similarity
+    :param exact: dict of query to dict of caseID to similarity
+    """
+    recalls = []
+    for query, expected in exact.items():
+        if not expected:
+            continue
+        ranked = sorted(expected.items(), key=lambda item: -item[1])[:k]
+        expectedIDs = {caseID for caseID, _ in ranked}
+        threshold = ranked[-1][1]
+        found = sorted(approximate.get(query, {}).items(), key=lambda item: -item[1])[:k]
+        hits = sum(1 for caseID, sim in found if caseID in expectedIDs or sim >= threshold)
+        recalls.append(min(hits, len(ranked)) / float(len(ranked)))
+    return sum(recalls) / len(recalls) if recalls else 1.0
+
+
+def measureRecall(index, amalgamationFunction, queryCaseIDs, k=10, n=300):
+    """Compare prefiltered retrieval against exact retrieval.
+
+    :param index: a built CandidateIndex
+    :returns: dict with "recall" (recall@k), "candidates" (n) and
+        "reduction" (cases scored exactly per query vs. with the prefilter)
+    """
+    exact = exactRetrieval(index.host, index.concept, index.casebase, amalgamationFunction, queryCaseIDs, k)
+    approximate = index.retrieve(queryCaseIDs, amalgamationFunction, k, n)
+    return {"recall": recallAtK(approximate, exact, k), "candidates": n,
+            "reduction": len(index.caseIDs) / float(min(n, len(index.caseIDs)) or 1)}
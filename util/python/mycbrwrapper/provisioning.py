@@ -0,0 +1,228 @@
+"""
+A project spec describes casebases and concepts declaratively, e.g.
+
+{
+  "casebases": ["unittestCB"],
+  "concepts": {
+    "testconcept": {
+      "attributes": {
+        "wind_speed": {"type": "Double", "min": 0, "max": 25, "solution": "False"}
+      },
+      "similarityFunctions": {"wind_speed": {"polyWidth": {"parameter": 4.5}}},
+      "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+      "cases": {"unittestCB": [{"caseID": "w0", "wind_speed": "0"}]}
+    }
+  }
+}
+
+Cases should carry a caseID: only then can a re-run tell which of them
+already exist. Cases without one are uploaded only into an empty casebase.
+"""
+
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.fingerprint import getFingerprint
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import json
+import threading
+
+
+def loadSpec(path):
+    """Load a project spec from a JSON or YAML (needs PyYAML) file."""
+    with open(path) as f:
+        if path.endswith((".yml", ".yaml")):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def _check(result, what):
+    """Raise unless the server answered a PUT with a 2xx status and a true body."""
+    result.raise_for_status()
+    if result.json() is False:
+        raise RuntimeError("the server refused to create " + what)
+
+
+class Task():
+
+    def __init__(self, name, action, deps=()):
+        self.name = name
+        self.action = action
+        self.deps = set(deps)
+
+
+def runGraph(tasks, workers=8):
+    """Run tasks in dependency order, independent tasks in parallel.
+
+    :param tasks: list of Task; every dependency must name a task in the list
+    :returns: dict of task name to the return value of its action
+    :raises: the first exception raised by an action; tasks that have not
+        started by then are not run
+    """
+    byName = {t.name: t for t in tasks}
+    for t in tasks:
+        missing = t.deps - set(byName)
+        if missing:
+            raise ValueError("task {} depends on unknown tasks {}".format(t.name, sorted(missing)))
+    waiting = dict(byName)
+    results = {}
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while waiting or running:
+            for name in [n for n, t in waiting.items() if t.deps <= set(results)]:
+                running[pool.submit(waiting.pop(name).action)] = name
+            if not running:
+                raise ValueError("dependency cycle among tasks {}".format(sorted(waiting)))
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+
+class Provisioner():
+    """Create the casebases, concepts, attributes, similarity functions,
+    amalgamation functions and cases described by a project spec.
+
+    The REST operations form a dependency graph (casebase and concept
+    first, then attributes, then their similarity functions and the
+    amalgamation functions, cases last) and independent operations run in
+    parallel. Everything that already exists on the server is skipped, so
+    re-running a spec is cheap and safe.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param spec: the project spec (dict), see loadSpec
+    :param workers: number of concurrent REST calls
+    """
+
+    def __init__(self, host, spec, workers=8):
+        self.host = host
+        self.spec = spec
+        self.workers = workers
+        self.existing = {}
+        self.lock = threading.Lock()
+
+    def _api(self):
+        return getRequest(self.host)
+
+    def _remember(self, key, values):
+        with self.lock:
+            self.existing[key] = set(values)
+
+    def _exists(self, key, name):
+        with self.lock:
+            return name in self.existing.get(key, ())
+
+    def listRemote(self):
+        """Fetch the existing casebases and concepts (two round trips)."""
+        api = self._api()
+        self._remember("casebases", api.casebases.GET().json())
+        self._remember("concepts", api.concepts.GET().json())
+
+    def ensureCaseBase(self, casebase):
+        if self._exists("casebases", casebase):
+            return False
+        _check(self._api().casebases(casebase).PUT(), "casebase " + casebase)
+        return True
+
+    def ensureConcept(self, concept):
+        api = self._api()
+        created = False
+        if not self._exists("concepts", concept):
+            _check(api.concepts(concept).PUT(), "concept " + concept)
+            created = True
+        # the listings of the concept's parts are what later tasks check against
+        self._remember((concept, "attributes"), [] if created else api.concepts(concept).attributes.GET().json())
+        self._remember((concept, "amalgamationFunctions"),
+                       [] if created else api.concepts(concept).amalgamationFunctions.GET().json())
+        return created
+
+    def ensureAttribute(self, concept, attribute, description):
+        api = self._api()
+        created = False
+        if not self._exists((concept, "attributes"), attribute):
+            _check(api.concepts(concept).attributes(attribute)
+                   .PUT(params={"attributeJSON": json.dumps(description)}),
+                   "attribute {}/{}".format(concept, attribute))
+            created = True
+        self._remember((concept, attribute, "similarityFunctions"),
+                       [] if created else api.concepts(concept).attributes(attribute).similarityFunctions.GET().json())
+        return created
+
+    def ensureSimilarityFunction(self, concept, attribute, function, parameters):
+        if self._exists((concept, attribute, "similarityFunctions"), function):
+            return False
+        _check(self._api().concepts(concept).attributes(attribute).similarityFunctions(function)
+               .PUT(params=parameters),
+               "similarity function {}/{}/{}".format(concept, attribute, function))
+        return True
+
+    def ensureAmalgamationFunction(self, concept, function, parameters):
+        if self._exists((concept, "amalgamationFunctions"), function):
+            return False
+        _check(self._api().concepts(concept).amalgamationFunctions(function).PUT(params=parameters),
+               "amalgamation function {}/{}".format(concept, function))
+        return True
+
+    def ensureCases(self, concept, casebase, cases):
+        fingerprint = getFingerprint(self.host, concept, casebase)
+        existing = {case["caseID"] for case in fingerprint.refresh()}
+        if all("caseID" in case for case in cases):
+            missing = [case for case in cases if case["caseID"] not in existing]
+        else:
+            missing = [] if existing else cases
+        if not missing:
+            return False
+        result = self._api().concepts(concept).casebases(casebase).cases.POST(json={"cases": missing})
+        result.raise_for_status()
+        for caseID, case in zip(result.json(), missing):
+            fingerprint.caseAdded(caseID, case)
+        return True
+
+    def tasks(self):
+        """Build the dependency graph of the spec."""
+        tasks = [Task("remote", self.listRemote)]
+        casebases = list(self.spec.get("casebases", []))
+        for cspec in self.spec.get("concepts", {}).values():
+            casebases += [cb for cb in cspec.get("cases", {}) if cb not in casebases]
+        for cb in casebases:
+            tasks.append(Task("casebase:" + cb, lambda cb=cb: self.ensureCaseBase(cb), ["remote"]))
+        for concept, cspec in self.spec.get("concepts", {}).items():
+            cname = "concept:" + concept
+            tasks.append(Task(cname, lambda c=concept: self.ensureConcept(c), ["remote"]))
+            attributeTasks = []
+            for attribute, description in cspec.get("attributes", {}).items():
+                aname = "attribute:{}/{}".format(concept, attribute)
+                attributeTasks.append(aname)
+                tasks.append(Task(aname, lambda c=concept, a=attribute, d=description:
+                                  self.ensureAttribute(c, a, d), [cname]))
+            functionTasks = []
+            for attribute, functions in cspec.get("similarityFunctions", {}).items():
+                for function, parameters in functions.items():
+                    sname = "similarityFunction:{}/{}/{}".format(concept, attribute, function)
+                    functionTasks.append(sname)
+                    tasks.append(Task(sname, lambda c=concept, a=attribute, f=function, p=parameters:
+                                      self.ensureSimilarityFunction(c, a, f, p),
+                                      ["attribute:{}/{}".format(concept, attribute)]))
+            # each PUT makes the new amalgamation function the active one, so
+            # they run in spec order to leave the last one active
+            previous = []
+            for function, parameters in cspec.get("amalgamationFunctions", {}).items():
+                fname = "amalgamationFunction:{}/{}".format(concept, function)
+                functionTasks.append(fname)
+                tasks.append(Task(fname, lambda c=concept, f=function, p=parameters:
+                                  self.ensureAmalgamationFunction(c, f, p),
+                                  attributeTasks + previous + [cname]))
+                previous = [fname]
+            for cb, cases in cspec.get("cases", {}).items():
+                tasks.append(Task("cases:{}/{}".format(concept, cb),
+                                  lambda c=concept, cb=cb, cs=cases: self.ensureCases(c, cb, cs),
+                                  ["casebase:" + cb, cname] + attributeTasks + functionTasks))
+        return tasks
+
+    def run(self):
+        """Provision the spec.
+
+        :returns: dict of operation name to True (created) or False (already present)
+        """
+        results = runGraph(self.tasks(), self.workers)
+        results.pop("remote", None)
+        return results
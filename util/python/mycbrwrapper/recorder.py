@@ -0,0 +1,112 @@
+"""
+Record the REST calls of a client to a compact log for replay with
+`python -m mycbrwrapper loadtest`.
+
+    from mycbrwrapper import recorder
+    recorder.startRecording("calls.log.gz")
+    ...                       # every getRequest(host) call is recorded
+    recorder.stopRecording()
+
+The log is gzip-compressed JSON lines, one per call: "t" seconds since
+recording started, "m" method, "p" path and query (without scheme and
+host), "b" request body (omitted when empty or with bodies=False), "s"
+status, "l" latency in milliseconds and "n" response size in bytes.
+"""
+
+import gzip
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class Recorder():
+    """Append REST calls to a log file.
+
+    Use hook as a requests response hook, e.g.
+    requests.Session().hooks["response"].append(recorder.hook).
+
+    :param path: log file; written gzip-compressed if it ends with .gz
+    :param bodies: record request bodies (needed to replay POSTs and PUTs)
+    """
+
+    def __init__(self, path, bodies=True):
+        self.path = path
+        self.bodies = bodies
+        self.file = gzip.open(path, "wt") if path.endswith(".gz") else open(path, "w")
+        self.start = time.monotonic()
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def record(self, method, url, body, status, latency, size):
+        """Write one call.
+
+        :param latency: seconds
+        """
+        parts = urlsplit(url)
+        entry = {"t": round(time.monotonic() - self.start - latency, 6), "m": method,
+                 "p": parts.path + ("?" + parts.query if parts.query else ""),
+                 "s": status, "l": round(latency * 1000, 3), "n": size}
+        if self.bodies and isinstance(body, (str, bytes)) and body:
+            entry["b"] = body.decode("utf-8") if isinstance(body, bytes) else body
+        line = json.dumps(entry, separators=(",", ":"))
+        with self.lock:
+            if self.file is not None:
+                self.file.write(line + "\n")
+                self.count += 1
+
+    def hook(self, response, *args, **kwargs):
+        """requests response hook."""
+        request = response.request
+        self.record(request.method, request.url, request.body, response.status_code,
+                    response.elapsed.total_seconds(), len(response.content))
+        return response
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def readLog(path):
+    """The entries of a log written by Recorder.
+
+    :returns: generator of dicts
+    """
+    with (gzip.open(path, "rt") if path.endswith(".gz") else open(path)) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+_recorder = None
+
+
+def activeRecorder():
+    """The recorder getRequest attaches to new requests, or None."""
+    return _recorder
+
+
+def startRecording(path, bodies=True):
+    """Record all calls made through mycbrwrapper.rest.getRequest from now on.
+
+    :returns: the Recorder
+    """
+    global _recorder
+    stopRecording()
+    _recorder = Recorder(path, bodies)
+    return _recorder
+
+
+def stopRecording():
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
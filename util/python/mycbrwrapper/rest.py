@@ -1,4 +1,6 @@
 import hammock
+from mycbrwrapper.recorder import activeRecorder
+from mycbrwrapper.transport import activeTransport
 
 __name__ = "rest"
 
@@ -10,6 +12,13 @@ def getRequest(host):
     :rtype: hammock object for CBR REST API
 
     """
-    api = hammock.Hammock("http://{}".format(host))
+    session = {}
+    recorder = activeRecorder()
+    if recorder is not None:
+        session["hooks"] = {"response": [recorder.hook]}
+    transport = activeTransport()
+    if transport is not None:
+        session["adapters"] = {"http://": transport}
+    api = hammock.Hammock("http://{}".format(host), **session)
     return api 
 
@@ -0,0 +1,188 @@
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.fingerprint import getFingerprint
+from concurrent.futures import ThreadPoolExecutor
+import json
+import random
+
+UNKNOWN_VALUES = ("_unknown_", "_undefined_", "")
+
+
+def samplePairs(caseIDs, count, seed=0):
+    """Draw `count` distinct unordered pairs of different cases (all pairs if there are fewer).
+
+    :rtype: list of (caseID, caseID)
+    """
+    caseIDs = list(caseIDs)
+    total = len(caseIDs) * (len(caseIDs) - 1) // 2
+    if count >= total:
+        return [(a, b) for i, a in enumerate(caseIDs) for b in caseIDs[i + 1:]]
+    rng = random.Random(seed)
+    pairs = set()
+    while len(pairs) < count:
+        i, j = rng.sample(range(len(caseIDs)), 2)
+        pairs.add((caseIDs[min(i, j)], caseIDs[max(i, j)]))
+    return sorted(pairs)
+
+
+def localSimilarities(host, concept, amalgamationFunction, pairs, batchsize=1000, workers=4):
+    """Fetch the local similarity of every attribute for many pairs of cases.
+
+    The local similarity functions are those of `amalgamationFunction`;
+    its weights do not matter.
+
+    :param pairs: list of (caseID, caseID)
+    :returns: (sorted attribute names, float32 matrix of pairs x attributes)
+    """
+    import numpy as np
+    call = getRequest(host).analytics.concepts(concept).amalgamationFunctions(amalgamationFunction)\
+                           .localSimComparisons
+
+    def fetch(batch):
+        result = call.POST(json=[list(pair) for pair in batch])
+        result.raise_for_status()
+        return result.json()
+    batches = [pairs[i:i + batchsize] for i in range(0, len(pairs), batchsize)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        rows = [row for part in pool.map(fetch, batches) for row in part]
+    attributes = sorted({name for row in rows for name in row})
+    local = np.zeros((len(rows), len(attributes)), dtype=np.float32)
+    for i, row in enumerate(rows):
+        local[i] = [row.get(name, 0.0) for name in attributes]
+    return attributes, local
+
+
+def pairTargets(cases, pairs, target):
+    """Target similarity of each pair, taken from a label or value attribute.
+
+    Numeric values give 1 - |a - b| / (max - min), other values 1 if they
+    are equal and 0 otherwise. Pairs with an unknown value get NaN.
+
+    :param cases: dict of caseID to case dict
+    :param target: name of the attribute
+    :rtype: float32 numpy array
+    """
+    import numpy as np
+    values = {caseID: case.get(target) for caseID, case in cases.items()}
+    known = [v for v in values.values() if v is not None and v not in UNKNOWN_VALUES]
+    try:
+        numbers = [float(v) for v in known]
+        span = (max(numbers) - min(numbers)) or 1.0
+    except ValueError:
+        span = None
+    targets = np.full(len(pairs), np.nan, dtype=np.float32)
+    for i, (a, b) in enumerate(pairs):
+        va, vb = values[a], values[b]
+        if va is None or vb is None or va in UNKNOWN_VALUES or vb in UNKNOWN_VALUES:
+            continue
+        targets[i] = 1.0 - abs(float(va) - float(vb)) / span if span is not None else float(va == vb)
+    return targets
+
+
+class Rprop():
+    """Learn the weights of a weighted sum amalgamation function with iRprop-.
+
+    The global similarity of pair i is local[i] . w / sum(w), so with the
+    local similarities precomputed once as a pairs x attributes matrix each
+    iteration is two matrix-vector products. The loss is the mean squared
+    error to the target similarities. Weights stay non-negative and are
+    returned scaled to a mean of 1.
+
+    :param etaPlus: step size growth when the gradient keeps its sign
+    :param etaMinus: step size shrinkage when the gradient changes sign
+    :param deltaInit: initial step size
+    :param deltaMin: smallest step size
+    :param deltaMax: largest step size
+    """
+
+    def __init__(self, etaPlus=1.2, etaMinus=0.5, deltaInit=0.1, deltaMin=1e-6, deltaMax=1.0):
+        self.etaPlus = etaPlus
+        self.etaMinus = etaMinus
+        self.deltaInit = deltaInit
+        self.deltaMin = deltaMin
+        self.deltaMax = deltaMax
+        self.losses = []
+
+    @staticmethod
+    def loss(local, targets, weights):
+        import numpy as np
+        return float(np.mean((local @ weights / weights.sum() - targets) ** 2))
+
+    @staticmethod
+    def gradient(local, targets, weights):
+        """Gradient of the mean squared error with respect to the (unnormalised) weights."""
+        total = weights.sum()
+        sims = local @ weights / total
+        residual = sims - targets
+        return 2.0 / (len(targets) * total) * (local.T @ residual - residual @ sims)
+
+    def fit(self, local, targets, weights=None, iterations=200, tolerance=1e-9):
+        """Optimise the weights.
+
+        :param local: float matrix of pairs x attributes (see localSimilarities)
+        :param targets: target similarity of each pair; NaN rows are ignored
+        :param weights: initial weights (default: all 1)
+        :param iterations: maximum number of iterations
+        :param tolerance: stop when the loss improves by less than this
+        :returns: numpy array of weights, mean 1
+        """
+        import numpy as np
+        keep = ~np.isnan(targets)
+        local = np.asarray(local, dtype=np.float32)[keep]
+        targets = np.asarray(targets, dtype=np.float32)[keep]
+        weights = np.ones(local.shape[1]) if weights is None else np.array(weights, dtype=np.float64)
+        delta = np.full(local.shape[1], self.deltaInit)
+        previous = np.zeros(local.shape[1])
+        self.losses = [self.loss(local, targets, weights)]
+        for _ in range(iterations):
+            grad = self.gradient(local, targets, weights)
+            sign = grad * previous
+            delta = np.where(sign > 0, np.minimum(delta * self.etaPlus, self.deltaMax), delta)
+            delta = np.where(sign < 0, np.maximum(delta * self.etaMinus, self.deltaMin), delta)
+            grad = np.where(sign < 0, 0.0, grad)
+            weights = np.maximum(weights - np.sign(grad) * delta, 0.0)
+            if weights.sum() <= 0:
+                weights = np.full_like(weights, self.deltaMin)
+            previous = grad
+            self.losses.append(self.loss(local, targets, weights))
+            if abs(self.losses[-2] - self.losses[-1]) < tolerance and not (sign < 0).any():
+                break
+        return weights * len(weights) / weights.sum()
+
+
+def saveWeights(host, concept, name, weights, amalgamationFunctionType="WEIGHTED_SUM"):
+    """Create (or replace) the amalgamation function `name` with the given attribute weights.
+
+    :param weights: dict of attribute name to weight
+    """
+    result = getRequest(host).concepts(concept).amalgamationFunctions(name)\
+                 .PUT(params={"amalgamationFunctionType": amalgamationFunctionType,
+                              "attributeWeights": json.dumps(weights)})
+    result.raise_for_status()
+    return result
+
+
+def learnWeights(host, concept, casebase, amalgamationFunction, target, name=None, pairs=5000, seed=0,
+                 iterations=200, batchsize=1000, workers=4):
+    """Learn attribute weights so that global similarity follows the similarity of `target`.
+
+    The local similarities of a sample of case pairs are fetched once
+    (batched localSimComparisons), the weights are fitted locally with
+    Rprop and, if `name` is given, stored as a new amalgamation function.
+    The target attribute gets weight 0.
+
+    :param amalgamationFunction: function whose local similarity functions are used
+    :param target: attribute holding the label or value that defines how similar two cases should be
+    :param name: name of the amalgamation function to create with the learned weights
+    :param pairs: number of case pairs to learn from
+    :returns: dict of attribute name to weight
+    """
+    cases = {case["caseID"]: case for case in getFingerprint(host, concept, casebase).refresh()}
+    sample = samplePairs(sorted(cases), pairs, seed)
+    attributes, local = localSimilarities(host, concept, amalgamationFunction, sample, batchsize, workers)
+    features = [i for i, attribute in enumerate(attributes) if attribute != target]
+    learned = Rprop().fit(local[:, features], pairTargets(cases, sample, target), iterations=iterations)
+    weights = {attribute: 0.0 for attribute in attributes}
+    weights.update({attributes[i]: float(w) for i, w in zip(features, learned)})
+    if name is not None:
+        saveWeights(host, concept, name, weights)
+    return weights
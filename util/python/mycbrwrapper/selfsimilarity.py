@@ -0,0 +1,181 @@
+from mycbrwrapper.rest import getRequest
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+
+META = "caseIDs.json"
+MATRIX = "matrix.npy"
+
+
+class SelfSimilarityMatrix():
+    """Stored self-similarity matrix of a casebase with incremental updates.
+
+    The matrix lives in a directory: matrix.npy is a float32 matrix,
+    memory-mapped, where matrix[i, j] is the similarity of case j to the
+    query case i, and caseIDs.json maps slots (rows and columns) to
+    caseIDs. Removing a case only frees its slot, so no part of the matrix
+    is copied; added cases reuse free slots. The file is only rewritten when
+    it runs out of slots (its capacity then doubles) or on compact().
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param concept: name of the concept
+    :param casebase: name of the casebase
+    :param amalgamationFunction: name of the amalgamation function
+    :param path: directory of the matrix
+    :param batchsize: query cases per ephemeral retrieval call
+    :param workers: number of concurrent retrieval calls
+    """
+
+    def __init__(self, host, concept, casebase, amalgamationFunction, path, batchsize=200, workers=4):
+        self.host = host
+        self.concept = concept
+        self.casebase = casebase
+        self.amalgamationFunction = amalgamationFunction
+        self.path = path
+        self.batchsize = batchsize
+        self.workers = workers
+        self.caseIDs = []
+        self.slots = {}
+        self.matrix = None
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _allocate(self, capacity, keep=None):
+        """Create a matrix with `capacity` slots and copy the slots in `keep` into it, in order."""
+        import numpy as np
+        matrix = np.lib.format.open_memmap(self._file(MATRIX + ".tmp"), mode="w+",
+                                           dtype=np.float32, shape=(capacity, capacity))
+        matrix[:] = np.nan
+        if keep:
+            matrix[:len(keep), :len(keep)] = self.matrix[np.ix_(keep, keep)]
+        matrix.flush()
+        self.matrix = None
+        os.replace(self._file(MATRIX + ".tmp"), self._file(MATRIX))
+        self.matrix = matrix
+
+    def save(self):
+        """Flush the matrix and write caseIDs.json."""
+        self.matrix.flush()
+        meta = {"concept": self.concept, "casebase": self.casebase,
+                "amalgamationFunction": self.amalgamationFunction, "caseIDs": self.caseIDs}
+        with open(self._file(META + ".tmp"), "w") as f:
+            json.dump(meta, f)
+        os.replace(self._file(META + ".tmp"), self._file(META))
+
+    def load(self):
+        """Open an existing matrix.
+
+        :returns: self
+        """
+        import numpy as np
+        with open(self._file(META)) as f:
+            self.caseIDs = json.load(f)["caseIDs"]
+        self.slots = {caseID: slot for slot, caseID in enumerate(self.caseIDs) if caseID is not None}
+        self.matrix = np.load(self._file(MATRIX), mmap_mode="r+")
+        return self
+
+    def _store(self, results):
+        """Write a retrieval result (dict of query to dict of caseID to similarity) into the matrix."""
+        for query, row in results.items():
+            i = self.slots[query]
+            for caseID, sim in row.items():
+                if caseID in self.slots:
+                    self.matrix[i, self.slots[caseID]] = sim
+
+    def _ephemeral(self, queries, candidates):
+        result = getRequest(self.host).ephemeral.concepts(self.concept).casebases(self.casebase)\
+                     .amalgamationFunctions(self.amalgamationFunction).retrievalByCaseIDs\
+                     .POST(params={"k": -1}, json={"queryCaseIDs": queries, "ephemeralCaseIDs": candidates})
+        result.raise_for_status()
+        return result.json()
+
+    def build(self):
+        """Compute the full matrix with computeSelfSimilarity (N x N on the server).
+
+        :returns: self
+        """
+        os.makedirs(self.path, exist_ok=True)
+        result = getRequest(self.host).concepts(self.concept).casebases(self.casebase).computeSelfSimilarity\
+                     .GET(params={"amalgamationFunctionID": self.amalgamationFunction, "k": -1})
+        result.raise_for_status()
+        results = result.json()
+        self.caseIDs = sorted(results)
+        self.slots = {caseID: slot for slot, caseID in enumerate(self.caseIDs)}
+        self._allocate(max(len(self.caseIDs), 1))
+        self._store(results)
+        self.save()
+        return self
+
+    def update(self, added=(), removed=()):
+        """Splice added and removed cases into the stored matrix.
+
+        Only the rows and columns of the added cases are fetched, with
+        ephemeral retrievals of the added cases against all cases and of
+        the remaining cases against the added ones (2 x M x N instead of
+        N x N).
+
+        :param added: caseIDs of new cases
+        :param removed: caseIDs of deleted cases
+        :returns: self
+        """
+        for caseID in removed:
+            slot = self.slots.pop(caseID, None)
+            if slot is not None:
+                self.caseIDs[slot] = None
+        added = [c for c in dict.fromkeys(added) if c not in self.slots]
+        free = [slot for slot, caseID in enumerate(self.caseIDs) if caseID is None]
+        if len(added) > len(free) + len(self.matrix) - len(self.caseIDs):
+            self.compact(max(2 * len(self.matrix), len(self.slots) + len(added)))
+            free = []
+        for caseID in added:
+            if free:
+                slot = free.pop(0)
+                self.caseIDs[slot] = caseID
+            else:
+                slot = len(self.caseIDs)
+                self.caseIDs.append(caseID)
+            self.slots[caseID] = slot
+            self.matrix[slot, :] = float("nan")
+            self.matrix[:, slot] = float("nan")
+        if added:
+            everyone = list(self.slots)
+            fresh = set(added)
+            existing = [c for c in everyone if c not in fresh]
+            jobs = [(added[i:i + self.batchsize], everyone) for i in range(0, len(added), self.batchsize)]
+            jobs += [(existing[i:i + self.batchsize], added) for i in range(0, len(existing), self.batchsize)]
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for results in pool.map(lambda job: self._ephemeral(*job), jobs):
+                    self._store(results)
+        self.save()
+        return self
+
+    def compact(self, capacity=None):
+        """Rewrite the matrix without free slots.
+
+        :param capacity: number of slots of the new file (default: number of cases)
+        """
+        keep = [slot for slot, caseID in enumerate(self.caseIDs) if caseID is not None]
+        self._allocate(max(capacity or len(keep), 1), keep)
+        self.caseIDs = [self.caseIDs[slot] for slot in keep]
+        self.slots = {caseID: slot for slot, caseID in enumerate(self.caseIDs)}
+        self.save()
+
+    def similarity(self, query, caseID):
+        return float(self.matrix[self.slots[query], self.slots[caseID]])
+
+    def row(self, query):
+        """Similarities of all cases to `query`, as returned by computeSelfSimilarity.
+
+        :rtype: dict of caseID to similarity
+        """
+        values = self.matrix[self.slots[query]]
+        return {caseID: float(values[slot]) for caseID, slot in self.slots.items()}
+
+    def toDataFrame(self):
+        """The matrix as a pandas DataFrame laid out like getCaseBaseSelfSimilarity:
+        rows are cases, columns query cases."""
+        import pandas as pd
+        caseIDs = sorted(self.slots)
+        slots = [self.slots[c] for c in caseIDs]
+        return pd.DataFrame(self.matrix[slots][:, slots].T, index=caseIDs, columns=caseIDs)
@@ -0,0 +1,144 @@
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.fingerprint import getFingerprint
+from concurrent.futures import ThreadPoolExecutor, wait
+import hashlib
+import heapq
+import itertools
+
+UNKNOWN = "_unknown_"
+
+
+def shardIndex(caseID, count):
+    """The shard a case belongs to: a stable hash of its caseID modulo the number of shards."""
+    digest = hashlib.blake2b(str(caseID).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+class ScatterResult(list):
+    """Merged results of a scatter-gather call.
+
+    :ivar missing: (host, casebase) of the shards that failed or timed out
+    """
+
+    def __init__(self, results=(), missing=()):
+        super(ScatterResult, self).__init__(results)
+        self.missing = list(missing)
+
+
+class ShardedCaseBase():
+    """A logical casebase partitioned over several casebases and/or servers.
+
+    Cases are assigned to shards by shardIndex of their caseID, so the
+    list of shards must stay the same (and in the same order) for the
+    lifetime of the data. Every server must have the concept and the
+    amalgamation function. Retrievals are sent to all shards in parallel
+    and the per-shard top-k lists, each sorted by similarity, are merged
+    with a heap.
+
+    :param concept: name of the concept
+    :param shards: list of (host, casebase) tuples
+    :param timeout: seconds to wait for the shards of a retrieval, also the
+        timeout of each request to a shard (default: no limit)
+    :param partial: if True, return the results of the shards that answered
+        in time; otherwise a failed or late shard raises
+    """
+
+    def __init__(self, concept, shards, timeout=None, partial=False):
+        self.concept = concept
+        self.shards = [tuple(shard) for shard in shards]
+        self.timeout = timeout
+        self.partial = partial
+        self.pool = ThreadPoolExecutor(max_workers=len(self.shards))
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+    def _cases(self, shard):
+        host, casebase = shard
+        return getRequest(host).concepts(self.concept).casebases(casebase).cases
+
+    def shard(self, caseID):
+        """The (host, casebase) that holds a case."""
+        return self.shards[shardIndex(caseID, len(self.shards))]
+
+    def partition(self, cases):
+        """Split cases (dicts with "caseID") by shard.
+
+        :returns: dict of (host, casebase) to list of cases
+        """
+        parts = {shard: [] for shard in self.shards}
+        for case in cases:
+            parts[self.shard(case["caseID"])].append(case)
+        return parts
+
+    def create(self):
+        """Create the casebases of all shards."""
+        for host, casebase in self.shards:
+            getRequest(host).casebases(casebase).PUT()
+
+    def addCases(self, cases):
+        """Add cases (dicts with "caseID") to their shards, all shards in parallel.
+
+        :returns: number of cases added
+        """
+        def add(shard, part):
+            result = self._cases(shard).POST(json={"cases": part})
+            result.raise_for_status()
+            fingerprint = getFingerprint(shard[0], self.concept, shard[1])
+            for caseID, case in zip(result.json(), part):
+                fingerprint.caseAdded(caseID, case)
+            return len(part)
+        futures = [self.pool.submit(add, shard, part) for shard, part in self.partition(cases).items() if part]
+        return sum(f.result() for f in futures)
+
+    def getCase(self, caseID):
+        """Fetch a case from the shard that holds it."""
+        result = self._cases(self.shard(caseID))(caseID).GET(timeout=self.timeout)
+        result.raise_for_status()
+        return result.json()
+
+    def _scatter(self, call):
+        """Run call(shard) on every shard and collect the results of those that answered."""
+        futures = {self.pool.submit(call, shard): shard for shard in self.shards}
+        done, late = wait(futures, timeout=self.timeout)
+        results, missing = [], [futures[f] for f in late]
+        for future in done:
+            if future.exception() is None:
+                results.append(future.result())
+            elif self.partial:
+                missing.append(futures[future])
+            else:
+                raise future.exception()
+        if missing and not self.partial:
+            raise TimeoutError("no answer from shards {}".format(missing))
+        return results, missing
+
+    def retrieve(self, query, amalgamationFunction, k=10):
+        """Retrieve the k cases most similar to an attribute query from all shards.
+
+        :param query: dict of attribute name to value
+        :param amalgamationFunction: name of the amalgamation function
+        :returns: ScatterResult of case dicts (with "caseID" and
+            "similarity"), most similar first
+        """
+        def call(shard):
+            host, casebase = shard
+            result = getRequest(host).concepts(self.concept).casebases(casebase)\
+                         .amalgamationFunctions(amalgamationFunction).retrievalByMultipleAttributes\
+                         .POST(params={"k": k}, json=query, timeout=self.timeout)
+            result.raise_for_status()
+            return result.json()
+        lists, missing = self._scatter(call)
+        key = lambda case: -float(case["similarity"])
+        merged = heapq.merge(*[sorted(cases, key=key) for cases in lists], key=key)
+        return ScatterResult(itertools.islice(merged, k if k >= 0 else None), missing)
+
+    def retrieveByCaseID(self, caseID, amalgamationFunction, k=10):
+        """Retrieve the k cases most similar to a stored case from all shards.
+
+        The content of the query case is fetched from its shard and sent as
+        an attribute query to all shards, without its unknown values.
+        """
+        query = {name: value for name, value in self.getCase(caseID).items()
+                 if name not in ("caseID", "similarity") and value != UNKNOWN}
+        return self.retrieve(query, amalgamationFunction, k)
@@ -0,0 +1,329 @@
+"""
+Share a casebase's case table and self-similarity matrix between worker processes without copies.
+
+One process (e.g. the gunicorn master before it forks, or a cron job)
+downloads and publishes them; every worker attaches read-only:
+
+    with SharedTablePublisher("localhost:8080", "car", "cars", "/dev/shm/mycbr", backend="shm") as publisher:
+        manifest = publisher.publish(matrix=SelfSimilarityMatrix(...).load())
+        ...                                    # serve while published
+
+    tables = SharedTables.attach(manifest)     # in each worker
+    tables.column("price"), tables.row("car7"), tables.case("car7")
+
+The arrays live either in memory-mapped .npy files (backend="file") or
+in multiprocessing.shared_memory segments (backend="shm"). Either way
+the operating system maps the same pages into every worker, so memory
+does not grow with the number of workers and attaching only reads the
+manifest. The manifest is a small JSON file with the casebase
+fingerprint, the number of cases and the shape, dtype and location of
+each array; its size does not depend on the number of cases. The sorted
+caseIDs are an array as well (row i of every array is caseIDs[i]), and
+workers find the row of a case by binary search in it instead of
+building an index of their own. Numeric attributes become float64
+columns (NaN where unknown), all others int32 codes into a list of
+categories (-1 where unknown).
+
+Arrays are named after the fingerprint, so publishing a new version of
+the casebase does not disturb workers still attached to the old one;
+the old arrays are released when the publisher moves on.
+"""
+
+from mycbrwrapper.fingerprint import getFingerprint
+import hashlib
+import json
+import os
+import threading
+
+MATRIX = "similarities"
+CASEIDS = "caseIDs"
+UNKNOWN = "_unknown_"
+
+_trackerLock = threading.Lock()
+
+
+def _numeric(values):
+    try:
+        [float(v) for v in values if v is not None and v != UNKNOWN]
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _columns(caseIDs, cases):
+    """Encode a case listing as arrays.
+
+    :returns: (dict of array name to numpy array, dict of attribute to
+        column description with "array" and "categories")
+    """
+    import numpy as np
+    attributes = sorted({a for case in cases.values() for a in case if a not in ("caseID", "similarity")})
+    arrays, columns = {}, {}
+    for i, attribute in enumerate(attributes):
+        values = [cases[c].get(attribute) for c in caseIDs]
+        name = "column{}".format(i)
+        if _numeric(values):
+            arrays[name] = np.array([np.nan if v is None or v == UNKNOWN else float(v) for v in values],
+                                    dtype=np.float64)
+            columns[attribute] = {"array": name, "categories": None}
+        else:
+            categories = sorted({str(v) for v in values if v is not None and v != UNKNOWN})
+            index = {c: code for code, c in enumerate(categories)}
+            arrays[name] = np.array([index.get(str(v), -1) if v is not None else -1 for v in values],
+                                    dtype=np.int32)
+            columns[attribute] = {"array": name, "categories": categories}
+    return arrays, columns
+
+
+def _alignedMatrix(matrix, caseIDs):
+    """The similarities of a SelfSimilarityMatrix with rows and columns in the order of `caseIDs` (NaN if missing)."""
+    import numpy as np
+    slots = np.array([matrix.slots.get(c, -1) for c in caseIDs], dtype=np.int64)
+    aligned = np.full((len(caseIDs), len(caseIDs)), np.nan, dtype=np.float32)
+    known = np.flatnonzero(slots >= 0)
+    aligned[np.ix_(known, known)] = matrix.matrix[np.ix_(slots[known], slots[known])]
+    return aligned
+
+
+def _attachSegment(name):
+    """Attach an existing shared memory segment without handing it to the resource tracker,
+    which would otherwise unlink it when this worker exits."""
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # before Python 3.13: keep it from registering at all, unregistering afterwards would also
+    # drop the registration of a publisher sharing the same tracker
+    from multiprocessing import resource_tracker
+    with _trackerLock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedTablePublisher():
+    """Download and publish the case table (and optionally the self-similarity matrix) of a casebase.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param concept: name of the concept
+    :param casebase: name of the casebase
+    :param directory: directory of the manifest (and of the arrays with backend="file")
+    :param backend: "file" for memory-mapped .npy files, "shm" for shared memory segments
+    """
+
+    def __init__(self, host, concept, casebase, directory, backend="file"):
+        if backend not in ("file", "shm"):
+            raise ValueError("backend must be file or shm")
+        self.host = host
+        self.concept = concept
+        self.casebase = casebase
+        self.directory = directory
+        self.backend = backend
+        self.segments = []
+        self.files = []
+
+    @property
+    def manifestPath(self):
+        return os.path.join(self.directory, "{}-{}.json".format(self.concept, self.casebase))
+
+    def _store(self, prefix, name, array):
+        """Write an array to the backend; returns its manifest entry."""
+        import numpy as np
+        entry = {"shape": list(array.shape), "dtype": array.dtype.str}
+        if self.backend == "file":
+            path = os.path.join(self.directory, "{}-{}.npy".format(prefix, name))
+            np.save(path + ".tmp.npy", array)
+            os.replace(path + ".tmp.npy", path)
+            self.files.append(path)
+            entry["file"] = os.path.basename(path)
+        else:
+            from multiprocessing import shared_memory
+            # POSIX shared memory names are short on some systems (31 characters on macOS)
+            segmentName = "mycbr-{}-{}".format(hashlib.sha1(prefix.encode("utf-8")).hexdigest()[:10], name)
+            try:
+                segment = shared_memory.SharedMemory(name=segmentName, create=True, size=max(array.nbytes, 1))
+            except FileExistsError:
+                # left over by a publisher that did not close; the content is the same version
+                old = shared_memory.SharedMemory(name=segmentName)
+                old.close()
+                old.unlink()
+                segment = shared_memory.SharedMemory(name=segmentName, create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+            self.segments.append(segment)
+            entry["segment"] = segmentName
+        return entry
+
+    def publish(self, matrix=None):
+        """Fetch the cases and publish them, with the matrix of a SelfSimilarityMatrix if given.
+
+        Arrays of an earlier publish() are released once the new manifest is in place.
+
+        :returns: the path of the manifest
+        """
+        import numpy as np
+        os.makedirs(self.directory, exist_ok=True)
+        fingerprint = getFingerprint(self.host, self.concept, self.casebase)
+        listing = fingerprint.refresh()
+        cases = {case["caseID"]: case for case in listing}
+        caseIDs = sorted(cases)
+        arrays, columns = _columns(caseIDs, cases)
+        # fixed-width unicode, so it can live in shared memory like the numeric arrays
+        arrays[CASEIDS] = np.array(caseIDs, dtype=np.str_)
+        if matrix is not None:
+            arrays[MATRIX] = _alignedMatrix(matrix, caseIDs)
+        version = fingerprint.value()
+        prefix = "mycbr-{}-{}-{}".format(self.concept, self.casebase, version)
+        oldSegments, oldFiles = self.segments, self.files
+        self.segments, self.files = [], []
+        manifest = {"concept": self.concept, "casebase": self.casebase, "fingerprint": version,
+                    "backend": self.backend, "cases": len(caseIDs), "columns": columns,
+                    "arrays": {name: self._store(prefix, name, array) for name, array in arrays.items()}}
+        with open(self.manifestPath + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(self.manifestPath + ".tmp", self.manifestPath)
+        self._release(oldSegments, [f for f in oldFiles if f not in self.files])
+        return self.manifestPath
+
+    def _release(self, segments, files):
+        # attached workers keep their mappings; the memory is freed when the last one lets go
+        for segment in segments:
+            segment.close()
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        for path in files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        """Release the published arrays and remove the manifest."""
+        self._release(self.segments, self.files)
+        self.segments, self.files = [], []
+        try:
+            os.remove(self.manifestPath)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedTables():
+    """Read-only, zero-copy view of the arrays published by SharedTablePublisher.
+
+    Use SharedTables.attach(manifestPath).
+    """
+
+    def __init__(self, manifestPath, manifest, arrays, segments):
+        self.manifestPath = manifestPath
+        self.manifest = manifest
+        self.arrays = arrays
+        self.segments = segments
+        self.caseIDs = arrays[CASEIDS]
+        self.fingerprint = manifest["fingerprint"]
+
+    @classmethod
+    def attach(cls, manifestPath):
+        """Map the arrays of a manifest; no array is read or copied."""
+        import numpy as np
+        with open(manifestPath) as f:
+            manifest = json.load(f)
+        directory = os.path.dirname(manifestPath)
+        arrays, segments = {}, []
+        for name, entry in manifest["arrays"].items():
+            if "file" in entry:
+                array = np.load(os.path.join(directory, entry["file"]), mmap_mode="r")
+            else:
+                segment = _attachSegment(entry["segment"])
+                segments.append(segment)
+                array = np.ndarray(tuple(entry["shape"]), dtype=np.dtype(entry["dtype"]), buffer=segment.buf)
+                array.flags.writeable = False
+            arrays[name] = array
+        return cls(manifestPath, manifest, arrays, segments)
+
+    def current(self):
+        """True while the manifest on disk still describes the attached version."""
+        try:
+            with open(self.manifestPath) as f:
+                return json.load(f)["fingerprint"] == self.fingerprint
+        except FileNotFoundError:
+            return False
+
+    def rowOf(self, caseID):
+        """The row of a case in every array.
+
+        :raises KeyError: if the casebase has no such case
+        """
+        import numpy as np
+        row = int(np.searchsorted(self.caseIDs, caseID))
+        if row == len(self.caseIDs) or self.caseIDs[row] != caseID:
+            raise KeyError(caseID)
+        return row
+
+    @property
+    def attributes(self):
+        return sorted(self.manifest["columns"])
+
+    @property
+    def matrix(self):
+        """The self-similarity matrix: matrix[i, j] is the similarity of case j to the query case i, or None."""
+        return self.arrays.get(MATRIX)
+
+    def column(self, attribute):
+        """The values of an attribute: float64 array, or (int32 codes, categories)."""
+        description = self.manifest["columns"][attribute]
+        array = self.arrays[description["array"]]
+        if description["categories"] is None:
+            return array
+        return array, description["categories"]
+
+    def case(self, caseID):
+        """The content of a case as in a case listing, with numbers written as floats."""
+        import math
+        row = self.rowOf(caseID)
+        content = {"caseID": caseID}
+        for attribute, description in self.manifest["columns"].items():
+            value = self.arrays[description["array"]][row]
+            if description["categories"] is None:
+                content[attribute] = UNKNOWN if math.isnan(value) else str(float(value))
+            else:
+                content[attribute] = UNKNOWN if value < 0 else description["categories"][value]
+        return content
+
+    def similarity(self, query, caseID):
+        return float(self.matrix[self.rowOf(query), self.rowOf(caseID)])
+
+    def row(self, query):
+        """Similarities of all cases to `query`.
+
+        :rtype: dict of caseID to similarity
+        """
+        return dict(zip(self.caseIDs.tolist(), self.matrix[self.rowOf(query)].tolist()))
+
+    def toDataFrame(self):
+        """The case table as a pandas DataFrame indexed by caseID; numeric columns are not copied."""
+        import pandas as pd
+        data = {}
+        for attribute in self.attributes:
+            column = self.column(attribute)
+            if isinstance(column, tuple):
+                data[attribute] = pd.Categorical.from_codes(column[0], column[1])
+            else:
+                data[attribute] = column
+        return pd.DataFrame(data, index=pd.Index(self.caseIDs, name="caseID"), copy=False)
+
+    def close(self):
+        self.arrays = {}
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
@@ -0,0 +1,674 @@
+"""
+In-memory stand-in for the mycbr-rest server.
+
+It speaks the subset of the REST API the Python clients use (concepts,
+attributes, amalgamation functions, casebases, cases, retrieval,
+self-similarity, ephemeral retrieval, registered caseID sets, local
+similarity analytics and neural model uploads) with the same paths and
+JSON shapes, so client code can be tested and benchmarked without a JVM.
+Similarity is a weighted average of local similarities:
+1 - |a - b| / (max - min) for numeric attributes and equality for all
+others. It is not meant to reproduce myCBR's similarity values.
+
+    with StandInServer() as server:
+        api = getRequest(server.host)
+
+or from a shell: python -m mycbrwrapper.standin --port 8080
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+NUMERIC_TYPES = ("Double", "Integer", "Float")
+UNKNOWN = "_unknown_"
+
+
+def caseIDSetID(caseIDs):
+    """Content hash of a set of caseIDs, as computed by the server."""
+    raw = "\n".join(sorted(set(caseIDs)))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message=""):
+        super(HTTPError, self).__init__(message)
+        self.status = status
+
+
+class StandInModel():
+    """The in-memory project behind the stand-in server."""
+
+    def __init__(self, handles=True, pause=0.0, pauseRate=0.0):
+        self.handles = handles
+        self.pause = pause
+        self.pauseRate = pauseRate
+        self.lock = threading.RLock()
+        self.concepts = {}
+        self.casebases = {}
+        self.caseIDSets = {}
+        self.neuralModels = {}
+        self.uploads = 0
+
+    # ---- model helpers
+
+    def concept(self, name):
+        if name not in self.concepts:
+            raise HTTPError(404, "unknown concept " + name)
+        return self.concepts[name]
+
+    def casebase(self, name):
+        if name not in self.casebases:
+            raise HTTPError(404, "unknown casebase " + name)
+        return self.casebases[name]
+
+    def cases(self, concept, casebase):
+        return [(caseID, case["values"]) for caseID, case in self.casebase(casebase).items()
+                if case["concept"] == concept]
+
+    def caseContent(self, caseID, values, similarity=None):
+        content = {}
+        if similarity is not None:
+            content["similarity"] = str(similarity)
+        content["caseID"] = caseID
+        content.update(values)
+        return content
+
+    def weights(self, concept, function):
+        fct = self.concept(concept)["amalgamationFunctions"].get(function, {})
+        attributes = self.concept(concept)["attributes"]
+        return {a: float(fct.get("weights", {}).get(a, 1.0)) for a in attributes}
+
+    def localSimilarity(self, description, a, b):
+        if a is None or b is None or a == UNKNOWN or b == UNKNOWN:
+            return 0.0
+        if description.get("type") in NUMERIC_TYPES:
+            try:
+                span = float(description["max"]) - float(description["min"])
+                distance = abs(float(a) - float(b))
+            except (KeyError, TypeError, ValueError):
+                return 0.0
+            if span <= 0:
+                return 1.0 if distance == 0 else 0.0
+            return max(0.0, 1.0 - distance / span)
+        return 1.0 if str(a) == str(b) else 0.0
+
+    def similarity(self, concept, weights, query, values):
+        attributes = self.concept(concept)["attributes"]
+        total = sum(weights.values())
+        if total <= 0:
+            return 0.0
+        sim = 0.0
+        for name, weight in weights.items():
+            if weight and name in query:
+                sim += weight * self.localSimilarity(attributes[name], query.get(name), values.get(name))
+        return sim / total
+
+    def inRange(self, concept, query):
+        """False if a numeric query value lies outside its attribute's range; the server's
+        DoubleDesc rejects it, and the retrieval answers with no cases."""
+        attributes = self.concept(concept)["attributes"]
+        for name, value in query.items():
+            description = attributes.get(name, {})
+            if description.get("type") not in NUMERIC_TYPES or value in (None, UNKNOWN):
+                continue
+            low, high = float(description.get("min", "-inf")), float(description.get("max", "inf"))
+            if not low <= float(value) <= high:
+                return False
+        return True
+
+    def retrieve(self, concept, casebase, function, query, k, candidates=None):
+        if not self.inRange(concept, query):
+            return []
+        weights = self.weights(concept, function)
+        scored = []
+        for caseID, values in self.cases(concept, casebase):
+            if candidates is None or caseID in candidates:
+                scored.append((caseID, self.similarity(concept, weights, query, values)))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored if k < 0 else scored[:k]
+
+    def caseValues(self, concept, caseID):
+        """The values of a case of the concept, from whichever casebase holds it."""
+        for cases in self.casebases.values():
+            case = cases.get(caseID)
+            if case is not None and case["concept"] == concept:
+                return case["values"]
+        raise HTTPError(404, "unknown case " + caseID)
+
+    def queryValues(self, concept, casebase, caseID):
+        case = self.casebase(casebase).get(caseID)
+        if case is None or case["concept"] != concept:
+            raise HTTPError(404, "unknown case " + caseID)
+        return case["values"]
+
+    def retrieveByID(self, concept, casebase, function, caseID, k, candidates=None):
+        query = self.queryValues(concept, casebase, caseID)
+        return self.retrieve(concept, casebase, function, query, k, candidates)
+
+    def withContent(self, concept, casebase, results):
+        cases = self.casebase(casebase)
+        return [self.caseContent(caseID, cases[caseID]["values"], sim) for caseID, sim in results]
+
+    def selfSimilarity(self, concept, casebase, function, k, caseIDs=None):
+        if caseIDs is None:
+            caseIDs = [caseID for caseID, _ in self.cases(concept, casebase)]
+        candidates = set(caseIDs)
+        return {caseID: dict(self.retrieveByID(concept, casebase, function, caseID, k, candidates))
+                for caseID in caseIDs}
+
+    def addCases(self, concept, casebase, cases):
+        cb = self.casebase(casebase)
+        attributes = self.concept(concept)["attributes"]
+        for case in cases:
+            for name, value in case.items():
+                # like the server's Integer.parseInt
+                if attributes.get(name, {}).get("type") == "Integer" and value != UNKNOWN \
+                        and not re.fullmatch(r"[+-]?\d+", str(value)):
+                    raise HTTPError(400, "{} is not an integer: {}".format(name, value))
+        counter = len([c for c in cb.values() if c["concept"] == concept])
+        ids = []
+        for case in cases:
+            values = {k: str(v) for k, v in case.items() if k != "caseID"}
+            caseID = case.get("caseID")
+            if caseID is None:
+                counter += 1
+                caseID = "{}-{}{}".format(concept, casebase, counter)
+            cb[caseID] = {"concept": concept, "values": values}
+            ids.append(caseID)
+        return ids
+
+    def caseIDSet(self, handle):
+        if not self.handles:
+            raise HTTPError(404, "no caseID set support")
+        if handle not in self.caseIDSets:
+            raise HTTPError(404, "unknown caseID set " + handle)
+        return self.caseIDSets[handle]
+
+
+def _multipart(data, contentType):
+    """The fields of a multipart/form-data body as a dict of name to bytes."""
+    boundary = re.search(r"boundary=\"?([^\";]+)", contentType).group(1).encode("utf-8")
+    fields = {}
+    for part in data.split(b"--" + boundary)[1:]:
+        if part.startswith(b"--"):
+            break
+        head, _, content = part.partition(b"\r\n\r\n")
+        name = re.search(rb'name="([^"]*)"', head).group(1).decode("utf-8")
+        fields[name] = content[:-2] if content.endswith(b"\r\n") else content
+    return fields
+
+
+def _k(params):
+    return int(params.get("k", "-1"))
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes; with Nagle's algorithm the
+    # body waits for the client's delayed ACK on keep-alive connections
+    disable_nagle_algorithm = True
+
+    routes = []
+
+    @classmethod
+    def route(cls, method, pattern):
+        regex = re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", pattern) + "$")
+
+        def register(fn):
+            cls.routes.append((method, regex, fn))
+            return fn
+        return register
+
+    @property
+    def model(self):
+        return self.server.model
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length == 0:
+            return None
+        data = self.rfile.read(length)
+        contentType = self.headers.get("Content-Type") or ""
+        if contentType.startswith("multipart/form-data"):
+            return _multipart(data, contentType)
+        return json.loads(data.decode("utf-8"))
+
+    def _send(self, status, body=None, headers=None, raw=False):
+        data = b""
+        if body is not None:
+            data = (body if raw else json.dumps(body)).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain" if raw else "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # the client gave up, e.g. after a timeout or a won hedge
+            self.close_connection = True
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+        path = url.path.rstrip("/") or "/"
+        if self.model.pauseRate and random.random() < self.model.pauseRate:
+            time.sleep(self.model.pause)
+        try:
+            for routeMethod, regex, fn in self.routes:
+                match = regex.match(path)
+                if routeMethod == method and match:
+                    args = {k: unquote(v) for k, v in match.groupdict().items()}
+                    body = self._body() if method in ("POST", "PUT") else None
+                    with self.model.lock:
+                        result = fn(self, params, body, **args)
+                    if isinstance(result, tuple):
+                        self._send(*result)
+                    else:
+                        self._send(200, result)
+                    return
+            raise HTTPError(404, "no route for {} {}".format(method, path))
+        except HTTPError as e:
+            self._send(e.status, {"status": e.status, "message": str(e)})
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {"status": 400, "message": str(e)})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+route = StandInHandler.route
+CB = "/concepts/{concept}/casebases/{casebase}"
+AF = CB + "/amalgamationFunctions/{function}"
+EPHEMERAL = "/ephemeral" + AF
+SET = EPHEMERAL + "/caseIDSets/{handle}"
+
+
+@route("GET", "/concepts")
+def getConcepts(h, params, body):
+    return sorted(h.model.concepts)
+
+
+@route("DELETE", "/concepts")
+def deleteConcepts(h, params, body):
+    h.model.concepts.clear()
+    return True
+
+
+@route("PUT", "/concepts/{concept}")
+def putConcept(h, params, body, concept):
+    h.model.concepts.setdefault(concept, {"attributes": {}, "similarityFunctions": {},
+                                          "amalgamationFunctions": {}, "active": None})
+    return True
+
+
+@route("DELETE", "/concepts/{concept}")
+def deleteConcept(h, params, body, concept):
+    return h.model.concepts.pop(concept, None) is not None
+
+
+@route("GET", "/concepts/{concept}/attributes")
+def getAttributes(h, params, body, concept):
+    return {name: desc["type"] + "Desc" for name, desc in h.model.concept(concept)["attributes"].items()}
+
+
+@route("DELETE", "/concepts/{concept}/attributes")
+def deleteAttributes(h, params, body, concept):
+    h.model.concept(concept)["attributes"].clear()
+    return True
+
+
+@route("GET", "/concepts/{concept}/attributes/{attribute}")
+def getAttribute(h, params, body, concept, attribute):
+    return h.model.concept(concept)["attributes"].get(attribute)
+
+
+@route("PUT", "/concepts/{concept}/attributes/{attribute}")
+def putAttribute(h, params, body, concept, attribute):
+    description = json.loads(params.get("attributeJSON", "{}"))
+    if description.get("type") not in NUMERIC_TYPES + ("Symbol", "String"):
+        return False
+    h.model.concept(concept)["attributes"][attribute] = description
+    return True
+
+
+@route("DELETE", "/concepts/{concept}/attributes/{attribute}")
+def deleteAttribute(h, params, body, concept, attribute):
+    return h.model.concept(concept)["attributes"].pop(attribute, None) is not None
+
+
+@route("GET", "/concepts/{concept}/attributes/{attribute}/similarityFunctions")
+def getSimilarityFunctions(h, params, body, concept, attribute):
+    return h.model.concept(concept)["similarityFunctions"].get(attribute, {})
+
+
+@route("PUT", "/concepts/{concept}/attributes/{attribute}/similarityFunctions/{function}")
+def putSimilarityFunction(h, params, body, concept, attribute, function):
+    functions = h.model.concept(concept)["similarityFunctions"].setdefault(attribute, {})
+    functions[function] = {"parameter": float(params.get("parameter", "1.0"))}
+    return True
+
+
+@route("GET", "/concepts/{concept}/amalgamationFunctions")
+def getAmalgamationFunctions(h, params, body, concept):
+    return sorted(h.model.concept(concept)["amalgamationFunctions"])
+
+
+@route("DELETE", "/concepts/{concept}/amalgamationFunctions")
+def deleteAmalgamationFunctions(h, params, body, concept):
+    h.model.concept(concept)["amalgamationFunctions"].clear()
+    return True
+
+
+@route("PUT", "/concepts/{concept}/amalgamationFunctions/{function}")
+def putAmalgamationFunction(h, params, body, concept, function):
+    c = h.model.concept(concept)
+    weights = json.loads(params.get("attributeWeights", "{}"))
+    for name, weight in weights.items():
+        try:
+            float(weight)
+        except (TypeError, ValueError):
+            raise HTTPError(400, "weight of {} is not a number".format(name))
+        if name not in c["attributes"]:
+            raise HTTPError(400, "no attribute named " + name)
+    c["amalgamationFunctions"][function] = {"type": params["amalgamationFunctionType"], "weights": weights}
+    c["active"] = function
+    return True
+
+
+@route("PUT", "/concepts/{concept}/neuralAmalgamationFunctions/{function}")
+def putNeuralAmalgamationFunction(h, params, body, concept, function):
+    c = h.model.concept(concept)
+    digest = params.get("modelHash")
+    if body:
+        h.model.uploads += 1
+        actual = hashlib.sha256(body["jsonfile"] + body["h5file"]).hexdigest()
+        if digest is not None and digest != actual:
+            raise HTTPError(400, "content hash is " + actual)
+        digest = actual
+        h.model.neuralModels[digest] = len(body["jsonfile"]) + len(body["h5file"])
+    elif digest not in h.model.neuralModels:
+        raise HTTPError(404, "unknown model {}".format(digest))
+    config = "NEURAL_NETWORK_SOLUTION_GABEL" if "gabel" in params.get("type", "direct") \
+        else "NEURAL_NETWORK_SOLUTION_DIRECTLY"
+    c["amalgamationFunctions"][function] = {"type": config, "model": digest}
+    c["active"] = function
+    return 200, "Successfully uploaded", None, True
+
+
+@route("DELETE", "/concepts/{concept}/amalgamationFunctions/{function}")
+def deleteAmalgamationFunction(h, params, body, concept, function):
+    return h.model.concept(concept)["amalgamationFunctions"].pop(function, None) is not None
+
+
+@route("POST", "/analytics/concepts/{concept}/amalgamationFunctions/{function}/localSimComparisons")
+def localSimComparisons(h, params, body, concept, function):
+    attributes = h.model.concept(concept)["attributes"]
+    results = []
+    for first, second in body:
+        a, b = h.model.caseValues(concept, first), h.model.caseValues(concept, second)
+        results.append({name: h.model.localSimilarity(attributes[name], a.get(name), b.get(name))
+                        for name in sorted(attributes)})
+    return results
+
+
+@route("GET", "/analytics/concepts/{concept}/amalgamationFunctions/{function}/globalWeights")
+def globalWeights(h, params, body, concept, function):
+    weights = h.model.weights(concept, params.get("amalgamationFunctionID", function))
+    return [{name: weight} for name, weight in sorted(weights.items())]
+
+
+@route("GET", "/casebases")
+def getCaseBases(h, params, body):
+    return sorted(h.model.casebases)
+
+
+@route("PUT", "/casebases/{casebase}")
+def putCaseBase(h, params, body, casebase):
+    if casebase in h.model.casebases:
+        return False
+    h.model.casebases[casebase] = {}
+    return True
+
+
+@route("DELETE", "/casebases/{casebase}")
+def deleteCaseBase(h, params, body, casebase):
+    return h.model.casebases.pop(casebase, None) is not None
+
+
+@route("GET", "/concepts/{concept}/cases")
+def getConceptCases(h, params, body, concept):
+    return [h.model.caseContent(caseID, case["values"])
+            for cb in h.model.casebases.values() for caseID, case in cb.items()
+            if case["concept"] == concept]
+
+
+@route("GET", CB + "/cases")
+def getCases(h, params, body, concept, casebase):
+    offset = int(params.get("offset", "0"))
+    limit = int(params.get("limit", "-1"))
+    cases = h.model.cases(concept, casebase)
+    cases = cases[offset:] if limit < 0 else cases[offset:offset + limit]
+    listing = [h.model.caseContent(caseID, values, 1.0) for caseID, values in cases]
+    etag = '"0' + hashlib.md5(json.dumps(listing).encode("utf-8")).hexdigest() + '"'
+    if h.headers.get("If-None-Match") == etag:
+        return 304, None, {"ETag": etag}
+    return 200, listing, {"ETag": etag}
+
+
+@route("POST", CB + "/cases")
+def postCases(h, params, body, concept, casebase):
+    h.model.concept(concept)
+    if casebase not in h.model.casebases:
+        return []
+    return h.model.addCases(concept, casebase, body["cases"])
+
+
+@route("DELETE", CB + "/cases")
+def deleteCases(h, params, body, concept, casebase):
+    if casebase not in h.model.casebases:
+        return False
+    h.model.casebases[casebase] = {}
+    return True
+
+
+@route("DELETE", CB + "/cases/casesByPattern")
+def deleteCasesByPattern(h, params, body, concept, casebase):
+    if casebase not in h.model.casebases:
+        return False
+    pattern = re.compile(re.escape(params.get("pattern", "*")).replace(r"\*", ".*"))
+    cb = h.model.casebases[casebase]
+    for caseID in [c for c in cb if pattern.fullmatch(c)]:
+        del cb[caseID]
+    return True
+
+
+@route("GET", CB + "/cases/{caseID}")
+def getCase(h, params, body, concept, casebase, caseID):
+    return h.model.caseContent(caseID, h.model.queryValues(concept, casebase, caseID))
+
+
+@route("PUT", CB + "/cases/{caseID}")
+def putCase(h, params, body, concept, casebase, caseID):
+    if casebase not in h.model.casebases:
+        return False
+    h.model.addCases(concept, casebase, [dict(body, caseID=caseID)])
+    return True
+
+
+@route("DELETE", CB + "/cases/{caseID}")
+def deleteCase(h, params, body, concept, casebase, caseID):
+    if casebase not in h.model.casebases:
+        return False
+    return h.model.casebases[casebase].pop(caseID, None) is not None
+
+
+@route("GET", AF + "/retrievalByCaseID")
+def retrievalByCaseID(h, params, body, concept, casebase, function):
+    return dict(h.model.retrieveByID(concept, casebase, function, params["caseID"], _k(params)))
+
+
+@route("GET", AF + "/retrievalByAttribute")
+def retrievalByAttribute(h, params, body, concept, casebase, function):
+    query = {params["Symbol attribute name"]: params["value"]}
+    return {"similarCases": dict(h.model.retrieve(concept, casebase, function, query, _k(params)))}
+
+
+@route("POST", AF + "/retrievalByMultipleCaseIDs")
+def retrievalByMultipleCaseIDs(h, params, body, concept, casebase, function):
+    return {caseID: dict(h.model.retrieveByID(concept, casebase, function, caseID, _k(params)))
+            for caseID in body}
+
+
+@route("GET", AF + "/retrievalByCaseIDWithContent")
+def retrievalByCaseIDWithContent(h, params, body, concept, casebase, function):
+    results = h.model.retrieveByID(concept, casebase, function, params["caseID"], _k(params))
+    return h.model.withContent(concept, casebase, results)
+
+
+@route("POST", AF + "/retrievalByMultipleAttributes")
+def retrievalByMultipleAttributes(h, params, body, concept, casebase, function):
+    query = {k: str(v) for k, v in body.items()}
+    results = h.model.retrieve(concept, casebase, function, query, _k(params))
+    return h.model.withContent(concept, casebase, results)
+
+
+@route("POST", AF + "/retrievalByMultipleQueries")
+def retrievalByMultipleQueries(h, params, body, concept, casebase, function):
+    return [dict(h.model.retrieve(concept, casebase, function, {k: str(v) for k, v in query.items()}, _k(params)))
+            for query in body]
+
+
+@route("GET", CB + "/computeSelfSimilarity")
+def computeSelfSimilarity(h, params, body, concept, casebase):
+    function = params.get("amalgamationFunctionID") or h.model.concept(concept)["active"]
+    return h.model.selfSimilarity(concept, casebase, function, _k(params))
+
+
+@route("POST", EPHEMERAL + "/retrievalByCaseIDWithContent")
+def ephemeralRetrievalWithContent(h, params, body, concept, casebase, function):
+    results = h.model.retrieveByID(concept, casebase, function, params["caseID"], _k(params), set(body))
+    return h.model.withContent(concept, casebase, results)
+
+
+@route("POST", EPHEMERAL + "/retrievalByCaseIDs")
+def ephemeralRetrieval(h, params, body, concept, casebase, function):
+    candidates = set(body["ephemeralCaseIDs"])
+    return {caseID: dict(h.model.retrieveByID(concept, casebase, function, caseID, _k(params), candidates))
+            for caseID in body["queryCaseIDs"]}
+
+
+@route("POST", EPHEMERAL + "/computeSelfSimilarity")
+def ephemeralSelfSimilarity(h, params, body, concept, casebase, function):
+    return h.model.selfSimilarity(concept, casebase, function, _k(params), sorted(set(body)))
+
+
+@route("POST", "/ephemeral/caseIDSets")
+def postCaseIDSet(h, params, body):
+    if not h.model.handles:
+        raise HTTPError(404, "no caseID set support")
+    handle = caseIDSetID(body)
+    h.model.caseIDSets[handle] = frozenset(body)
+    return 200, handle, None, True
+
+
+@route("GET", "/ephemeral/caseIDSets/{handle}")
+def getCaseIDSet(h, params, body, handle):
+    return len(h.model.caseIDSet(handle))
+
+
+@route("DELETE", "/ephemeral/caseIDSets/{handle}")
+def deleteCaseIDSet(h, params, body, handle):
+    h.model.caseIDSet(handle)
+    return h.model.caseIDSets.pop(handle, None) is not None
+
+
+@route("GET", SET + "/retrievalByCaseIDWithContent")
+def caseIDSetRetrievalWithContent(h, params, body, concept, casebase, function, handle):
+    candidates = h.model.caseIDSet(handle)
+    results = h.model.retrieveByID(concept, casebase, function, params["caseID"], _k(params), candidates)
+    return h.model.withContent(concept, casebase, results)
+
+
+@route("POST", SET + "/retrievalByCaseIDs")
+def caseIDSetRetrieval(h, params, body, concept, casebase, function, handle):
+    candidates = h.model.caseIDSet(handle)
+    return {caseID: dict(h.model.retrieveByID(concept, casebase, function, caseID, _k(params), candidates))
+            for caseID in body}
+
+
+@route("GET", SET + "/computeSelfSimilarity")
+def caseIDSetSelfSimilarity(h, params, body, concept, casebase, function, handle):
+    return h.model.selfSimilarity(concept, casebase, function, _k(params), sorted(h.model.caseIDSet(handle)))
+
+
+class StandInServer():
+    """Run the stand-in on a background thread.
+
+    :param port: port to listen on; 0 picks a free port
+    :param handles: False to emulate a server without caseID set support
+    :param pause: length in seconds of emulated GC pauses
+    :param pauseRate: fraction of requests delayed by a pause
+    """
+
+    def __init__(self, port=0, handles=True, model=None, pause=0.0, pauseRate=0.0):
+        self.model = model if model is not None else StandInModel(handles, pause, pauseRate)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), StandInHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.model = self.model
+        self.thread = None
+
+    @property
+    def host(self):
+        return "127.0.0.1:{}".format(self.httpd.server_address[1])
+
+    @property
+    def url(self):
+        return "http://" + self.host
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-memory stand-in for the mycbr-rest server")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--no-handles", action="store_true", help="disable caseID set support")
+    args = parser.parse_args()
+    server = StandInServer(args.port, handles=not args.no_handles)
+    print("mycbr-rest stand-in listening on {}".format(server.url))
+    server.httpd.serve_forever()
@@ -0,0 +1,200 @@
+"""
+Delete a project, or part of one, with few round trips.
+
+    from mycbrwrapper.teardown import Teardown
+    Teardown("localhost:8080").run()                      # everything
+    Teardown("localhost:8080").run(concepts=["car"])      # some concepts
+    Teardown("localhost:8080").deleteCases(["cb"], "tmp-*")
+
+Cases are removed with one bulk DELETE per casebase instead of one call
+per case. The remaining deletes run concurrently in dependency order
+(cases, then amalgamation functions, attributes, concepts and finally
+casebases); deleting all concepts is a single DELETE /concepts, which
+takes their functions and attributes with them.
+"""
+
+from mycbrwrapper.fingerprint import getFingerprint
+from mycbrwrapper.provisioning import Task, runGraph
+from mycbrwrapper.rest import getRequest
+from concurrent.futures import ThreadPoolExecutor
+import re
+
+
+def _matcher(pattern):
+    """Matches caseIDs against a pattern where * stands for any characters, as the server does."""
+    return re.compile(re.escape(pattern).replace(r"\*", ".*")).fullmatch
+
+
+class Teardown():
+    """Bulk and concurrent deletion of concepts, casebases and cases.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param workers: number of concurrent requests
+    """
+
+    def __init__(self, host, workers=16):
+        self.host = host
+        self.workers = workers
+
+    def _delete(self, call, params=None):
+        result = call.DELETE(params=params)
+        result.raise_for_status()
+        return result.json()
+
+    def inventory(self):
+        """The concepts and casebases on the server, fetched concurrently.
+
+        :rtype: tuple of (list of concept names, list of casebase names)
+        """
+        api = getRequest(self.host)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            concepts, casebases = pool.map(lambda call: call.GET(), [api.concepts, api.casebases])
+        concepts.raise_for_status()
+        casebases.raise_for_status()
+        return list(concepts.json()), list(casebases.json())
+
+    def _deleteCases(self, concepts, casebase, pattern):
+        """Delete the cases of one casebase and update the fingerprints of its concepts."""
+        cases = getRequest(self.host).concepts(concepts[0]).casebases(casebase).cases
+        if pattern == "*":
+            result = self._delete(cases)
+        else:
+            result = self._delete(cases.casesByPattern, {"pattern": pattern})
+        matches = _matcher(pattern)
+        for concept in concepts:
+            fingerprint = getFingerprint(self.host, concept, casebase)
+            if pattern == "*":
+                fingerprint.cleared()
+            else:
+                for caseID in [c for c in list(fingerprint.digests) if matches(c)]:
+                    fingerprint.caseRemoved(caseID)
+        return result
+
+    def caseTasks(self, concepts, casebases, pattern="*"):
+        """One bulk case delete per casebase.
+
+        The server deletes the cases of a casebase whatever concept is
+        named in the path, so `concepts` only needs to be non-empty; its
+        fingerprints are updated.
+
+        :rtype: list of provisioning.Task
+        """
+        if not concepts:
+            return []
+        return [Task("cases:" + cb, lambda cb=cb: self._deleteCases(concepts, cb, pattern)) for cb in casebases]
+
+    def _caseIDs(self, concept, casebase=None):
+        api = getRequest(self.host).concepts(concept)
+        result = (api.cases if casebase is None else api.casebases(casebase).cases).GET()
+        result.raise_for_status()
+        return {case["caseID"] for case in result.json()}
+
+    def usage(self, concepts, remoteConcepts, casebases):
+        """Find the casebases that hold cases of `concepts`.
+
+        The server lists every case of a casebase whatever concept is in
+        the path, the stand-in only those of the concept; listing them for
+        all `remoteConcepts` works with both.
+
+        :returns: (casebases holding only cases of `concepts`, dict of the
+            other casebases holding some to the caseIDs of `concepts` in them)
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            owned = set().union(*pool.map(self._caseIDs, concepts))
+            listings = {cb: pool.map(lambda c, cb=cb: self._caseIDs(c, cb), remoteConcepts) for cb in casebases}
+            listings = {cb: set().union(*listing) for cb, listing in listings.items()}
+        exclusive, shared = [], {}
+        for cb in casebases:
+            mine = listings[cb] & owned
+            if mine and listings[cb] <= owned:
+                exclusive.append(cb)
+            elif mine:
+                shared[cb] = sorted(mine)
+        return exclusive, shared
+
+    def _deleteCaseIDs(self, concepts, casebase, caseIDs):
+        """Delete single cases of a casebase that other concepts' cases share.
+
+        :raises RuntimeError: if the server did not delete some of them
+        """
+        cases = getRequest(self.host).concepts(concepts[0]).casebases(casebase).cases
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(lambda caseID: self._delete(cases(caseID)), caseIDs))
+        deleted = [caseID for caseID, result in zip(caseIDs, results) if result is True]
+        for concept in concepts:
+            fingerprint = getFingerprint(self.host, concept, casebase)
+            for caseID in deleted:
+                fingerprint.caseRemoved(caseID)
+        if len(deleted) < len(caseIDs):
+            kept = sorted(set(caseIDs) - set(deleted))
+            raise RuntimeError("the server did not delete cases {} of casebase {}".format(kept, casebase))
+        return True
+
+    def tasks(self, concepts=None, casebases=None, keepCaseBases=False):
+        """The delete operations of run() as a dependency graph.
+
+        When only `concepts` are given, only the casebases holding nothing
+        but their cases are deleted; their cases in casebases shared with
+        other concepts are deleted one by one.
+
+        :param concepts: names of the concepts to delete (default: all, with one call)
+        :param casebases: names of the casebases to delete (default: all,
+            or those of `concepts` if given)
+        :param keepCaseBases: only delete the cases of the casebases
+        :rtype: list of provisioning.Task
+        """
+        everything = concepts is None
+        shared = {}
+        if concepts is None or casebases is None:
+            remoteConcepts, remoteCaseBases = self.inventory()
+            if concepts is None:
+                concepts = remoteConcepts
+            if casebases is None:
+                casebases = remoteCaseBases
+                if not everything:
+                    casebases, shared = self.usage(concepts, remoteConcepts, remoteCaseBases)
+        api = getRequest(self.host)
+        tasks = self.caseTasks(concepts, casebases)
+        tasks += [Task("cases:" + cb, lambda cb=cb, ids=ids: self._deleteCaseIDs(concepts, cb, ids))
+                  for cb, ids in shared.items()]
+        cases = [t.name for t in tasks]
+        if everything:
+            if concepts:
+                tasks.append(Task("concepts", lambda: self._delete(api.concepts), cases))
+        else:
+            for c in concepts:
+                tasks += [Task("functions:" + c, lambda c=c: self._delete(api.concepts(c).amalgamationFunctions),
+                               cases),
+                          Task("attributes:" + c, lambda c=c: self._delete(api.concepts(c).attributes),
+                               ["functions:" + c]),
+                          Task("concept:" + c, lambda c=c: self._delete(api.concepts(c)), ["attributes:" + c])]
+        if keepCaseBases:
+            return tasks
+        removed = [t.name for t in tasks if t.name == "concepts" or t.name.startswith("concept:")]
+        tasks += [Task("casebase:" + cb, lambda cb=cb: self._delete(api.casebases(cb)), removed)
+                  for cb in casebases]
+        return tasks
+
+    def run(self, concepts=None, casebases=None, keepCaseBases=False):
+        """Delete concepts and casebases with their cases (default: the whole project).
+
+        :returns: dict of task name (e.g. "cases:cb", "concept:car") to the server's answer
+        """
+        return runGraph(self.tasks(concepts, casebases, keepCaseBases), workers=self.workers)
+
+    def deleteCases(self, casebases=None, pattern="*", concepts=None):
+        """Delete the cases matching a pattern (* stands for any characters) from casebases, concurrently.
+
+        :param casebases: names of the casebases (default: all)
+        :param concepts: names of the concepts whose fingerprints to update (default: all)
+        """
+        if concepts is None or casebases is None:
+            remoteConcepts, remoteCaseBases = self.inventory()
+            concepts = remoteConcepts if concepts is None else concepts
+            casebases = remoteCaseBases if casebases is None else casebases
+        return runGraph(self.caseTasks(concepts, casebases, pattern), workers=self.workers)
+
+
+def resetProject(host, workers=16):
+    """Delete all concepts, casebases and cases of the project on `host`."""
+    return Teardown(host, workers).run()
@@ -0,0 +1,162 @@
+"""
+Isolated test projects, provisioned once per process.
+
+    project = testProject("wind")          # or subclass test_base.CBRTestCase
+    api = getRequest(project.host)
+    api.concepts(project.concept).casebases(project.casebase)...
+
+Every project gets concept and casebase names of its own (the name in
+the spec, the pytest-xdist worker and a random suffix), so test classes
+and xdist workers never see each other's data and can run concurrently
+against the same server. A project is provisioned with the Provisioner
+on first use and shared by every test of the process after that;
+testProjects() provisions several at once. They are torn down when the
+process exits.
+
+The server is MYCBR_TEST_HOST (e.g. localhost:8080) if set, otherwise a
+StandInServer started in the process:
+
+    python -m pytest -n auto mycbrwrapper/tests                            # stand-in per worker
+    MYCBR_TEST_HOST=localhost:8080 python -m pytest -n auto mycbrwrapper/tests
+"""
+
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.teardown import Teardown
+from concurrent.futures import Future, ThreadPoolExecutor
+import atexit
+import copy
+import os
+import threading
+import uuid
+import warnings
+
+WIND = {"concepts": {"testconcept": {
+    "attributes": {"wind_speed": {"type": "Double", "min": 0, "max": 25},
+                   "wind_from_direction": {"type": "Double", "min": 0, "max": 361},
+                   "wind_effect": {"type": "Double", "min": 0, "max": 40}},
+    "similarityFunctions": {"wind_speed": {"testLocalSimilarityFunction": {"parameter": 4.5}}},
+    "amalgamationFunctions": {"testAmalgmamationSimilarityFunction1": {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+    "cases": {"unittestCB": [
+        {"caseID": "w0", "wind_speed": "0", "wind_from_direction": "0", "wind_effect": "0"},
+        {"caseID": "w1", "wind_speed": "5.2", "wind_from_direction": "279", "wind_effect": "5.3"},
+        {"caseID": "w2", "wind_speed": "2.1", "wind_from_direction": "339", "wind_effect": "1.05"}]}}}}
+
+SPECS = {"wind": WIND}
+
+_lock = threading.Lock()
+_host = None
+_projects = {}
+_registered = []
+
+
+def testHost():
+    """The server the tests run against (started on first use if it is the stand-in)."""
+    global _host
+    with _lock:
+        if _host is None:
+            _host = os.environ.get("MYCBR_TEST_HOST")
+            if not _host:
+                from mycbrwrapper.standin import StandInServer
+                server = StandInServer().start()
+                atexit.register(server.stop)
+                _host = server.host
+        return _host
+
+
+def uniqueName(name):
+    """`name` made unique to this process and call, e.g. testconcept_gw3_5f0c9a1e."""
+    return "{}_{}_{}".format(name, os.environ.get("PYTEST_XDIST_WORKER", "main"), uuid.uuid4().hex[:8])
+
+
+class TestProject():
+    """A copy of a project spec with unique concept and casebase names.
+
+    :param host: hostname of the API server
+    :param spec: the project spec (see mycbrwrapper.provisioning)
+    """
+
+    __test__ = False
+
+    def __init__(self, host, spec):
+        self.host = host
+        self.names = {}
+        spec = copy.deepcopy(spec)
+        casebases = list(spec.get("casebases", []))
+        for cspec in spec.get("concepts", {}).values():
+            casebases += [cb for cb in cspec.get("cases", {}) if cb not in casebases]
+        for name in list(spec.get("concepts", {})) + casebases:
+            self.names[name] = uniqueName(name)
+        spec["casebases"] = [self.names[cb] for cb in casebases]
+        spec["concepts"] = {self.names[c]: dict(cspec, cases={self.names[cb]: cases
+                                                               for cb, cases in cspec.get("cases", {}).items()})
+                            for c, cspec in spec.get("concepts", {}).items()}
+        self.spec = spec
+        self.concepts = list(spec["concepts"])
+        self.casebases = spec["casebases"]
+
+    @property
+    def concept(self):
+        """The (first) concept."""
+        return self.concepts[0]
+
+    @property
+    def casebase(self):
+        """The (first) casebase."""
+        return self.casebases[0]
+
+    @property
+    def amalgamationFunction(self):
+        """The active amalgamation function of the first concept (the last one in the spec)."""
+        functions = list(self.spec["concepts"][self.concept].get("amalgamationFunctions", {}))
+        return functions[-1] if functions else None
+
+    def provision(self):
+        Provisioner(self.host, self.spec).run()
+        return self
+
+    def teardown(self):
+        Teardown(self.host).run(concepts=self.concepts, casebases=self.casebases)
+
+
+def teardownAll():
+    """Tear down the projects of this process."""
+    with _lock:
+        futures = list(_projects.values())
+        _projects.clear()
+    for future in futures:
+        if future.done() and future.exception() is None:
+            try:
+                future.result().teardown()
+            except Exception as e:
+                warnings.warn("could not tear down test project: {}".format(e))
+
+
+def testProjects(*names):
+    """Provision the named projects of SPECS in parallel, or reuse them if this process already has.
+
+    :returns: list of TestProject, in the order of `names`
+    """
+    host = testHost()
+    mine = {}
+    with _lock:
+        if not _registered:
+            # Teardown needs worker threads, which are refused once atexit handlers run
+            getattr(threading, "_register_atexit", atexit.register)(teardownAll)
+            _registered.append(True)
+        for name in names:
+            if name not in _projects:
+                _projects[name] = mine[name] = Future()
+    if mine:
+        with ThreadPoolExecutor(max_workers=len(mine)) as pool:
+            started = {name: pool.submit(TestProject(host, SPECS[name]).provision) for name in mine}
+            for name, provisioning in started.items():
+                try:
+                    mine[name].set_result(provisioning.result())
+                except Exception as e:
+                    mine[name].set_exception(e)
+    return [_projects[name].result() for name in names]
+
+
+def testProject(name="wind"):
+    """The project `name` of SPECS for this process (see testProjects)."""
+    return testProjects(name)[0]
@@ -1,7 +1,9 @@
 from mycbrwrapper.concepts import Concepts
+import os
+import tempfile
 import unittest
+from mycbrwrapper.tests import fixtures
 from mycbrwrapper.tests.test_base import CBRTestCase
-defaulthost = "localhost:8080"
 
 __name__ = "test_amalgamationfunctions"
 
@@ -19,16 +21,22 @@ class NeuralAmalgmationTest(CBRTestCase):
         super(NeuralAmalgmationTest, self).__init__(*args, **kwargs)
 
     def test_create_and_delete_neural_amalgamation_function(self):
-        print("in test")
-        cs = Concepts(defaulthost)
-        conceptstring = "test_concept_test1"
+        cs = Concepts(self.host)
+        conceptstring = fixtures.uniqueName("test_concept_test1")
         amalstring = "neuralamal"
-        filesDict = {"h5": "/home/epic/research/dataGetters/balanced_operationalmodel.h5",
-                     "json": "/home/epic/research/dataGetters/balanced_operationalmodel.json"}
-        c = cs.addConcept(conceptstring)
-        c.addNeuralAmalgamationFunction(amalstring,filesDict)
-        #c.addNeuralAmalgamationFunction(amalstring)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filesDict = {"h5": os.path.join(tmpdir, "model.h5"), "json": os.path.join(tmpdir, "model.json")}
+            with open(filesDict["json"], "w") as f:
+                f.write('{"class_name": "Model"}')
+            with open(filesDict["h5"], "wb") as f:
+                f.write(os.urandom(1 << 10))
+            c = cs.addConcept(conceptstring)
+            c.addNeuralAmalgamationFunction(amalstring, filesDict)
+        functions = self.api().concepts(conceptstring).amalgamationFunctions.GET()
+        self.assertEqual(functions.status_code, 200)
+        self.assertIn(amalstring, functions.json())
         cs.deleteConcept(conceptstring)
+        self.assertNotIn(conceptstring, self.api().concepts.GET().json())
 
 if __name__ == "__main__":
     unittest.main()
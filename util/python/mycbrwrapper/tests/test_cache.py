@@ -0,0 +1,58 @@
+from mycbrwrapper.cache import RetrievalCache
+import os
+import tempfile
+import threading
+import unittest
+
+
+class RetrievalCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "retrieval.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_roundtrip_and_fingerprint(self):
+        cache = RetrievalCache(self.path)
+        url = "http://localhost:8080/concepts/car/casebases/cb/amalgamationFunctions/f/retrievalByCaseID?caseID=car0&k=-1"
+        self.assertIsNone(cache.get(url, fingerprint="v1"))
+        cache.put(url, {"car0": 1.0, "car1": 0.5}, fingerprint="v1")
+        self.assertEqual(cache.get(url, fingerprint="v1"), {"car0": 1.0, "car1": 0.5})
+        self.assertIsNone(cache.get(url, fingerprint="v2"))
+        cache.invalidate("v1")
+        self.assertIsNone(cache.get(url, fingerprint="v1"))
+
+    def test_shared_between_instances(self):
+        RetrievalCache(self.path).put("a", [1, 2, 3], params=["car0"])
+        self.assertEqual(RetrievalCache(self.path).get("a", params=["car0"]), [1, 2, 3])
+
+    def test_lru_eviction(self):
+        cache = RetrievalCache(self.path, maxEntries=3, evictEvery=1)
+        for i in range(3):
+            cache.put("e{}".format(i), i)
+        cache.get("e0")
+        cache.put("e3", 3)
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get("e1"))
+        self.assertEqual(cache.get("e0"), 0)
+
+    def test_concurrent_writers(self):
+        cache = RetrievalCache(self.path, maxEntries=50, evictEvery=10)
+
+        def write(offset):
+            for i in range(100):
+                cache.put("t{}-{}".format(offset, i), {"i": i})
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        cache.evict()
+        self.assertEqual(len(cache), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
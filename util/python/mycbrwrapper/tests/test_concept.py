@@ -4,8 +4,6 @@ from mycbrwrapper.tests.test_base import *
 
 __name__ = "test_concept"
 
-defaulthost = "localhost:8080"
-
 class ConceptTest(CBRTestCase):
 
     @classmethod
@@ -20,7 +18,7 @@ class ConceptTest(CBRTestCase):
         super(ConceptTest, self).__init__(*args, **kwargs)
 
     def test_create_and_delete_concept(self):
-        c = Concepts(defaulthost)
-        conceptstring = "test_concept_test1"
+        c = Concepts(self.host)
+        conceptstring = fixtures.uniqueName("test_concept_test1")
         c.addConcept(conceptstring)
         c.deleteConcept(conceptstring)
@@ -0,0 +1,91 @@
+from mycbrwrapper import recorder
+from mycbrwrapper.dataset_to_sklearn import MyCBRClassifier, MyCBRRegressor
+from mycbrwrapper.standin import StandInServer
+import os
+import pickle
+import tempfile
+import unittest
+
+
+def dataset(n=60):
+    import numpy as np
+    rng = np.random.RandomState(0)
+    X = rng.rand(n, 3) * 10
+    return X, np.where(X[:, 0] > 5, "high", "low"), X[:, 0] * 2
+
+
+class SklearnTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_classifier(self):
+        X, labels, _ = dataset()
+        clf = MyCBRClassifier(host=self.server.host, n_neighbors=3).fit(X[:40], labels[:40])
+        self.assertGreater(clf.score(X[40:], labels[40:]), 0.6)
+        distances, indices = clf.kneighbors(X[:2], n_neighbors=1)
+        self.assertEqual(indices[:, 0].tolist(), [0, 1])
+        self.assertAlmostEqual(distances[0, 0], 0.0)
+        probabilities = clf.predict_proba(X[40:])
+        self.assertTrue(((probabilities.sum(axis=1) - 1.0) ** 2 < 1e-12).all())
+        restored = pickle.loads(pickle.dumps(clf))
+        self.assertEqual(restored.predict(X[40:]).tolist(), clf.predict(X[40:]).tolist())
+
+    def test_regressor_grid_search(self):
+        from sklearn.model_selection import GridSearchCV
+        X, _, values = dataset()
+        search = GridSearchCV(MyCBRRegressor(host=self.server.host), {"n_neighbors": [1, 5]}, cv=3, n_jobs=2)
+        search.fit(X, values)
+        self.assertGreater(search.best_score_, 0.5)
+        self.assertEqual(len(self.server.model.casebases), 4)
+        # every fold's concept has the attribute ranges of that fold's rows
+        for casebase in self.server.model.casebases.values():
+            concepts = {case["concept"] for case in casebase.values()}
+            self.assertEqual(len(concepts), 1)
+            attributes = self.server.model.concept(concepts.pop())["attributes"]
+            for name, attribute in attributes.items():
+                observed = [float(case["values"][name]) for case in casebase.values()]
+                self.assertEqual((attribute["min"], attribute["max"]), (min(observed), max(observed)))
+
+    def test_refit_on_other_ranges(self):
+        X, _, values = dataset()
+        first = MyCBRRegressor(host=self.server.host).fit(X, values)
+        second = MyCBRRegressor(host=self.server.host).fit(X * 100, values)
+        self.assertNotEqual(first.concept_, second.concept_)
+        attribute = self.server.model.concept(second.concept_)["attributes"]["x0"]
+        self.assertEqual((attribute["min"], attribute["max"]), (X[:, 0].min() * 100, X[:, 0].max() * 100))
+
+    def test_out_of_range_rows(self):
+        X, _, values = dataset()
+        low = X[:, 0] < 5
+        reg = MyCBRRegressor(host=self.server.host, n_neighbors=3).fit(X[low], values[low])
+        # the server answers queries outside the attribute ranges with no cases at all
+        self.assertEqual(reg._retrieve({"x0": "9.5"}, 3), [])
+        indices, similarities = reg._neighbours(X[~low])
+        self.assertTrue((indices >= 0).all())
+        # clamped to the largest x0 of the training rows, the predictions lean to its targets instead of
+        # being the mean of all targets
+        self.assertGreater(reg.predict(X[~low]).mean(), values[low].mean() + 2)
+
+    def test_batched_retrieval(self):
+        X, labels, _ = dataset()
+        clf = MyCBRClassifier(host=self.server.host, batchsize=8).fit(X[:40], labels[:40])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "calls.log")
+            recorder.startRecording(path)
+            try:
+                batched = clf.predict_proba(X[40:])
+            finally:
+                recorder.stopRecording()
+            paths = [entry["p"].split("?")[0].rsplit("/", 1)[-1] for entry in recorder.readLog(path)]
+        self.assertEqual(paths, ["retrievalByMultipleQueries"] * 3)
+        # servers without the batch endpoint get one request per row
+        clf._retrieveBatch = lambda queries, k: None
+        self.assertEqual(clf.predict_proba(X[40:]).tolist(), batched.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+from mycbrwrapper.evaluation import Evaluation, EvaluationResult, kFolds
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.standin import StandInServer
+import unittest
+
+
+def provision(server):
+    cases = [{"caseID": "c{}".format(i), "x": str(i), "label": "low" if i < 6 else "high"} for i in range(12)]
+    spec = {"concepts": {"testconcept": {
+        "attributes": {"x": {"type": "Double", "min": 0, "max": 12},
+                       "label": {"type": "Symbol", "allowedValues": ["low", "high"]}},
+        "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+        "cases": {"unittestCB": cases}}}}
+    Provisioner(server.host, spec).run()
+
+
+class EvaluationTest(unittest.TestCase):
+
+    def evaluation(self, server, target="label"):
+        return Evaluation(server.host, "testconcept", "unittestCB", "testAmalgamation", target, k=2, batchsize=5)
+
+    def test_leave_one_out(self):
+        with StandInServer() as server:
+            provision(server)
+            metrics = self.evaluation(server).leaveOneOut().metrics()
+            self.assertEqual(metrics["queries"], 12)
+            self.assertGreater(metrics["accuracy"], 0.8)
+            self.assertNotIn("meanAbsoluteError", metrics)
+            self.assertLess(self.evaluation(server, "x").leaveOneOut().meanAbsoluteError(weighted=False), 1.0)
+
+    def test_folds_match_leave_one_out(self):
+        for handles in (True, False):
+            with StandInServer(handles=handles) as server:
+                provision(server)
+                evaluation = self.evaluation(server)
+                expected = evaluation.leaveOneOut().metrics()
+                self.assertEqual(evaluation.crossValidate(folds=12).metrics(), expected)
+                self.assertEqual(evaluation.crossValidate(folds=3).metrics()["queries"], 12)
+
+    def test_metrics(self):
+        result = EvaluationResult(["a", "b", "c"], ["x", "y", "_unknown_"],
+                                  [["x", "y"], ["x", "x"], ["y", "y"]], [[0.9, 0.5], [0.8, 0.7], [1.0, 1.0]])
+        self.assertEqual(list(result.predictions()), ["x", "x", "y"])
+        self.assertEqual(result.accuracy(), 0.5)
+        self.assertEqual(result.precisionAtK(), 0.25)
+        self.assertEqual(sorted(map(len, kFolds(range(10), 3))), [3, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
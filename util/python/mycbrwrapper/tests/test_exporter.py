@@ -0,0 +1,79 @@
+from mycbrwrapper.exporter import CaseBaseExporter, caseBaseSchema, exportCaseBases
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.standin import StandInServer
+import os
+import tempfile
+import unittest
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+@unittest.skipUnless(pyarrow, "pyarrow is not importable")
+class ExporterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+        def cases(prefix, n):
+            return [{"caseID": "{}{:03d}".format(prefix, i), "x": str(i * 0.5), "n": str(i),
+                     "color": "red" if i % 2 else "blue"} if i % 7 else
+                    {"caseID": "{}{:03d}".format(prefix, i), "x": "_unknown_", "color": "_unknown_"}
+                    for i in range(n)]
+        spec = {"concepts": {"testconcept": {
+            "attributes": {"x": {"type": "Double", "min": 0, "max": 100},
+                           "n": {"type": "Integer", "min": 0, "max": 200},
+                           "color": {"type": "Symbol", "allowedValues": ["red", "blue"]}},
+            "cases": {"first": cases("a", 23), "second": cases("b", 40)}}}}
+        Provisioner(self.server.host, spec).run()
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def test_schema(self):
+        import pyarrow as pa
+        schema = caseBaseSchema(self.server.host, "testconcept")
+        self.assertEqual(schema.names, ["caseID", "color", "n", "x"])
+        self.assertEqual([schema.field(name).type for name in schema.names],
+                         [pa.string(), pa.string(), pa.int64(), pa.float64()])
+
+    def test_pages_and_row_groups(self):
+        import pyarrow.parquet as pq
+        path = os.path.join(self.tmpdir.name, "first.parquet")
+        stats = CaseBaseExporter(self.server.host, "testconcept", "first", path, pagesize=5).run()
+        self.assertEqual(stats["rows"], 23)
+        parquet = pq.ParquetFile(path)
+        self.assertEqual([parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)],
+                         [5, 5, 5, 5, 3])
+        table = parquet.read()
+        self.assertEqual(table.column("caseID").to_pylist(), ["a{:03d}".format(i) for i in range(23)])
+        self.assertEqual(table.column("x").to_pylist()[:3], [None, 0.5, 1.0])
+        self.assertEqual(table.column("n").to_pylist()[7:9], [None, 8])
+        # string columns keep the marker of unknown values
+        self.assertEqual(table.column("color").to_pylist()[6:8], ["blue", "_unknown_"])
+
+    def test_concurrent_export(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        results = exportCaseBases(self.server.host, "testconcept", ["first", "second"], self.tmpdir.name,
+                                  workers=2, pagesize=10)
+        self.assertEqual({cb: stats["rows"] for cb, stats in results.items()}, {"first": 23, "second": 40})
+        second = pq.read_table(os.path.join(self.tmpdir.name, "second.parquet"))
+        self.assertEqual(second.column("caseID").to_pylist(), ["b{:03d}".format(i) for i in range(40)])
+
+        # a page size that divides the casebase ends with an empty page
+        arrow = exportCaseBases(self.server.host, "testconcept", ["second"], self.tmpdir.name,
+                                fileformat="arrow", pagesize=10)
+        self.assertEqual(arrow["second"]["rows"], 40)
+        with pa.memory_map(os.path.join(self.tmpdir.name, "second.arrow")) as source:
+            reader = pa.ipc.open_file(source)
+            self.assertEqual(reader.num_record_batches, 4)
+            self.assertTrue(reader.read_all().equals(second))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+from mycbrwrapper.fingerprint import CaseBaseFingerprint, caseDigest
+import unittest
+
+defaulthost = "localhost:8080"
+
+
+class FingerprintTest(unittest.TestCase):
+
+    cases = [{"caseID": "testconcept0", "wind_speed": "0", "wind_effect": "0"},
+             {"caseID": "testconcept1", "wind_speed": "5.2", "wind_effect": "5.3"},
+             {"caseID": "testconcept2", "wind_speed": "2.1", "wind_effect": "1.05"}]
+
+    def test_incremental_matches_listing(self):
+        listed = CaseBaseFingerprint(defaulthost, "testconcept", "unittestCB")
+        listed.load(self.cases)
+        local = CaseBaseFingerprint(defaulthost, "testconcept", "unittestCB")
+        for case in reversed(self.cases):
+            local.caseAdded(case["caseID"], {k: v for k, v in case.items() if k != "caseID"})
+        self.assertEqual(listed.value(), local.value())
+
+    def test_changes_on_write(self):
+        fp = CaseBaseFingerprint(defaulthost, "testconcept", "unittestCB")
+        fp.load(self.cases)
+        before = fp.value()
+        fp.caseAdded("testconcept1", '{"wind_speed": "6.0", "wind_effect": "5.3"}')
+        changed = fp.value()
+        self.assertNotEqual(before, changed)
+        fp.caseRemoved("testconcept1")
+        self.assertTrue(fp.value().startswith("2-"))
+        fp.cleared()
+        self.assertEqual(fp.value(), "0-0000000000000000")
+
+    def test_digest_compares_values_as_strings(self):
+        self.assertEqual(caseDigest("c0", {"wind_speed": 5}), caseDigest("c0", {"wind_speed": "5"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
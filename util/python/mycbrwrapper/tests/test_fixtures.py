@@ -0,0 +1,40 @@
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.standin import StandInServer
+from mycbrwrapper.tests import fixtures
+import unittest
+
+
+class FixturesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_projects_are_isolated(self):
+        first = fixtures.TestProject(self.server.host, fixtures.WIND).provision()
+        second = fixtures.TestProject(self.server.host, fixtures.WIND).provision()
+        self.assertNotEqual(first.concept, second.concept)
+        self.assertNotEqual(first.casebase, second.casebase)
+        self.assertTrue(first.concept.startswith("testconcept_"))
+        self.assertEqual(first.amalgamationFunction, "testAmalgmamationSimilarityFunction1")
+        api = getRequest(self.server.host)
+        self.assertEqual(sorted(api.concepts.GET().json()), sorted([first.concept, second.concept]))
+        cases = api.concepts(first.concept).casebases(first.casebase).cases.GET().json()
+        self.assertEqual(sorted(c["caseID"] for c in cases), ["w0", "w1", "w2"])
+        self.assertEqual(fixtures.WIND["concepts"].keys(), {"testconcept"})
+
+        first.teardown()
+        self.assertEqual(api.concepts.GET().json(), [second.concept])
+        self.assertEqual(api.casebases.GET().json(), [second.casebase])
+
+    def test_process_cache(self):
+        project = fixtures.testProject("wind")
+        self.assertIs(fixtures.testProjects("wind")[0], project)
+        self.assertEqual(project.host, fixtures.testHost())
+        self.assertIn(project.concept, getRequest(project.host).concepts.GET().json())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+from mycbrwrapper.hedging import Hedger
+from mycbrwrapper.standin import StandInServer
+from urllib.request import urlopen
+import time
+import unittest
+
+
+class HedgingTest(unittest.TestCase):
+
+    def test_hedge_beats_pause(self):
+        slow = StandInServer(pause=1.0, pauseRate=1.0).start()
+        fast = StandInServer().start()
+        hedger = Hedger(budget=0.5, warmup=2)
+        send = lambda url: urlopen(url + "/concepts", timeout=5).read()
+        try:
+            for _ in range(4):
+                hedger.call(send, [fast.url])
+            start = time.monotonic()
+            self.assertEqual(hedger.call(send, [slow.url, fast.url]), b"[]")
+            self.assertLess(time.monotonic() - start, 0.5)
+            metrics = hedger.metrics()
+            self.assertEqual((metrics["hedges"], metrics["hedgeWins"]), (1, 1))
+        finally:
+            hedger.close()
+            slow.stop()
+            fast.stop()
+
+    def test_budget(self):
+        hedger = Hedger(budget=0.1, warmup=1, minDelay=0.01)
+        calls = []
+
+        def send(target):
+            calls.append(target)
+            time.sleep(0.05)
+            return target
+        try:
+            for _ in range(20):
+                hedger.call(send, ["primary", "replica"])
+            self.assertLessEqual(hedger.metrics()["hedges"], 2)
+            self.assertEqual(len(calls), 20 + hedger.metrics()["hedges"])
+        finally:
+            hedger.close()
+
+    def test_hedged_calls_record_the_primary(self):
+        hedger = Hedger(budget=1.0, warmup=2, minDelay=0.01)
+        pauses = {"primary": 0.01, "replica": 0.01}
+
+        def send(target):
+            time.sleep(pauses[target])
+            return target
+        try:
+            for _ in range(2):
+                hedger.call(send, ["primary", "replica"])
+            pauses["primary"] = 0.3
+            self.assertEqual(hedger.call(send, ["primary", "replica"]), "replica")
+            # the slow primary's latency is recorded once it answers, not the replica's
+            time.sleep(0.5)
+            self.assertEqual(len(hedger.latencies), 3)
+            self.assertGreaterEqual(hedger.delay(), 0.3)
+        finally:
+            hedger.close()
+
+    def test_error_results_do_not_win(self):
+        hedger = Hedger(budget=1.0, warmup=1, minDelay=0.01)
+        pauses = {"primary": 0.01, "replica": 0.01}
+        statuses = {"primary": 200, "replica": 503}
+
+        def send(target):
+            time.sleep(pauses[target])
+            return target, statuses[target]
+        succeeded = lambda result: result[1] < 400
+        try:
+            hedger.call(send, ["primary", "replica"], succeeded)
+            pauses["primary"] = 0.2
+            # the replica's fast 503 waits for the primary's slow 200
+            self.assertEqual(hedger.call(send, ["primary", "replica"], succeeded), ("primary", 200))
+            self.assertEqual((hedger.metrics()["hedges"], hedger.metrics()["hedgeWins"]), (1, 0))
+            # if both fail, the primary's answer is returned rather than an exception
+            statuses["primary"] = 500
+            self.assertEqual(hedger.call(send, ["primary", "replica"], succeeded), ("primary", 500))
+        finally:
+            hedger.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+from mycbrwrapper.importer import CaseBaseImporter, _ColumnStats, inferAttributes, readChunks
+from mycbrwrapper.standin import StandInServer
+import os
+import tempfile
+import unittest
+
+
+class ImporterTest(unittest.TestCase):
+
+    csv = ("id,wind_speed,doors,color,comment\n"
+           "w0,0,2,red,\n"
+           "w1,5.2,4,blue,a\n"
+           "w2,2.1,5,red,b\n")
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cases.csv")
+        with open(self.path, "w") as f:
+            f.write(self.csv)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_read_chunks(self):
+        chunks = list(readChunks(self.path, chunksize=2))
+        self.assertEqual([len(c) for c in chunks], [2, 1])
+        self.assertEqual(chunks[1][0]["id"], "w2")
+
+    def test_infer_attributes(self):
+        attributes = inferAttributes(self.path, chunksize=2, maxSymbols=1, idColumn="id")
+        self.assertNotIn("id", attributes)
+        self.assertEqual(attributes["wind_speed"]["type"], "Double")
+        self.assertEqual((attributes["wind_speed"]["min"], attributes["wind_speed"]["max"]), (0.0, 5.2))
+        self.assertEqual(attributes["doors"], {"type": "Integer", "min": 2, "max": 5, "solution": "False"})
+        self.assertEqual(attributes["comment"]["type"], "String")
+        attributes = inferAttributes(self.path, idColumn="id")
+        self.assertEqual(attributes["color"]["allowedValues"], ["blue", "red"])
+
+    def test_whole_numbers_are_sent_as_integers(self):
+        with open(self.path, "w") as f:
+            f.write("id,doors,seats\nw0,2.0,4\nw1,3,5.0\nw2,,2\n")
+        with StandInServer() as server:
+            importer = CaseBaseImporter(server.host, "cars", "carsCB", self.path, batchsize=2, idColumn="id")
+            importer.createModel()
+            self.assertEqual(importer.attributes["doors"]["type"], "Integer")
+            self.assertEqual(importer.upload()["rows"], 3)
+            cases = server.model.casebases["carsCB"]
+            self.assertEqual([cases[c]["values"] for c in ("w0", "w1", "w2")],
+                             [{"doors": "2", "seats": "4"}, {"doors": "3", "seats": "5"}, {"seats": "2"}])
+
+    def test_parquet_values(self):
+        # values as Parquet rows give them: floats with NaN for integer columns, bools
+        rows = [{"doors": 2.0, "sold": True}, {"doors": float("nan"), "sold": False}, {"doors": 4.0, "sold": True}]
+        stats = {"doors": _ColumnStats(10), "sold": _ColumnStats(10)}
+        for row in rows:
+            for name, value in row.items():
+                stats[name].add(value)
+        self.assertEqual(stats["doors"].description()["type"], "Integer")
+        self.assertEqual(stats["sold"].description(),
+                         {"type": "Symbol", "allowedValues": ["False", "True"], "solution": "False"})
+        importer = CaseBaseImporter("localhost:8080", "cars", "carsCB", self.path)
+        self.assertEqual([importer._toCase(row, {"doors"}) for row in rows],
+                         [{"doors": "2", "sold": "True"}, {"sold": "False"}, {"doors": "4", "sold": "True"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
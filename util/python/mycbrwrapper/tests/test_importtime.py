@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "example")
+CORE = ["mycbrwrapper.rest", "mycbrwrapper.fingerprint", "mycbrwrapper.cache", "mycbrwrapper.hedging",
+        "mycbrwrapper.limiter", "mycbrwrapper.sharding", "mycbrwrapper.importer", "mycbr_py_api"]
+HEAVY = ["pandas", "numpy", "matplotlib", "seaborn", "scipy", "sklearn", "pyarrow", "yaml"]
+# Cold-start budget per module in milliseconds, most of it taken by requests
+BUDGET = float(os.environ.get("MYCBR_IMPORT_BUDGET", 500))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"ms": 1000 * (time.perf_counter() - start), "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def importTime(module):
+    """Import `module` in a fresh interpreter.
+
+    :returns: dict with the import time in ms ("ms") and the heavy
+        dependencies it loaded ("heavy")
+    """
+    path = os.pathsep.join([os.path.join(os.path.dirname(__file__), "..", ".."), EXAMPLE])
+    env = dict(os.environ, PYTHONPATH=path, PYTHONDONTWRITEBYTECODE="1")
+    output = subprocess.check_output([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)], env=env)
+    return json.loads(output.decode("utf-8").splitlines()[-1])
+
+
+class ImportTimeTest(unittest.TestCase):
+
+    def test_no_heavy_imports(self):
+        for module in CORE:
+            self.assertEqual(importTime(module)["heavy"], [], module)
+
+    def test_cold_start(self):
+        for module in CORE:
+            self.assertLess(min(importTime(module)["ms"] for _ in range(3)), BUDGET, module)
+
+
+if __name__ == "__main__":
+    for module in CORE:
+        result = importTime(module)
+        print("{:32} {:8.1f} ms  {}".format(module, result["ms"], " ".join(result["heavy"])))
@@ -0,0 +1,47 @@
+from mycbrwrapper.concepts import Concepts
+from mycbrwrapper.fingerprint import getFingerprint
+from mycbrwrapper.instances import Instance
+from mycbrwrapper.standin import StandInServer
+import unittest
+
+
+class InstancesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.concept = Concepts(self.server.host).addConcept("testconcept")
+        self.server.model.casebases["unittestCB"] = {}
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_add_keeps_fingerprint_in_sync(self):
+        fingerprint = getFingerprint(self.server.host, "testconcept", "unittestCB")
+        fingerprint.refresh()
+        self.concept.addInstances({"cases": [{"caseID": "c0", "x": "1"}, {"caseID": "c1", "x": "2"}]}, "unittestCB")
+        Instance(self.concept, "c2", self.server.host, "unittestCB", '{"x": "3"}')
+        self.assertEqual(sorted(self.server.model.casebases["unittestCB"]), ["c0", "c1", "c2"])
+        self.assertEqual(fingerprint.value().split("-")[0], "3")
+        self.assertTrue(fingerprint.revalidate())
+
+    def test_failed_add_leaves_fingerprint(self):
+        fingerprint = getFingerprint(self.server.host, "testconcept", "nocasebase")
+        before = fingerprint.value()
+        instance = Instance(self.concept, "c0", self.server.host, "nocasebase", {"x": "1"}, get=True)
+        self.assertFalse(instance.createInstance({"x": "1"}))
+        self.assertEqual(fingerprint.value(), before)
+
+    def test_delete_keeps_fingerprint_in_sync(self):
+        fingerprint = getFingerprint(self.server.host, "testconcept", "unittestCB")
+        fingerprint.refresh()
+        instance = Instance(self.concept, "c0", self.server.host, "unittestCB", {"x": "1"})
+        self.assertTrue(instance.delete())
+        self.assertEqual(self.server.model.casebases["unittestCB"], {})
+        self.assertTrue(fingerprint.revalidate())
+        before = fingerprint.value()
+        self.assertFalse(instance.delete())
+        self.assertEqual(fingerprint.value(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+from mycbrwrapper.knntable import KNNTable
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.standin import StandInServer
+from mycbrwrapper.rest import getRequest
+import random
+import tempfile
+import unittest
+
+
+class KNNTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = random.Random(2)
+        self.cases = [{"caseID": "c{}".format(i), "x": str(rng.uniform(0, 10))} for i in range(60)]
+        spec = {"concepts": {"testconcept": {
+            "attributes": {"x": {"type": "Double", "min": 0, "max": 10}},
+            "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+            "cases": {"unittestCB": self.cases[:50]}}}}
+        Provisioner(self.server.host, spec).run()
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def table(self, path):
+        return KNNTable(self.server.host, "testconcept", "unittestCB", "testAmalgamation",
+                        path, k=5, batchsize=16)
+
+    def assertSameNeighbours(self, table, expected):
+        # near-ties may be ordered differently after float16 rounding
+        for caseID in expected.rows:
+            actual = [s for _, s in table.neighbours(caseID)]
+            wanted = [s for _, s in expected.neighbours(caseID)]
+            self.assertEqual(len(actual), len(wanted), caseID)
+            for a, b in zip(actual, wanted):
+                self.assertAlmostEqual(a, b, delta=2e-3, msg=caseID)
+
+    def test_build_and_load(self):
+        table = self.table(self.tmpdir.name).build()
+        neighbours = table.neighbours("c0")
+        self.assertEqual(len(neighbours), 5)
+        self.assertNotIn("c0", [c for c, _ in neighbours])
+        self.assertEqual(self.table(self.tmpdir.name).load().neighbours("c0"), neighbours)
+
+    def test_incremental_update(self):
+        table = self.table(self.tmpdir.name + "/incremental").build()
+        cases = getRequest(self.server.host).concepts("testconcept").casebases("unittestCB").cases
+        for case in self.cases[50:]:
+            cases(case["caseID"]).PUT(json={"x": case["x"]})
+        cases("c3").PUT(json={"x": "9.99"})
+        for caseID in ("c1", "c2"):
+            cases(caseID).DELETE()
+        table.update(added=[c["caseID"] for c in self.cases[50:]], changed=["c3"], removed=["c1", "c2"])
+        self.assertEqual(len(table.rows), 58)
+        self.assertSameNeighbours(table, self.table(self.tmpdir.name + "/rebuilt").build())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+from mycbrwrapper.limiter import AdaptiveLimiter, EndpointLimiters, endpointClass
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import unittest
+
+import requests
+
+
+class Response():
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class LimiterTest(unittest.TestCase):
+
+    def test_endpoint_classes(self):
+        base = "http://localhost:8080/concepts/c/casebases/cb"
+        self.assertEqual(endpointClass("POST", base + "/cases"), "ingest")
+        self.assertEqual(endpointClass("GET", base + "/cases"), None)
+        self.assertEqual(endpointClass("GET", base + "/amalgamationFunctions/f/retrievalByCaseID?caseID=a"),
+                         "retrieval")
+        self.assertEqual(endpointClass("GET", base + "/computeSelfSimilarity?k=-1"), "selfSimilarity")
+
+    def test_aimd(self):
+        limiter = AdaptiveLimiter(initial=4, maximum=8)
+        for _ in range(40):
+            limiter.call(lambda: Response(200))
+        self.assertEqual(limiter.limit, 8)
+        limiter.call(lambda: Response(503))
+        self.assertEqual(limiter.limit, 5)
+        with self.assertRaises(ValueError):
+            limiter.call(lambda: int("x"))
+        self.assertEqual(limiter.metrics()["inflight"], 0)
+
+    def test_client_timeouts_are_not_overload(self):
+        limiter = AdaptiveLimiter(initial=4, maximum=8)
+        for _ in range(40):
+            limiter.call(lambda: Response(200))
+
+        class DeadlineExceeded(requests.Timeout):
+            pass
+
+        def timeout(error):
+            def fn():
+                time.sleep(0.05)
+                raise error
+            return fn
+        for error in (DeadlineExceeded("deadline exceeded"), requests.ReadTimeout("read timed out")):
+            with self.assertRaises(type(error)):
+                limiter.call(timeout(error))
+        self.assertEqual(limiter.metrics(), {"limit": 8, "inflight": 0, "decreases": 0})
+        with self.assertRaises(requests.ConnectionError):
+            limiter.call(timeout(requests.ConnectionError("connection refused")))
+        self.assertEqual(limiter.metrics()["decreases"], 1)
+
+    def test_limit_is_enforced(self):
+        limiters = EndpointLimiters(initial=2, maximum=2)
+        inflight, peak = [0], [0]
+        lock = threading.Lock()
+
+        def call():
+            with lock:
+                inflight[0] += 1
+                peak[0] = max(peak[0], inflight[0])
+            time.sleep(0.01)
+            with lock:
+                inflight[0] -= 1
+            return Response(200)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: limiters.call("POST", "/concepts/c/casebases/cb/cases", call), range(16)))
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(limiters.metrics()["ingest"]["limit"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+from mycbrwrapper import recorder
+from mycbrwrapper.loadtest import LoadTest, formatReport, syntheticMix
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.standin import StandInServer
+import os
+import tempfile
+import unittest
+
+
+class LoadTestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        cases = [{"caseID": "c{}".format(i), "x": str(i)} for i in range(20)]
+        spec = {"concepts": {"testconcept": {
+            "attributes": {"x": {"type": "Double", "min": 0, "max": 20}},
+            "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+            "cases": {"unittestCB": cases}}}}
+        Provisioner(self.server.host, spec).run()
+
+    def tearDown(self):
+        recorder.stopRecording()
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def test_record_and_replay(self):
+        path = os.path.join(self.tmpdir.name, "calls.log.gz")
+        recorder.startRecording(path)
+        function = getRequest(self.server.host).concepts("testconcept").casebases("unittestCB")\
+                       .amalgamationFunctions("testAmalgamation")
+        for i in range(5):
+            function.retrievalByCaseID.GET(params={"caseID": "c{}".format(i), "k": 3})
+        function.retrievalByMultipleCaseIDs.POST(params={"k": 2}, json=["c1", "c2"])
+        recorder.stopRecording()
+        entries = list(recorder.readLog(path))
+        self.assertEqual([e["m"] for e in entries], ["GET"] * 5 + ["POST"])
+        self.assertEqual(entries[-1]["b"], '["c1", "c2"]')
+        self.assertTrue(all(e["s"] == 200 and e["n"] > 0 for e in entries))
+
+        report = LoadTest.fromLog(self.server.host, path, speed=10).run()
+        self.assertEqual((report["total"]["calls"], report["total"]["errors"]), (6, 0))
+
+    def test_open_loop_rate(self):
+        entries = syntheticMix(self.server.host, "testconcept", "unittestCB", "testAmalgamation", count=50, k=5)
+        test = LoadTest(self.server.host, entries, rate=100, duration=1.0, interval=0.5)
+        report = test.run()
+        self.assertEqual(report["total"]["calls"], 100)
+        self.assertEqual(report["total"]["errors"], 0)
+        self.assertEqual([w["start"] for w in report["windows"]], [0.0, 0.5])
+        self.assertIn("p99", formatReport(report))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,307 @@
+from mycbrwrapper.cache import RetrievalCache
+from mycbrwrapper.hedging import Hedger
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.recorder import Recorder, readLog
+from mycbrwrapper.standin import StandInServer
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "example")
+sys.path.insert(0, EXAMPLE)
+from mycbr_py_api import MyCBRRestApi  # noqa: E402
+
+CONCEPT, CASEBASE, FUNCTION = "testconcept", "unittestCB", "testAmalgamation"
+
+
+def provision(server, cases=12):
+    spec = {"concepts": {CONCEPT: {
+        "attributes": {"x": {"type": "Double", "min": 0, "max": 20},
+                       "color": {"type": "Symbol", "allowedValues": ["red", "blue"]}},
+        "amalgamationFunctions": {FUNCTION: {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+        "cases": {CASEBASE: [{"caseID": "c{}".format(i), "x": str(i), "color": "red" if i % 2 else "blue"}
+                             for i in range(cases)]}}}}
+    Provisioner(server.host, spec).run()
+
+
+class EphemeralTest(unittest.TestCase):
+    """The ephemeral retrievals of MyCBRRestApi, with and without registered caseID sets."""
+
+    members = ["c1", "c2", "c5", "c7", "c9"]
+
+    def retrieve(self, handles):
+        with StandInServer(handles=handles) as server:
+            provision(server)
+            api = MyCBRRestApi(base_url=server.url, output="dict")
+            ecb = api.createEphemeralCaseBase(self.members)
+            self.assertEqual(bool(server.model.caseIDSets), handles)
+            results = [api.getSimilarCasesFromEphemeralCaseBase(["c1", "c9"], ecb, FUNCTION, CONCEPT, CASEBASE),
+                       api.getEphemeralCaseBaseSelfSimilarity(ecb, FUNCTION, CONCEPT, CASEBASE)]
+            if handles:
+                # a restarted server has forgotten the set: it is registered again
+                server.model.caseIDSets.clear()
+                self.assertEqual(api.getEphemeralCaseBaseSelfSimilarity(ecb, FUNCTION, CONCEPT, CASEBASE),
+                                 results[1])
+                self.assertIn(ecb.handle, server.model.caseIDSets)
+            plain = [api.getSimilarCasesFromEphemeralCaseBase(["c1", "c9"], self.members, FUNCTION, CONCEPT,
+                                                              CASEBASE),
+                     api.getEphemeralCaseBaseSelfSimilarity(self.members, FUNCTION, CONCEPT, CASEBASE)]
+            self.assertEqual(plain, results)
+            return results
+
+    def test_handles_and_fallback(self):
+        registered = self.retrieve(True)
+        resent = self.retrieve(False)
+        self.assertEqual(registered, resent)
+        ranking, matrix = registered
+        self.assertEqual(sorted(ranking), ["c1", "c9"])
+        self.assertEqual(set(ranking["c1"]), set(self.members))
+        self.assertEqual(ranking["c9"]["c9"], 1.0)
+        self.assertEqual(sorted(matrix), self.members)
+
+
+class SelfSimilarityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        provision(self.server)
+        self.cache = RetrievalCache(os.path.join(self.tmpdir.name, "cache.db"))
+        self.api = MyCBRRestApi(base_url=self.server.url, cache=self.cache, fingerprint_ttl=0)
+
+    def tearDown(self):
+        self.cache.close()
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def matrix(self):
+        return self.api.getCaseBaseSelfSimilarity(FUNCTION, CONCEPT, CASEBASE)
+
+    def test_initial_and_incremental(self):
+        ssm = self.matrix()
+        caseIDs = ["c{}".format(i) for i in range(12)]
+        self.assertEqual(sorted(ssm.columns), sorted(caseIDs))
+        self.assertEqual(sorted(ssm.index), sorted(caseIDs))
+        self.assertEqual(ssm.loc["c3", "c3"], 1.0)
+        self.assertEqual(len(self.cache), 1)
+        self.assertTrue(self.matrix().equals(ssm))
+
+        for i in (12, 13):
+            self.server.model.addCases(CONCEPT, CASEBASE, [{"caseID": "c{}".format(i), "x": str(i), "color": "red"}])
+        self.server.model.casebases[CASEBASE].pop("c0")
+        updated = self.api.updateCaseBaseSelfSimilarity(ssm, FUNCTION, ["c12", "c13"], ["c0"], CONCEPT, CASEBASE)
+        fresh = self.matrix()
+        self.assertEqual(sorted(updated.columns), sorted(fresh.columns))
+        self.assertTrue(updated.loc[fresh.index, fresh.columns].equals(fresh))
+
+
+class CaseTableTest(unittest.TestCase):
+    """case_table=True joins plain retrievals with a local copy of the casebase."""
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        provision(self.server)
+        self.server.model.addCases(CONCEPT, CASEBASE, [{"caseID": "u", "x": "_unknown_", "color": "red"}])
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def clients(self, output):
+        return (MyCBRRestApi(base_url=self.server.url, output=output),
+                MyCBRRestApi(base_url=self.server.url, output=output, case_table=True))
+
+    def test_same_as_with_content(self):
+        content, joined = self.clients("dict")
+        for caseID in ("c3", "u"):
+            self.assertEqual(joined.getSimilarCasesByCaseIDWithContent(caseID, FUNCTION, CONCEPT, CASEBASE),
+                             content.getSimilarCasesByCaseIDWithContent(caseID, FUNCTION, CONCEPT, CASEBASE))
+        members = ["c1", "c2", "u"]
+        self.assertEqual(
+            joined.getSimilarCasesFromEphemeralCaseBaseWithContent("c3", members, FUNCTION, CONCEPT, CASEBASE),
+            content.getSimilarCasesFromEphemeralCaseBaseWithContent("c3", members, FUNCTION, CONCEPT, CASEBASE))
+
+        content, joined = self.clients("pandas")
+        expected = content.getSimilarCasesByCaseIDWithContent("c3", FUNCTION, CONCEPT, CASEBASE)
+        actual = joined.getSimilarCasesByCaseIDWithContent("c3", FUNCTION, CONCEPT, CASEBASE)
+        self.assertEqual(list(actual.columns), list(expected.columns))
+        self.assertEqual(actual.loc[actual.caseID == "u", "x"].tolist(), ["_unknown_"])
+        expected = expected.astype({"similarity": float}).sort_values("caseID").reset_index(drop=True)
+        self.assertTrue(actual.sort_values("caseID").reset_index(drop=True).equals(expected))
+
+        expected = content.getSimilarCasesFromEphemeralCaseBaseWithContent("c3", members, FUNCTION, CONCEPT, CASEBASE)
+        actual = joined.getSimilarCasesFromEphemeralCaseBaseWithContent("c3", members, FUNCTION, CONCEPT, CASEBASE)
+        self.assertTrue(actual.reset_index(drop=True).equals(expected.reset_index(drop=True)))
+
+    def test_plain_retrievals_and_refresh(self):
+        path = os.path.join(self.tmpdir.name, "calls.log")
+        recorder = Recorder(path)
+        joined = MyCBRRestApi(base_url=self.server.url, output="dict", case_table=True, recorder=recorder)
+        for caseID in ("c3", "c4"):
+            joined.getSimilarCasesByCaseIDWithContent(caseID, FUNCTION, CONCEPT, CASEBASE)
+        # a case added behind the client's back is fetched when it is retrieved
+        self.server.model.addCases(CONCEPT, CASEBASE, [{"caseID": "c12", "x": "12", "color": "blue"}])
+        cases = joined.getSimilarCasesByCaseIDWithContent("c12", FUNCTION, CONCEPT, CASEBASE)
+        self.assertEqual(cases[0], {"similarity": 1.0, "caseID": "c12", "x": "12", "color": "blue"})
+        recorder.close()
+
+        paths = [entry["p"].split("?")[0] for entry in readLog(path)]
+        self.assertFalse([p for p in paths if p.endswith("WithContent")])
+        self.assertEqual(sum(p.endswith("/retrievalByCaseID") for p in paths), 3)
+        # the casebase was listed once, and again after the unknown case
+        self.assertEqual(paths.count("/concepts/{}/casebases/{}/cases".format(CONCEPT, CASEBASE)), 2)
+
+
+class ContextTest(unittest.TestCase):
+    """with_context: immutable clients sharing the state of their parent."""
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        provision(self.server)
+        Provisioner(self.server.host, {"concepts": {"other": {
+            "attributes": {"y": {"type": "Integer", "min": 0, "max": 10}}}}}).run()
+        self.api = MyCBRRestApi(base_url=self.server.url, output="dict")
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_defaults_are_immutable(self):
+        ctx = self.api.with_context(concept=CONCEPT, casebase=CASEBASE, amalgamation=FUNCTION)
+        self.assertRaises(TypeError, ctx._setCurrentConceptID, "other")
+        self.assertRaises(TypeError, ctx._setCurrentCasebaseID, "cb")
+        self.assertRaises(TypeError, ctx._setCurrentAmalgamationFunctionID, "f")
+        self.assertRaises(TypeError, ctx._setColumnNamesForConcept, "other")
+        self.assertEqual((ctx._getCurrentConceptID(), ctx._getCurrentCasebaseID(),
+                          ctx._getCurrentAmalgamationFunctionID()), (CONCEPT, CASEBASE, FUNCTION))
+        columns = ctx._getCurrentColumnNames()
+        # the attributes come in the order the provisioner happened to create them
+        self.assertEqual(columns[:2] + sorted(columns[2:]), ["caseID", "similarity", "color", "x"])
+
+        # the parent stays mutable and its defaults do not leak into the context
+        self.assertTrue(self.api._setCurrentCasebaseID("cb"))
+        self.assertEqual(ctx._getCurrentCasebaseID(), CASEBASE)
+        self.assertRaises(ValueError, self.api.with_context, output="arrow")
+
+    def test_shared_column_cache(self):
+        ctx = self.api.with_context(concept="other")
+        self.assertEqual(ctx._getCurrentColumnNames(), ["caseID", "similarity", "y"])
+        # the names fetched for the context are the parent's now: no new request sees the change
+        self.server.model.concept("other")["attributes"]["z"] = {"type": "Integer", "min": 0, "max": 1}
+        self.assertEqual(self.api.getColumnNames("other"), ["caseID", "similarity", "y"])
+        self.assertEqual(self.api.with_context(concept="other").getColumnNames(), ["caseID", "similarity", "y"])
+
+    def test_concurrent_retrievals(self):
+        ctx = self.api.with_context(concept=CONCEPT, casebase=CASEBASE, amalgamation=FUNCTION)
+        caseIDs = ["c{}".format(i) for i in range(12)]
+        expected = [self.api.getSimilarCasesByCaseID(caseID, FUNCTION, CONCEPT, CASEBASE) for caseID in caseIDs]
+        with ThreadPoolExecutor(8) as pool:
+            self.assertEqual(list(pool.map(ctx.getSimilarCasesByCaseID, caseIDs)), expected)
+
+
+class HedgedReadTest(unittest.TestCase):
+    """Hedged reads against a replica that answers 404."""
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.replica = StandInServer().start()
+        provision(self.server)
+        self.hedger = Hedger(budget=1.0, warmup=2, minDelay=0.01)
+        self.api = MyCBRRestApi(base_url=self.server.url, output="dict", hedger=self.hedger,
+                                replicas=[self.replica.url])
+        for caseID in ("c1", "c2"):
+            self.api.getSimilarCasesByCaseID(caseID, FUNCTION, CONCEPT, CASEBASE)
+        self.server.model.pause, self.server.model.pauseRate = 0.2, 1.0
+
+    def tearDown(self):
+        self.hedger.close()
+        self.server.stop()
+        self.replica.stop()
+
+    def test_error_from_replica_does_not_win(self):
+        # the replica knows nothing of the concept: its fast 404 must not beat the slow primary
+        ranking = self.api.getSimilarCasesByCaseID("c3", FUNCTION, CONCEPT, CASEBASE)
+        self.assertEqual(next(iter(ranking)), "c3")
+        self.assertEqual((self.hedger.metrics()["hedges"], self.hedger.metrics()["hedgeWins"]), (1, 0))
+
+    def test_handles_are_not_hedged_to_other_servers(self):
+        provision(self.replica)
+        asked = []
+        caseIDSet = self.replica.model.caseIDSet
+        self.replica.model.caseIDSet = lambda handle: asked.append(handle) or caseIDSet(handle)
+        ecb = self.api.createEphemeralCaseBase(["c1", "c2", "c5"])
+        matrix = self.api.getEphemeralCaseBaseSelfSimilarity(ecb, FUNCTION, CONCEPT, CASEBASE)
+        self.assertEqual(sorted(matrix), ["c1", "c2", "c5"])
+        self.assertEqual(self.hedger.metrics()["hedges"], 1)
+        self.assertEqual(asked, [])
+
+
+PLAIN = """
+import json, sys
+from mycbr_py_api import MyCBRRestApi
+concept, casebase, function = {names!r}
+for case_table in (False, True):
+    api = MyCBRRestApi(base_url={url!r}, output="dict", case_table=case_table)
+    ecb = api.createEphemeralCaseBase(["c1", "c2", "c5"])
+    results = [api.getAllCasesFromCaseBase(concept, casebase), api.getCaseByCaseID("c1", concept, casebase),
+               api.getAllCases(concept), api.getCaseBaseFingerprint(concept, casebase),
+               api.getSimilarCasesByCaseID("c1", function, concept, casebase),
+               api.getSimilarCasesByCaseIDWithContent("c1", function, concept, casebase),
+               api.getSimilarCasesByMultipleCaseIDs(["c1", "c2"], function, concept, casebase),
+               api.getSimilarCasesByAttribute(function, "x", "3", concept, casebase),
+               api.getCaseBaseSelfSimilarity(function, concept, casebase),
+               api.getSimilarCasesFromEphemeralCaseBase(["c1"], ecb, function, concept, casebase),
+               api.getSimilarCasesFromEphemeralCaseBaseWithContent("c1", ecb, function, concept, casebase),
+               api.getEphemeralCaseBaseSelfSimilarity(ecb, function, concept, casebase)]
+print(json.dumps({{"heavy": [m for m in ("pandas", "numpy") if m in sys.modules],
+                  "types": [type(r).__name__ for r in results]}}))
+"""
+
+
+class PlainOutputTest(unittest.TestCase):
+    """output='dict' gives plain lists and dicts, without ever importing pandas."""
+
+    def test_no_pandas(self):
+        with StandInServer() as server:
+            provision(server)
+            probe = PLAIN.format(url=server.url, names=(CONCEPT, CASEBASE, FUNCTION))
+            env = dict(os.environ, PYTHONPATH=EXAMPLE, PYTHONDONTWRITEBYTECODE="1")
+            output = subprocess.check_output([sys.executable, "-W", "ignore", "-c", probe], env=env)
+        result = json.loads(output.decode("utf-8").splitlines()[-1])
+        self.assertEqual(result["heavy"], [])
+        self.assertEqual(result["types"], ["list", "dict", "list", "str", "dict", "list", "dict", "dict", "dict",
+                                           "dict", "list", "dict"])
+
+
+PLOT = """
+import importlib.util, json, sys
+import pandas as pd
+spec = importlib.util.spec_from_file_location("client", {path!r})
+client = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(client)
+ssm = pd.DataFrame([[1.0, 0.5], [0.2, 1.0]], index=["a", "b"], columns=["a", "b"])
+ordered = client.MyCBRRestApi(base_url={url!r}).show_ordered_ssm(ssm, ticks_interval=1)
+print(json.dumps([list(ordered.columns), "mycbr_plotting" in sys.modules]))
+"""
+
+
+class PlottingTest(unittest.TestCase):
+    """show_ordered_ssm finds mycbr_plotting next to the client, without the example directory on sys.path."""
+
+    def test_plotting_module_is_found(self):
+        env = dict(os.environ, MPLBACKEND="Agg", PYTHONDONTWRITEBYTECODE="1")
+        env.pop("PYTHONPATH", None)
+        with StandInServer() as server:
+            provision(server)
+            probe = PLOT.format(path=os.path.abspath(os.path.join(EXAMPLE, "mycbr_py_api.py")), url=server.url)
+            output = subprocess.check_output([sys.executable, "-W", "ignore", "-c", probe], env=env,
+                                             cwd=tempfile.gettempdir())
+        self.assertEqual(json.loads(output.decode("utf-8").splitlines()[-1]), [["a", "b"], True])
+
+
+if __name__ == "__main__":
+    unittest.main()
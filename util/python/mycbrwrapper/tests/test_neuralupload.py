@@ -0,0 +1,58 @@
+from mycbrwrapper.amalgamationfunctions import modelHash, registerNeuralModel
+from mycbrwrapper.concepts import Concepts
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.standin import StandInServer
+import os
+import tempfile
+import unittest
+
+
+class NeuralUploadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.files = {"json": os.path.join(self.tmpdir.name, "model.json"),
+                      "h5": os.path.join(self.tmpdir.name, "model.h5")}
+        with open(self.files["json"], "w") as f:
+            f.write('{"class_name": "Model"}')
+        with open(self.files["h5"], "wb") as f:
+            f.write(os.urandom(3 << 20) + b"\r\n--\r\n")
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def test_upload_once_for_many_concepts(self):
+        cs = Concepts(self.server.host)
+        names = ["neural{}".format(i) for i in range(6)]
+        for name in names:
+            cs.addConcept(name)
+        digest = registerNeuralModel(self.server.host, names, "neuralamal", self.files)
+        self.assertEqual(digest, modelHash(self.files))
+        self.assertEqual(self.server.model.uploads, 1)
+        self.assertEqual(self.server.model.neuralModels[digest],
+                         sum(os.path.getsize(path) for path in self.files.values()))
+        for name in names:
+            function = self.server.model.concept(name)["amalgamationFunctions"]["neuralamal"]
+            self.assertEqual(function["model"], digest)
+
+        c = cs.addConcept("neural_other")
+        c.addNeuralAmalgamationFunction("neuralamal", self.files)
+        self.assertEqual(self.server.model.uploads, 1)
+
+    def test_corrupt_upload_keeps_stored_model(self):
+        Concepts(self.server.host).addConcept("neural")
+        digest = registerNeuralModel(self.server.host, ["neural"], "neuralamal", self.files)
+        function = getRequest(self.server.host).concepts("neural").neuralAmalgamationFunctions("other")
+        with open(self.files["h5"], "rb") as f:
+            truncated = f.read(1 << 20)
+        result = function.PUT(params={"modelHash": digest},
+                              files={"jsonfile": ("model.json", b'{"class_name": "Model"}'),
+                                     "h5file": ("model.h5", truncated)})
+        self.assertEqual(result.status_code, 400)
+        self.assertEqual(function.PUT(params={"modelHash": digest}).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+from mycbrwrapper.prefilter import CandidateIndex, measureRecall, recallAtK
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.standin import StandInServer
+import random
+import unittest
+
+
+class PrefilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        rng = random.Random(1)
+        cases = [{"caseID": "c{}".format(i), "x": str(rng.uniform(0, 10)), "y": str(rng.uniform(0, 10)),
+                  "color": rng.choice(["red", "green", "blue"])} for i in range(500)]
+        spec = {"concepts": {"testconcept": {
+            "attributes": {"x": {"type": "Double", "min": 0, "max": 10},
+                           "y": {"type": "Double", "min": 0, "max": 10},
+                           "color": {"type": "Symbol", "allowedValues": ["red", "green", "blue"]}},
+            "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+            "cases": {"unittestCB": cases}}}}
+        Provisioner(self.server.host, spec).run()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_recall_at_k(self):
+        self.assertEqual(recallAtK({"q": {"a": 1.0, "c": 0.5}}, {"q": {"a": 1.0, "b": 0.8}}, k=2), 0.5)
+        self.assertEqual(recallAtK({"q": {"a": 1.0, "c": 0.8}}, {"q": {"a": 1.0, "b": 0.8}}, k=2), 1.0)
+
+    def test_candidates_contain_query(self):
+        index = CandidateIndex(self.server.host, "testconcept", "unittestCB").build()
+        self.assertEqual(len(index.caseIDs), 500)
+        candidates = index.candidates("c7", n=50)
+        self.assertEqual(len(candidates), 50)
+        self.assertEqual(candidates[0], "c7")
+
+    def test_prefiltered_retrieval(self):
+        index = CandidateIndex(self.server.host, "testconcept", "unittestCB").build()
+        stats = measureRecall(index, "testAmalgamation", ["c1", "c2", "c3", "c4"], k=5, n=50)
+        self.assertEqual(stats["reduction"], 10.0)
+        self.assertGreaterEqual(stats["recall"], 0.9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+from mycbrwrapper.provisioning import Provisioner, Task, runGraph
+from mycbrwrapper.standin import StandInServer
+import requests
+import threading
+import unittest
+
+defaulthost = "localhost:8080"
+
+
+class ProvisioningTest(unittest.TestCase):
+
+    spec = {"casebases": ["unittestCB"],
+            "concepts": {"testconcept": {
+                "attributes": {"wind_speed": {"type": "Double", "min": 0, "max": 25, "solution": "False"},
+                               "wind_effect": {"type": "Double", "min": 0, "max": 40, "solution": "False"}},
+                "similarityFunctions": {"wind_speed": {"polyWidth": {"parameter": 4.5}}},
+                "amalgamationFunctions": {"first": {"amalgamationFunctionType": "WEIGHTED_SUM"},
+                                          "second": {"amalgamationFunctionType": "EUCLIDEAN"}},
+                "cases": {"otherCB": [{"caseID": "w0", "wind_speed": "0"}]}}}}
+
+    def test_run_graph_order_and_parallelism(self):
+        order = []
+        barrier = threading.Barrier(2, timeout=5)
+
+        def step(name, parallel=False):
+            def action():
+                if parallel:
+                    barrier.wait()
+                order.append(name)
+                return name
+            return action
+
+        tasks = [Task("c", step("c"), ["a", "b"]),
+                 Task("a", step("a", True)),
+                 Task("b", step("b", True))]
+        self.assertEqual(runGraph(tasks, workers=2), {"a": "a", "b": "b", "c": "c"})
+        self.assertEqual(order[-1], "c")
+
+    def test_run_graph_rejects_cycles(self):
+        tasks = [Task("a", lambda: None, ["b"]), Task("b", lambda: None, ["a"])]
+        self.assertRaises(ValueError, runGraph, tasks)
+
+    def test_spec_graph(self):
+        tasks = {t.name: t for t in Provisioner(defaulthost, self.spec).tasks()}
+        self.assertIn("casebase:otherCB", tasks)
+        self.assertEqual(tasks["similarityFunction:testconcept/wind_speed/polyWidth"].deps,
+                         {"attribute:testconcept/wind_speed"})
+        self.assertIn("amalgamationFunction:testconcept/first",
+                      tasks["amalgamationFunction:testconcept/second"].deps)
+        cases = tasks["cases:testconcept/otherCB"].deps
+        self.assertTrue({"casebase:otherCB", "attribute:testconcept/wind_effect",
+                         "amalgamationFunction:testconcept/second"} <= cases)
+
+    def test_refused_puts_raise(self):
+        with StandInServer() as server:
+            # the server answers false for an attribute type it does not know
+            spec = {"concepts": {"testconcept": {"attributes": {"x": {"type": "Complex"}}}}}
+            self.assertRaises(RuntimeError, Provisioner(server.host, spec).run)
+            self.assertEqual(server.model.concept("testconcept")["attributes"], {})
+            # and 400 for weights of unknown attributes
+            spec = {"concepts": {"testconcept": {"amalgamationFunctions": {
+                "f": {"amalgamationFunctionType": "WEIGHTED_SUM", "attributeWeights": '{"y": 1}'}}}}}
+            self.assertRaises(requests.HTTPError, Provisioner(server.host, spec).run)
+
+
+if __name__ == "__main__":
+    unittest.main()
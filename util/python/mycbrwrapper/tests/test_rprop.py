@@ -0,0 +1,54 @@
+from mycbrwrapper.rprop import Rprop, learnWeights, localSimilarities, samplePairs, saveWeights
+from mycbrwrapper.evaluation import Evaluation
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.standin import StandInServer
+from mycbrwrapper.rest import getRequest
+import random
+import requests
+import unittest
+
+
+class RpropTest(unittest.TestCase):
+
+    def test_fit_recovers_weights(self):
+        import numpy as np
+        local = np.random.RandomState(0).rand(500, 3).astype(np.float32)
+        targets = local @ np.array([3.0, 1.0, 0.0]) / 4.0
+        rprop = Rprop()
+        weights = rprop.fit(local, targets, iterations=500)
+        self.assertTrue(np.allclose(weights / weights.sum(), [0.75, 0.25, 0.0], atol=0.02))
+        self.assertLess(rprop.losses[-1], rprop.losses[0] / 100)
+
+    def test_learn_and_store(self):
+        rng = random.Random(0)
+        cases = [{"caseID": "c{}".format(i), "x": str(i % 10), "noise": str(rng.randint(0, 9)),
+                  "label": "low" if i % 10 < 5 else "high"} for i in range(40)]
+        spec = {"concepts": {"testconcept": {
+            "attributes": {"x": {"type": "Double", "min": 0, "max": 9},
+                           "noise": {"type": "Double", "min": 0, "max": 9},
+                           "label": {"type": "Symbol", "allowedValues": ["low", "high"]}},
+            "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+            "cases": {"unittestCB": cases}}}}
+        with StandInServer() as server:
+            Provisioner(server.host, spec).run()
+            self.assertEqual(len(samplePairs(range(40), 10000)), 780)
+            weights = learnWeights(server.host, "testconcept", "unittestCB", "testAmalgamation", "label",
+                                   name="learned", pairs=500)
+            self.assertEqual(weights["label"], 0.0)
+            self.assertGreater(weights["x"], weights["noise"])
+            stored = getRequest(server.host).analytics.concepts("testconcept").amalgamationFunctions("learned")\
+                         .globalWeights.GET().json()
+            self.assertAlmostEqual(stored[2]["x"], weights["x"])
+            evaluation = Evaluation(server.host, "testconcept", "unittestCB", "learned", "label", k=3)
+            self.assertGreaterEqual(evaluation.leaveOneOut().accuracy(), 0.9)
+
+            with self.assertRaises(requests.HTTPError):
+                saveWeights(server.host, "testconcept", "bad", {"x": 1.0, "unknown": 1.0})
+            with self.assertRaises(requests.HTTPError):
+                saveWeights(server.host, "testconcept", "bad", {"x": "heavy"})
+            with self.assertRaises(requests.HTTPError):
+                localSimilarities(server.host, "testconcept", "testAmalgamation", [("c1", "nocase")])
+
+
+if __name__ == "__main__":
+    unittest.main()
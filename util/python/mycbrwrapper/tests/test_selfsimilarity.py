@@ -0,0 +1,47 @@
+from mycbrwrapper.selfsimilarity import SelfSimilarityMatrix
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.standin import StandInServer
+from mycbrwrapper.rest import getRequest
+import tempfile
+import unittest
+
+
+class SelfSimilarityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        cases = [{"caseID": "c{}".format(i), "x": str(i)} for i in range(8)]
+        spec = {"concepts": {"testconcept": {
+            "attributes": {"x": {"type": "Double", "min": 0, "max": 10}},
+            "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+            "cases": {"unittestCB": cases}}}}
+        Provisioner(self.server.host, spec).run()
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def matrix(self, name):
+        return SelfSimilarityMatrix(self.server.host, "testconcept", "unittestCB", "testAmalgamation",
+                                    self.tmpdir.name + "/" + name, batchsize=3)
+
+    def test_update_matches_rebuild(self):
+        ssm = self.matrix("incremental").build()
+        self.assertAlmostEqual(ssm.similarity("c0", "c5"), 0.5)
+        cases = getRequest(self.server.host).concepts("testconcept").casebases("unittestCB").cases
+        for i in (8, 9, 10):
+            cases("c{}".format(i)).PUT(json={"x": str(i)})
+        cases("c2").DELETE()
+        ssm.update(added=["c8", "c9", "c10"], removed=["c2"])
+        self.assertEqual(len(ssm.matrix), 16)
+        expected = self.matrix("rebuilt").build()
+        self.assertTrue(ssm.toDataFrame().equals(expected.toDataFrame()))
+        ssm.compact()
+        self.assertEqual(len(ssm.matrix), 10)
+        reloaded = self.matrix("incremental").load()
+        self.assertEqual(reloaded.row("c9"), expected.row("c9"))
+
+
+if __name__ == "__main__":
+    unittest.main()
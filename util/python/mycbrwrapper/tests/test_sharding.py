@@ -0,0 +1,81 @@
+from mycbrwrapper import recorder
+from mycbrwrapper.sharding import ShardedCaseBase, shardIndex
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.standin import StandInServer
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+
+class ShardingTest(unittest.TestCase):
+
+    spec = {"concepts": {"testconcept": {
+        "attributes": {"x": {"type": "Double", "min": 0, "max": 100}},
+        "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}}}}}
+
+    def setUp(self):
+        self.servers = [StandInServer().start() for _ in range(2)]
+        for server in self.servers:
+            Provisioner(server.host, self.spec).run()
+        shards = [(server.host, cb) for server in self.servers for cb in ("shard0", "shard1")]
+        self.casebase = ShardedCaseBase("testconcept", shards)
+        self.casebase.create()
+        self.casebase.addCases([{"caseID": "c{}".format(i), "x": str(i)} for i in range(100)])
+
+    def tearDown(self):
+        self.casebase.close()
+        for server in self.servers:
+            server.stop()
+
+    def test_partition_is_stable(self):
+        self.assertEqual(shardIndex("c1", 4), shardIndex("c1", 4))
+        sizes = [len(cb) for server in self.servers for cb in server.model.casebases.values()]
+        self.assertEqual(sum(sizes), 100)
+        self.assertTrue(all(sizes))
+
+    def test_scatter_gather(self):
+        result = self.casebase.retrieveByCaseID("c50", "testAmalgamation", k=5)
+        self.assertEqual([c["caseID"] for c in result][0], "c50")
+        self.assertEqual(sorted(c["caseID"] for c in result), ["c48", "c49", "c50", "c51", "c52"])
+        self.assertEqual(result.missing, [])
+
+    def test_partial_results(self):
+        self.servers[1].stop()
+        casebase = ShardedCaseBase("testconcept", self.casebase.shards, timeout=5, partial=True)
+        result = casebase.retrieve({"x": "50"}, "testAmalgamation", k=5)
+        casebase.close()
+        self.assertEqual(len(result.missing), 2)
+        self.assertEqual(len(result), 5)
+        with self.assertRaises(Exception):
+            self.casebase.retrieve({"x": "50"}, "testAmalgamation", k=5)
+
+    def test_hung_shard_frees_its_worker(self):
+        self.servers[1].model.pause, self.servers[1].model.pauseRate = 3.0, 1.0
+        casebase = ShardedCaseBase("testconcept", self.casebase.shards, timeout=0.3, partial=True)
+        result = casebase.retrieve({"x": "50"}, "testAmalgamation", k=5)
+        self.assertEqual(len(result.missing), 2)
+        # the requests to the hung server gave up as well, so every worker is free again
+        barrier = threading.Barrier(len(casebase.shards), timeout=1.5)
+        futures = [casebase.pool.submit(barrier.wait) for _ in casebase.shards]
+        for future in futures:
+            future.result()
+        casebase.close()
+
+    def test_unknown_values_are_not_queried(self):
+        self.casebase.addCases([{"caseID": "u", "x": "_unknown_"}])
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "calls.log.gz")
+        recorder.startRecording(path)
+        try:
+            self.casebase.retrieveByCaseID("u", "testAmalgamation", k=3)
+        finally:
+            recorder.stopRecording()
+        queries = [json.loads(e["b"]) for e in recorder.readLog(path) if "retrievalByMultipleAttributes" in e["p"]]
+        tmpdir.cleanup()
+        self.assertEqual(queries, [{}] * len(self.casebase.shards))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.selfsimilarity import SelfSimilarityMatrix
+from mycbrwrapper.sharedtables import SharedTablePublisher, SharedTables
+from mycbrwrapper.standin import StandInServer
+import json
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+
+def workerView(manifestPath):
+    """Run in a worker process: attach and report what it sees."""
+    tables = SharedTables.attach(manifestPath)
+    price, color = tables.column("price"), tables.column("color")
+    result = (tables.fingerprint, float(price[3]), color[1][color[0][3]], tables.similarity("c0", "c5"),
+              price.flags.writeable, tables.case("c3")["color"], tables.rowOf("c5"), tables.caseIDs.flags.writeable)
+    tables.close()
+    return result
+
+
+class SharedTablesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        cases = [{"caseID": "c{}".format(i), "price": str(i * 10), "color": "red" if i % 2 else "blue"}
+                 for i in range(8)]
+        spec = {"concepts": {"testconcept": {
+            "attributes": {"price": {"type": "Double", "min": 0, "max": 100},
+                           "color": {"type": "Symbol", "allowedValues": ["red", "blue"]}},
+            "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+            "cases": {"unittestCB": cases}}}}
+        Provisioner(self.server.host, spec).run()
+        self.matrix = SelfSimilarityMatrix(self.server.host, "testconcept", "unittestCB", "testAmalgamation",
+                                           os.path.join(self.tmpdir.name, "ssm")).build()
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def check(self, backend):
+        directory = os.path.join(self.tmpdir.name, backend)
+        with SharedTablePublisher(self.server.host, "testconcept", "unittestCB", directory, backend) as publisher:
+            manifest = publisher.publish(matrix=self.matrix)
+            with multiprocessing.get_context("spawn").Pool(2) as pool:
+                views = pool.map(workerView, [manifest] * 2)
+            with open(manifest) as f:
+                described = json.load(f)
+            expected = (described["fingerprint"], 30.0, "red", self.matrix.similarity("c0", "c5"), False,
+                        "red", 5, False)
+            self.assertEqual(views, [expected, expected])
+            # the caseIDs are an array like the others, the manifest only counts them
+            self.assertEqual(described["cases"], 8)
+            self.assertEqual(sorted(described), ["arrays", "backend", "casebase", "cases", "columns", "concept",
+                                                 "fingerprint"])
+            self.assertEqual(sorted(described["arrays"]), ["caseIDs", "column0", "column1", "similarities"])
+
+            old = SharedTables.attach(manifest)
+            getRequest(self.server.host).concepts("testconcept").casebases("unittestCB").cases("c8")\
+                .PUT(json={"price": "80", "color": "blue"})
+            publisher.publish()
+            self.assertFalse(old.current())
+            self.assertEqual(float(old.column("price")[3]), 30.0)
+            new = SharedTables.attach(manifest)
+            self.assertEqual(len(new.caseIDs), 9)
+            self.assertEqual(new.rowOf("c8"), 8)
+            self.assertEqual(new.case("c8")["price"], "80.0")
+            for unknown in ("c", "c45", "c9", "d"):
+                self.assertRaises(KeyError, new.rowOf, unknown)
+            self.assertIsNone(new.matrix)
+            self.assertEqual(new.toDataFrame().loc["c8", "color"], "blue")
+            old.close()
+            new.close()
+        self.assertFalse(os.path.exists(manifest))
+
+    def test_file_backend(self):
+        self.check("file")
+
+    def test_shm_backend(self):
+        self.check("shm")
+
+
+if __name__ == "__main__":
+    unittest.main()
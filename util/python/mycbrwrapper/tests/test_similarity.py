@@ -12,25 +12,35 @@ class SimilarityTests(CBRTestCase):
         super(SimilarityTests, cls).tearDownClass()
 
     def test_getSimilarityFunction(self):
-        api = getRequest(defaulthost)
-        call = api.concepts("testconcept").attributes("wind_speed").similarityfunctions
+        call = self.api().concepts(self.concept).attributes("wind_speed").similarityFunctions
         result = call.GET()
-        print(result.json())
+        self.assertEqual(result.status_code, 200)
+        self.assertIn(self.localSimID, result.json())
 
     def test_getAllCases(self):
-        api = getRequest(defaulthost)
-        call = api.concepts("testconcept").instances
+        call = self.api().concepts(self.concept).cases
         results = call.GET()
-        print("url: {} len of elems.. {}".format(call._url,len(results.json())))
+        self.assertEqual(results.status_code, 200)
+        cases = {case["caseID"]: case for case in results.json()}
+        self.assertEqual(sorted(cases), ["w0", "w1", "w2"])
+        self.assertEqual(float(cases["w1"]["wind_speed"]), 5.2)
 
 
     def test_retrieval(self):
-        api = getRequest(defaulthost)
-        call = api.concepts("testconcept").casebases("unittestCB").retrievalByID
+        call = self.api().concepts(self.concept).casebases(self.casebase)\
+                   .amalgamationFunctions(self.amalgamationFunction).retrievalByCaseID
         result = call.GET(params={
-            "caseID":"testconcept1"
+            "caseID":"w1"
         })
-        print(result.json())
+        self.assertEqual(result.status_code, 200)
+        ranking = sorted(result.json().items(), key=lambda item: -item[1])
+        # w1 is most similar to itself, and w2 is closer to it than w0 in every attribute
+        self.assertEqual([caseID for caseID, _ in ranking], ["w1", "w2", "w0"])
+        self.assertAlmostEqual(ranking[0][1], 1.0)
+        self.assertTrue(all(0 <= similarity < 1 for _, similarity in ranking[1:]))
+
+        result = call.GET(params={"caseID": "w1", "k": 2})
+        self.assertEqual(sorted(result.json()), ["w1", "w2"])
 
     def __init__(self, *args, **kwargs):
         super(SimilarityTests, self).__init__(*args, **kwargs)
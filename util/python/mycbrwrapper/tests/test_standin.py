@@ -0,0 +1,74 @@
+from mycbrwrapper.standin import StandInServer, caseIDSetID
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+import json
+import unittest
+
+
+def call(server, method, path, body=None):
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    request = Request(server.url + path, data=data, method=method,
+                      headers={"Content-Type": "application/json"})
+    with urlopen(request) as response:
+        raw = response.read().decode("utf-8")
+        return raw if response.headers["Content-Type"] == "text/plain" else json.loads(raw)
+
+
+class StandInTest(unittest.TestCase):
+
+    cases = [{"caseID": "w0", "wind_speed": "0"},
+             {"caseID": "w1", "wind_speed": "5.2"},
+             {"caseID": "w2", "wind_speed": "2.1"},
+             {"caseID": "w3", "wind_speed": "25"}]
+    ephemeral = "/ephemeral/concepts/testconcept/casebases/unittestCB/amalgamationFunctions/testAmalgamation"
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        attribute = quote(json.dumps({"type": "Double", "min": 0, "max": 25}))
+        call(self.server, "PUT", "/concepts/testconcept")
+        call(self.server, "PUT", "/concepts/testconcept/attributes/wind_speed?attributeJSON=" + attribute)
+        call(self.server, "PUT", "/concepts/testconcept/amalgamationFunctions/testAmalgamation"
+                                 "?amalgamationFunctionType=WEIGHTED_SUM")
+        call(self.server, "PUT", "/casebases/unittestCB")
+        call(self.server, "POST", "/concepts/testconcept/casebases/unittestCB/cases", {"cases": self.cases})
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_handle_matches_resent_ids(self):
+        subset = ["w2", "w0", "w1", "w0"]
+        handle = call(self.server, "POST", "/ephemeral/caseIDSets", subset)
+        self.assertEqual(handle, caseIDSetID(subset))
+        self.assertEqual(call(self.server, "GET", "/ephemeral/caseIDSets/" + handle), 3)
+        resent = call(self.server, "POST", self.ephemeral + "/retrievalByCaseIDWithContent?caseID=w0&k=2", subset)
+        byHandle = call(self.server, "GET", self.ephemeral + "/caseIDSets/" + handle
+                        + "/retrievalByCaseIDWithContent?caseID=w0&k=2")
+        self.assertEqual(resent, byHandle)
+        self.assertEqual([c["caseID"] for c in byHandle], ["w0", "w2"])
+        matrix = call(self.server, "GET", self.ephemeral + "/caseIDSets/" + handle + "/computeSelfSimilarity?k=-1")
+        self.assertEqual(sorted(matrix), ["w0", "w1", "w2"])
+        self.assertNotIn("w3", matrix["w0"])
+
+    def test_unknown_handle(self):
+        handle = caseIDSetID(["w0"])
+        with self.assertRaises(HTTPError) as e:
+            call(self.server, "POST", self.ephemeral + "/caseIDSets/" + handle + "/retrievalByCaseIDs?k=1", ["w0"])
+        self.assertEqual(e.exception.code, 404)
+        call(self.server, "POST", "/ephemeral/caseIDSets", ["w0"])
+        result = call(self.server, "POST", self.ephemeral + "/caseIDSets/" + handle + "/retrievalByCaseIDs?k=1", ["w0"])
+        self.assertEqual(result, {"w0": {"w0": 1.0}})
+
+    def test_cases_etag(self):
+        request = Request(self.server.url + "/concepts/testconcept/casebases/unittestCB/cases?offset=1&limit=2")
+        with urlopen(request) as response:
+            etag = response.headers["ETag"]
+            self.assertEqual([c["caseID"] for c in json.loads(response.read())], ["w1", "w2"])
+        request.add_header("If-None-Match", etag)
+        with self.assertRaises(HTTPError) as e:
+            urlopen(request)
+        self.assertEqual(e.exception.code, 304)
+
+
+if __name__ == "__main__":
+    unittest.main()
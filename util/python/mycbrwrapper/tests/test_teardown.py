@@ -0,0 +1,75 @@
+from mycbrwrapper.concepts import Concepts
+from mycbrwrapper.fingerprint import getFingerprint
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.standin import StandInServer
+from mycbrwrapper.teardown import Teardown
+import unittest
+
+
+class TeardownTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        concept = {"attributes": {"x": {"type": "Double", "min": 0, "max": 20}},
+                   "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}}}
+        spec = {"concepts": {
+            "first": dict(concept, cases={"cb1": [{"caseID": "keep{}".format(i), "x": str(i)} for i in range(5)] +
+                                                [{"caseID": "tmp{}".format(i), "x": str(i)} for i in range(5)]}),
+            "second": dict(concept, cases={"cb2": [{"caseID": "s{}".format(i), "x": str(i)} for i in range(5)]})}}
+        Provisioner(self.server.host, spec).run()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_delete_cases_by_pattern(self):
+        fingerprint = getFingerprint(self.server.host, "first", "cb1")
+        fingerprint.refresh()
+        Teardown(self.server.host).deleteCases(["cb1"], "tmp*", concepts=["first"])
+        self.assertEqual(sorted(self.server.model.casebases["cb1"]), ["keep{}".format(i) for i in range(5)])
+        self.assertEqual(fingerprint.value().split("-")[0], "5")
+        self.assertTrue(fingerprint.revalidate())
+
+    def test_reset_and_partial_teardown(self):
+        Provisioner(self.server.host, {"concepts": {"first": {"cases": {"cb2": [{"caseID": "f", "x": "1"}]}}}}).run()
+        results = Teardown(self.server.host).run(concepts=["first"])
+        self.assertEqual(sorted(self.server.model.concepts), ["second"])
+        self.assertEqual(sorted(self.server.model.casebases), ["cb2"])
+        self.assertEqual(sorted(self.server.model.casebases["cb2"]), ["s{}".format(i) for i in range(5)])
+        self.assertIn("functions:first", results)
+        self.assertIn("casebase:cb1", results)
+
+        Provisioner(self.server.host, {"concepts": {"third": {"cases": {"cb3": [{"caseID": "t"}]}}}}).run()
+        results = Teardown(self.server.host).run()
+        self.assertEqual(sorted(results), ["casebase:cb2", "casebase:cb3", "cases:cb2", "cases:cb3", "concepts"])
+        self.assertEqual(self.server.model.concepts, {})
+        self.assertEqual(self.server.model.casebases, {})
+
+    def test_refused_case_deletes_raise(self):
+        Provisioner(self.server.host, {"concepts": {"first": {"cases": {"cb2": [{"caseID": "f", "x": "1"},
+                                                                               {"caseID": "g", "x": "2"}]}}}}).run()
+
+        class Refusing(dict):
+            # the server answers false for "f", as the real one did for every case
+            def pop(self, key, default=None):
+                return default if key == "f" else dict.pop(self, key, default)
+        self.server.model.casebases["cb2"] = Refusing(self.server.model.casebases["cb2"])
+        fingerprint = getFingerprint(self.server.host, "first", "cb2")
+        fingerprint.refresh()
+        with self.assertRaises(RuntimeError):
+            Teardown(self.server.host).run(concepts=["first"])
+        self.assertEqual(sorted(self.server.model.casebases["cb2"]), ["f"] + ["s{}".format(i) for i in range(5)])
+        # only the case actually deleted left the fingerprint
+        self.assertEqual(fingerprint.value().split("-")[0], "1")
+        self.assertTrue(fingerprint.revalidate())
+
+    def test_delete_all_concepts(self):
+        cs = Concepts(self.server.host)
+        for name in ("a", "b", "c"):
+            cs.addConcept(name)
+        cs.deleteAllConcepts()
+        self.assertEqual(cs.concepts, {})
+        self.assertEqual(sorted(self.server.model.concepts), ["first", "second"])
+
+
+if __name__ == "__main__":
+    unittest.main()
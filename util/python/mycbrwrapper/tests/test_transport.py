@@ -0,0 +1,141 @@
+from mycbrwrapper import transport
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.standin import StandInServer
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import asyncio
+import json
+import socket
+import threading
+import unittest
+import warnings
+
+import requests
+
+try:
+    import httpx
+    import hypercorn
+except ImportError:
+    httpx = hypercorn = None
+
+
+class TransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        cases = [{"caseID": "c{}".format(i), "x": str(i)} for i in range(20)]
+        spec = {"concepts": {"testconcept": {
+            "attributes": {"x": {"type": "Double", "min": 0, "max": 20}},
+            "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+            "cases": {"unittestCB": cases}}}}
+        Provisioner(self.server.host, spec).run()
+
+    def tearDown(self):
+        transport.useTransport("default")
+        self.server.stop()
+
+    def retrieve(self, i):
+        result = getRequest(self.server.host).concepts("testconcept").casebases("unittestCB")\
+            .amalgamationFunctions("testAmalgamation").retrievalByCaseID\
+            .GET(params={"caseID": "c{}".format(i % 20), "k": 3})
+        similarities = result.json()
+        return max(similarities, key=similarities.get)
+
+    def test_pooled_transport_is_shared(self):
+        adapter = transport.useTransport("http1", maxsize=4)
+        self.assertIs(getRequest(self.server.host)._session.get_adapter("http://x"), adapter)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            found = list(pool.map(self.retrieve, range(40)))
+        self.assertEqual(found, ["c{}".format(i % 20) for i in range(40)])
+        pool = adapter.poolmanager.connection_from_url(self.server.url)
+        self.assertLessEqual(pool.num_connections, 4)
+
+    def test_http2_falls_back_to_http1(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            adapter = transport.useTransport("http2")
+        self.assertEqual([self.retrieve(i) for i in range(3)], ["c0", "c1", "c2"])
+        if isinstance(adapter, transport.HTTP2Adapter):
+            self.assertIn(self.server.host, adapter.http1Hosts)
+        else:
+            self.assertIsInstance(adapter, transport.PooledAdapter)
+
+    def test_benchmark(self):
+        report = transport.benchmark(self.server.host, "testconcept", "unittestCB", "testAmalgamation",
+                                     transports=("default", "http1"), calls=40, concurrency=4)
+        self.assertEqual(sorted(report), ["default", "http1"])
+        self.assertEqual(report["http1"]["errors"], 0)
+        self.assertIsNone(transport.activeTransport())
+
+
+async def echo(scope, receive, send):
+    """ASGI app answering with the HTTP version, headers and body it received."""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            await send({"type": message["type"] + ".complete"})
+            if message["type"] == "lifespan.shutdown":
+                return
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    content = json.dumps({"version": scope["http_version"], "body": body.decode(),
+                          "headers": {k.decode(): v.decode() for k, v in scope["headers"]}}).encode()
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": content})
+
+
+@unittest.skipUnless(httpx and hypercorn, "httpx[http2] and hypercorn are not installed")
+class H2CTransportTest(unittest.TestCase):
+    """HTTP2Adapter against a server speaking cleartext HTTP/2."""
+
+    def setUp(self):
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+        # listening before hypercorn starts, so the first call cannot be refused;
+        # hypercorn owns (and closes) the descriptor
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        self.url = "http://127.0.0.1:{}/".format(sock.getsockname()[1])
+        config = Config()
+        config.bind = ["fd://{}".format(sock.detach())]
+        self.loop = asyncio.new_event_loop()
+        self.stopped = asyncio.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(serve(echo, config, shutdown_trigger=self.stopped.wait))
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        self.adapter = transport.HTTP2Adapter()
+
+    def tearDown(self):
+        self.adapter.shutdown()
+        self.loop.call_soon_threadsafe(self.stopped.set)
+        self.thread.join()
+        self.loop.close()
+
+    def test_hop_by_hop_headers_are_not_sent(self):
+        session = requests.Session()
+        session.mount("http://", self.adapter)
+        result = session.post(self.url, data=b"case", headers={
+            "Connection": "keep-alive, Upgrade, X-Hop", "Keep-Alive": "timeout=5", "Upgrade": "websocket",
+            "Transfer-Encoding": "chunked", "X-Hop": "1", "X-Case": "c0"})
+        result.raise_for_status()
+        seen = result.json()
+        self.assertEqual(seen["version"], "2")
+        self.assertEqual(seen["body"], "case")
+        self.assertEqual(seen["headers"]["x-case"], "c0")
+        for name in ("connection", "keep-alive", "upgrade", "transfer-encoding", "x-hop"):
+            self.assertNotIn(name, seen["headers"])
+        self.assertIn(urlsplit(self.url).netloc, self.adapter.http2Hosts)
+
+
+if __name__ == "__main__":
+    unittest.main()
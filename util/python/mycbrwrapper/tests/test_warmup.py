@@ -0,0 +1,79 @@
+from mycbrwrapper import recorder
+from mycbrwrapper.cache import RetrievalCache
+from mycbrwrapper.fingerprint import getFingerprint
+from mycbrwrapper.provisioning import Provisioner
+from mycbrwrapper.rest import getRequest
+from mycbrwrapper.standin import StandInServer
+from mycbrwrapper.warmup import WarmUp, hotQueries, warmUp
+from collections import Counter
+import os
+import tempfile
+import unittest
+
+
+class WarmUpTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        cases = [{"caseID": "c{}".format(i), "x": str(i), "color": "red" if i % 2 else "blue"} for i in range(30)]
+        spec = {"concepts": {"testconcept": {
+            "attributes": {"x": {"type": "Double", "min": 0, "max": 30},
+                           "color": {"type": "Symbol", "allowedValues": ["red", "blue"]}},
+            "amalgamationFunctions": {"testAmalgamation": {"amalgamationFunctionType": "WEIGHTED_SUM"}},
+            "cases": {"unittestCB": cases}}}}
+        Provisioner(self.server.host, spec).run()
+        self.cache = RetrievalCache(os.path.join(self.tmpdir.name, "cache.db"))
+
+    def tearDown(self):
+        recorder.stopRecording()
+        self.cache.close()
+        self.server.stop()
+        self.tmpdir.cleanup()
+
+    def function(self):
+        return getRequest(self.server.host).concepts("testconcept").casebases("unittestCB")\
+            .amalgamationFunctions("testAmalgamation")
+
+    def url(self, call):
+        return "http://{}/concepts/testconcept/casebases/unittestCB/amalgamationFunctions/testAmalgamation/{}"\
+            .format(self.server.host, call)
+
+    def test_warm_from_log(self):
+        path = os.path.join(self.tmpdir.name, "calls.log.gz")
+        recorder.startRecording(path)
+        function = self.function()
+        for caseID in ["c1", "c2", "c1", "c3", "c1", "c2"]:
+            function.retrievalByCaseID.GET(params={"caseID": caseID, "k": 5})
+        function.retrievalByMultipleCaseIDs.POST(params={"k": 5}, json=["c3", "c4"])
+        function.retrievalByAttribute.GET(params={"Symbol attribute name": "color", "value": "red", "k": 3})
+        recorder.stopRecording()
+
+        caseIDs, attributes = hotQueries(recorder.readLog(path))
+        counts = caseIDs[("testconcept", "unittestCB", "testAmalgamation", 5)]
+        self.assertEqual(counts.most_common(3), [("c1", 3), ("c2", 2), ("c3", 2)])
+        self.assertEqual(list(attributes), [("testconcept", "unittestCB", "testAmalgamation", "color", "red", 3)])
+
+        stats = warmUp(self.server.host, self.cache, [path], top=3, rate=100, batchsize=2)
+        self.assertEqual((stats["calls"], stats["warmed"]), (3, 4))
+        fingerprint = getFingerprint(self.server.host, "testconcept", "unittestCB").value()
+        expected = self.function().retrievalByCaseID.GET(params={"caseID": "c2", "k": 5}).json()
+        self.assertEqual(self.cache.get(self.url("retrievalByCaseID") + "?caseID=c2&k=5", None, fingerprint),
+                         expected)
+        self.assertIsNone(self.cache.get(self.url("retrievalByCaseID") + "?caseID=c4&k=5", None, fingerprint))
+        cached = self.cache.get(self.url("retrievalByAttribute") + "?Symbol%20attribute%20name=color&k=3&value=red",
+                                None, fingerprint)
+        self.assertEqual(len(cached["similarCases"]), 3)
+
+        again = WarmUp(self.server.host, self.cache, rate=100).run(caseIDs, top=3)
+        self.assertEqual((again["calls"], again["skipped"]), (0, 3))
+
+    def test_neighbours(self):
+        caseIDs = {("testconcept", "unittestCB", "testAmalgamation", 3): Counter(["c10"])}
+        stats = WarmUp(self.server.host, self.cache, rate=100, neighbours=2).run(caseIDs)
+        self.assertEqual(stats["warmed"], 3)
+        self.assertEqual(len(self.cache), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,232 @@
+"""
+Transports for the sessions made by mycbrwrapper.rest.getRequest.
+
+Without a transport every getRequest(host) gets a new requests session
+and with it new connections, so fanning out retrievals opens a TCP
+connection per call. A transport is mounted on all of those sessions:
+
+    from mycbrwrapper import transport
+    transport.useTransport("http2")      # or "http1"
+
+"http1" shares one pool of keep-alive HTTP/1.1 connections. "http2"
+sends the calls through one httpx client (pip install httpx[http2])
+speaking cleartext HTTP/2 with prior knowledge, so concurrent calls are
+multiplexed as streams over a few connections. Hosts that do not speak
+h2c, and all hosts when httpx is not installed, are served by the
+"http1" transport.
+
+    python -m mycbrwrapper transport-bench --standin
+"""
+
+from mycbrwrapper.loadtest import percentile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import threading
+import time
+import warnings
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+TRANSPORTS = ("default", "http1", "http2")
+
+# connection-specific headers, which HTTP/2 forbids (RFC 9113, section 8.2.2)
+HOP_BY_HOP = frozenset(["connection", "keep-alive", "proxy-connection", "te", "transfer-encoding", "upgrade"])
+
+
+def endToEndHeaders(headers):
+    """The headers of an HTTP/1.1 request without its hop-by-hop headers.
+
+    Drops the headers in HOP_BY_HOP and those the Connection header names.
+    """
+    hopByHop = set(HOP_BY_HOP)
+    for value in headers.get("Connection", "").split(","):
+        hopByHop.add(value.strip().lower())
+    return {name: value for name, value in headers.items() if name.lower() not in hopByHop}
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTP/1.1 keep-alive connections shared by all sessions.
+
+    Closing a session does not close the shared pool; shutdown() does.
+
+    :param connections: number of hosts to keep pools for
+    :param maxsize: connections kept per host
+    """
+
+    def __init__(self, connections=16, maxsize=64):
+        super(PooledAdapter, self).__init__(pool_connections=connections, pool_maxsize=maxsize)
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        super(PooledAdapter, self).close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """requests adapter sending calls over HTTP/2 with an httpx client.
+
+    Calls to a host are multiplexed over at most `connections`
+    connections. The first call to a host that fails with a protocol
+    error (the host does not speak h2c) marks the host as HTTP/1.1 only
+    and is resent through `fallback`; the server cannot have processed
+    it, since it did not understand the HTTP/2 preface. Hop-by-hop
+    headers of the request are not forwarded.
+
+    :param connections: maximum number of connections per host
+    :param fallback: adapter for HTTP/1.1 hosts (default: a PooledAdapter)
+    """
+
+    def __init__(self, connections=4, fallback=None):
+        super(HTTP2Adapter, self).__init__()
+        import httpx
+        self.httpx = httpx
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        self.client = httpx.Client(http1=False, http2=True, limits=limits, timeout=None)
+        self.fallback = fallback or PooledAdapter()
+        self.http1Hosts = set()
+        self.http2Hosts = set()
+        self.lock = threading.Lock()
+
+    def _timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            return self.httpx.Timeout(timeout[1], connect=timeout[0])
+        return self.httpx.Timeout(timeout)
+
+    def _response(self, request, result):
+        response = requests.Response()
+        response.status_code = result.status_code
+        response.headers = CaseInsensitiveDict(result.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.reason = result.reason_phrase
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response._content = result.content
+        return response
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        host = urlsplit(request.url).netloc
+        if host in self.http1Hosts:
+            return self.fallback.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert,
+                                      proxies=proxies)
+        try:
+            result = self.client.request(request.method, request.url, headers=endToEndHeaders(request.headers),
+                                         content=request.body, timeout=self._timeout(timeout))
+        except self.httpx.RemoteProtocolError as e:
+            if host in self.http2Hosts:
+                raise requests.exceptions.ConnectionError(e, request=request)
+            with self.lock:
+                self.http1Hosts.add(host)
+            return self.fallback.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert,
+                                      proxies=proxies)
+        except self.httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except self.httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+        if host not in self.http2Hosts:
+            with self.lock:
+                self.http2Hosts.add(host)
+        return self._response(request, result)
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        self.client.close()
+        self.fallback.shutdown()
+
+
+def makeTransport(kind, **options):
+    """A shared adapter for the transport `kind` ("http1" or "http2"), None for "default".
+
+    "http2" without httpx installed warns and returns the "http1" transport.
+    """
+    if kind in (None, "default"):
+        return None
+    if kind == "http2":
+        try:
+            return HTTP2Adapter(**options)
+        except ImportError:
+            warnings.warn("httpx[http2] is not installed, using the pooled HTTP/1.1 transport")
+            kind = "http1"
+    if kind == "http1":
+        return PooledAdapter(**options)
+    raise ValueError("unknown transport {}, use one of {}".format(kind, TRANSPORTS))
+
+
+_transport = None
+
+
+def activeTransport():
+    """The adapter getRequest mounts on new sessions, or None."""
+    return _transport
+
+
+def useTransport(kind="http2", **options):
+    """Send all calls made through mycbrwrapper.rest.getRequest with the transport `kind` from now on.
+
+    :param kind: "http2", "http1" or "default" (a new session per getRequest)
+    :param options: passed to HTTP2Adapter or PooledAdapter
+    :returns: the adapter, or None for "default"
+    """
+    global _transport
+    previous, _transport = _transport, makeTransport(kind, **options)
+    if previous is not None:
+        previous.shutdown()
+    return _transport
+
+
+def benchmark(host, concept, casebase, amalgamationFunction, transports=TRANSPORTS, calls=2000, concurrency=64,
+              k=10):
+    """Fan out retrievalByCaseID calls through getRequest with each transport.
+
+    :returns: dict of transport name to dict with "throughput" (calls per
+        second), "errors" and the latency percentiles "p50", "p90" and
+        "p99" in ms and "fallback" (True if "http2" ran as "http1"
+        because httpx is not installed)
+    """
+    from mycbrwrapper.rest import getRequest
+    result = getRequest(host).concepts(concept).casebases(casebase).cases.GET()
+    result.raise_for_status()
+    caseIDs = [case["caseID"] for case in result.json()]
+    global _transport
+    previous = _transport
+    report = {}
+
+    def call(i):
+        start = time.monotonic()
+        try:
+            response = getRequest(host).concepts(concept).casebases(casebase)\
+                .amalgamationFunctions(amalgamationFunction).retrievalByCaseID\
+                .GET(params={"caseID": caseIDs[i % len(caseIDs)], "k": k})
+            ok = response.status_code < 500
+        except requests.RequestException:
+            ok = False
+        return ok, time.monotonic() - start
+
+    try:
+        for kind in transports:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                _transport = makeTransport(kind)
+            start = time.monotonic()
+            try:
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    results = list(pool.map(call, range(calls)))
+            finally:
+                if _transport is not None:
+                    _transport.shutdown()
+            elapsed = time.monotonic() - start
+            latencies = sorted(latency * 1000 for ok, latency in results if ok)
+            summary = {"throughput": len(latencies) / elapsed, "errors": calls - len(latencies)}
+            for p in (50, 90, 99):
+                summary["p{}".format(p)] = percentile(latencies, p)
+            summary["fallback"] = kind == "http2" and not isinstance(_transport, HTTP2Adapter)
+            report[kind] = summary
+    finally:
+        _transport = previous
+    return report
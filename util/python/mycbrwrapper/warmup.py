@@ -0,0 +1,197 @@
+"""
+Warm a RetrievalCache, and the server, from recorded query logs.
+
+    python -m mycbrwrapper warmup --host localhost:8080 --log calls.log.gz --cache results.db --top 2000
+
+After a deploy or a casebase reload the first retrievals of popular
+cases all reach a cold server at once. The warm-up reads logs written by
+mycbrwrapper.recorder, counts the caseIDs queried per concept, casebase,
+amalgamation function and k, and retrieves the most frequent ones with
+batched retrievalByMultipleCaseIDs calls at a bounded rate. Each result
+is stored under the cache key of the single retrievalByCaseID call that
+MyCBRRestApi(base_url="http://" + host, cache=...) makes, so those calls
+are hits. Queries by caseID with content count as well; their results
+are cached as retrievalByCaseID, which is what clients with
+case_table=True call. Queries by attribute cannot be batched, the most
+frequent ones are sent as they were.
+"""
+
+from mycbrwrapper.fingerprint import getFingerprint
+from mycbrwrapper.rest import getRequest
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+import json
+import re
+import time
+
+_RETRIEVAL = re.compile(r"^/concepts/([^/]+)/casebases/([^/]+)/amalgamationFunctions/([^/]+)/"
+                        r"(retrievalByCaseID|retrievalByCaseIDWithContent|retrievalByMultipleCaseIDs|"
+                        r"retrievalByAttribute)$")
+_ATTRIBUTE = "Symbol attribute name"
+
+
+def hotQueries(entries, recent=None):
+    """Count the retrievals of a query log.
+
+    :param entries: log entries (see mycbrwrapper.recorder.readLog)
+    :param recent: only count entries of the last `recent` seconds of the log
+    :returns: (dict of (concept, casebase, amalgamation function, k) to a
+        Counter of caseIDs, Counter of (concept, casebase, amalgamation
+        function, attribute, value, k))
+    """
+    entries = [e for e in entries if (e.get("s") or 200) < 400]
+    if recent is not None and entries:
+        last = max(e.get("t", 0.0) for e in entries)
+        entries = [e for e in entries if e.get("t", 0.0) >= last - recent]
+    caseIDs = {}
+    attributes = Counter()
+    for entry in entries:
+        parts = urlsplit(entry["p"])
+        match = _RETRIEVAL.match(parts.path)
+        if match is None:
+            continue
+        concept, casebase, function = (unquote(g) for g in match.groups()[:3])
+        params = {k: v[-1] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+        k = int(params.get("k", "-1"))
+        call = match.group(4)
+        if call == "retrievalByAttribute":
+            if _ATTRIBUTE in params and "value" in params:
+                attributes[(concept, casebase, function, params[_ATTRIBUTE], params["value"], k)] += 1
+            continue
+        if call == "retrievalByMultipleCaseIDs":
+            queried = json.loads(entry["b"]) if entry.get("b") else []
+        else:
+            queried = [params["caseID"]] if "caseID" in params else []
+        caseIDs.setdefault((concept, casebase, function, k), Counter()).update(queried)
+    return caseIDs, attributes
+
+
+class WarmUp():
+    """Fill a RetrievalCache with the results of the hot queries of a log.
+
+    :param host: hostname of the API server (e.g. localhost:8080)
+    :param cache: the mycbrwrapper.cache.RetrievalCache to fill
+    :param batchsize: caseIDs per retrievalByMultipleCaseIDs call
+    :param rate: calls per second sent to the server
+    :param workers: maximum number of calls in flight
+    :param neighbours: also warm the `neighbours` most similar cases of
+        every hot case (0 for none)
+    """
+
+    def __init__(self, host, cache, batchsize=100, rate=10.0, workers=4, neighbours=0):
+        self.host = host
+        self.cache = cache
+        self.batchsize = batchsize
+        self.rate = rate
+        self.workers = workers
+        self.neighbours = neighbours
+
+    def url(self, concept, casebase, function, call):
+        """The URL MyCBRRestApi builds for a retrieval, up to the query string."""
+        return "http://{}/concepts/{}/casebases/{}/amalgamationFunctions/{}/{}".format(
+            self.host, concept, casebase, function, call)
+
+    def _paced(self, calls):
+        """Run the calls (functions without arguments) at no more than `rate` per second.
+
+        :returns: list of their results
+        """
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = []
+            for i, call in enumerate(calls):
+                delay = start + i / float(self.rate) - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(pool.submit(call))
+            return [f.result() for f in futures]
+
+    def _retrieveBatch(self, group, fingerprint, caseIDs):
+        concept, casebase, function, k = group
+        result = getRequest(self.host).concepts(concept).casebases(casebase).amalgamationFunctions(function)\
+            .retrievalByMultipleCaseIDs.POST(params={"k": k}, json=caseIDs)
+        result.raise_for_status()
+        rankings = result.json()
+        endpoint = self.url(concept, casebase, function, "retrievalByCaseID")
+        for caseID, ranking in rankings.items():
+            self.cache.put(endpoint + "?caseID=" + caseID + "&k=" + str(k), ranking, None, fingerprint)
+        return rankings
+
+    def _warmCaseIDs(self, group, fingerprint, caseIDs):
+        endpoint = self.url(*group[:3], "retrievalByCaseID")
+        k = str(group[3])
+        cold = [c for c in caseIDs if not self.cache.has(endpoint + "?caseID=" + c + "&k=" + k, None, fingerprint)]
+        batches = [cold[i:i + self.batchsize] for i in range(0, len(cold), self.batchsize)]
+        results = self._paced([lambda b=b: self._retrieveBatch(group, fingerprint, b) for b in batches])
+        rankings = {}
+        for result in results:
+            rankings.update(result)
+        return len(batches), len(cold), rankings
+
+    def _retrieveAttribute(self, query, fingerprint):
+        concept, casebase, function, attribute, value, k = query
+        result = getRequest(self.host).concepts(concept).casebases(casebase).amalgamationFunctions(function)\
+            .retrievalByAttribute.GET(params={_ATTRIBUTE: attribute, "k": k, "value": value})
+        result.raise_for_status()
+        # MyCBRRestApi.getSimilarCasesByAttribute does not quote the attribute and the value
+        url = self.url(concept, casebase, function, "retrievalByAttribute") + "?Symbol%20attribute%20name=" \
+            + attribute + "&k=" + str(k) + "&value=" + value
+        self.cache.put(url, result.json(), None, fingerprint)
+
+    def run(self, caseIDs, attributes=None, top=1000):
+        """Warm the cache with the `top` most frequent caseIDs of each group and the `top` most frequent
+        attribute queries.
+
+        :param caseIDs: first result of hotQueries()
+        :param attributes: second result of hotQueries()
+        :returns: dict with the number of "calls" sent, cached results
+            ("warmed") and results already cached ("skipped"), and "seconds"
+        """
+        start = time.monotonic()
+        stats = {"calls": 0, "warmed": 0, "skipped": 0}
+        fingerprints = {}
+
+        def fingerprint(concept, casebase):
+            if (concept, casebase) not in fingerprints:
+                fp = getFingerprint(self.host, concept, casebase)
+                fp.revalidate()
+                fingerprints[(concept, casebase)] = fp.value()
+            return fingerprints[(concept, casebase)]
+
+        for group, counts in caseIDs.items():
+            value = fingerprint(*group[:2])
+            hot = [caseID for caseID, _ in counts.most_common(top)]
+            calls, warmed, rankings = self._warmCaseIDs(group, value, hot)
+            stats["calls"] += calls
+            stats["warmed"] += warmed
+            stats["skipped"] += len(hot) - warmed
+            if self.neighbours:
+                seen = set(hot)
+                near = []
+                for ranking in rankings.values():
+                    ordered = sorted(ranking.items(), key=lambda item: -item[1])
+                    for caseID, _ in ordered[:self.neighbours + 1]:
+                        if caseID not in seen:
+                            seen.add(caseID)
+                            near.append(caseID)
+                calls, warmed, _ = self._warmCaseIDs(group, value, near)
+                stats["calls"] += calls
+                stats["warmed"] += warmed
+        queries = [q for q, _ in (attributes or Counter()).most_common(top)]
+        self._paced([lambda q=q, fp=fingerprint(*q[:2]): self._retrieveAttribute(q, fp) for q in queries])
+        stats["calls"] += len(queries)
+        stats["warmed"] += len(queries)
+        stats["seconds"] = time.monotonic() - start
+        return stats
+
+
+def warmUp(host, cache, logs, top=1000, recent=None, **args):
+    """Warm `cache` from the log files `logs` (see WarmUp for the other arguments).
+
+    :returns: the statistics of WarmUp.run
+    """
+    from mycbrwrapper.recorder import readLog
+    entries = [entry for path in logs for entry in readLog(path)]
+    caseIDs, attributes = hotQueries(entries, recent)
+    return WarmUp(host, cache, **args).run(caseIDs, attributes, top)